@@ -0,0 +1,392 @@
+"""
+Pluggable transport for coordinator requests.
+
+`get_matches()` talks to the coordinator through the transport returned by
+`get_transport()`. Three modes are available:
+
+- live:   PUT to the coordinator URL (the EA coordinator by default, or any
+          `coordinator_url`, e.g. the local mock in scripts/mock_coordinator.py)
+- record: like live, and every request/response pair is saved as JSON
+- replay: answer from previously recorded pairs, no network at all
+
+The mode is picked from settings.json (`coordinator_mode`, `coordinator_url`,
+`coordinator_recordings`) the first time a transport is needed, or set
+explicitly with `set_transport()`.
+
+Every coordinator call is also guarded by the shared `breaker`
+(`CircuitBreaker`) and `rate_limiter` (`TokenBucket`), so when the
+coordinator is down lookups fail fast instead of each caller retrying on its
+own.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+import requests
+
+import metrics
+import status
+
+COORDINATOR_URL = "https://coordinator.cnctdra.ea.com:6531/Coordinator/webresources/com.petroglyph.coord.observer.match.find.matches/"
+DEFAULT_RECORDINGS_DIR = "coordinator_recordings"
+
+CoordinatorResponse = namedtuple("CoordinatorResponse", ["status_code", "text"])
+
+
+class TransportError(Exception):
+    """Raised by a transport when no response can be produced (network error, recorded error)."""
+
+
+class NoRecordingError(TransportError):
+    """Raised by `ReplayTransport` for a session that has no recording. Not a coordinator failure."""
+
+
+def _session_key(payload):
+    try:
+        return str(int(payload["observerMatchFindMatches"]["sessionID"]))
+    except Exception:
+        return "unknown"
+
+
+class LiveTransport:
+    """PUT requests to a real (or mock) coordinator using `requests`."""
+
+    mode = "live"
+
+    def __init__(self, url=COORDINATOR_URL, timeout=10):
+        self.url = url
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def put(self, payload, headers):
+        try:
+            response = self._session.put(self.url, json=payload, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise TransportError(str(e)) from e
+        return CoordinatorResponse(response.status_code, response.text)
+
+
+class RecordingTransport:
+    """
+    Wrap another transport and save every request/response pair to `directory`.
+
+    Files are named `<sessionID>_<epoch_ms>_<sequence>.json`, so sorting the
+    names puts each session's responses in the order they were recorded; that
+    is the order `ReplayTransport` returns them in.
+    """
+
+    mode = "record"
+
+    def __init__(self, inner, directory):
+        self.inner = inner
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._seq = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, payload, headers):
+        start = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = self.inner.put(payload, headers)
+        except TransportError as e:
+            error = str(e)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        record = {
+            "recorded_at": time.time(),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "request": {"payload": payload},
+            "response": None if response is None else {"status_code": response.status_code, "text": response.text},
+            "error": error,
+        }
+        with self._lock:
+            self._seq += 1
+            name = f"{_session_key(payload)}_{int(time.time() * 1000)}_{self._seq:04d}.json"
+        try:
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as fh:
+                json.dump(record, fh, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"ERROR saving coordinator recording: {e}")
+
+        if error is not None:
+            raise TransportError(error)
+        return response
+
+
+class ReplayTransport:
+    """
+    Serve responses recorded by `RecordingTransport`, keyed by sessionID.
+
+    Repeated calls for a session walk through its recordings in order and then
+    keep returning the last one. A session with no recording raises
+    `NoRecordingError`, which `get_matches()` returns None for at once: no
+    retries, and no failure counted against the circuit breaker.
+    """
+
+    mode = "replay"
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._records = {}
+        self._cursor = {}
+        self._load()
+
+    def _load(self):
+        try:
+            names = sorted(os.listdir(self.directory))
+        except Exception as e:
+            print(f"ERROR reading coordinator recordings from {self.directory}: {e}")
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as fh:
+                    record = json.load(fh)
+            except Exception as e:
+                print(f"WARNING: skipping unreadable recording {name}: {e}")
+                continue
+            key = _session_key(record.get("request", {}).get("payload", {}))
+            self._records.setdefault(key, []).append(record)
+
+    def put(self, payload, headers):
+        key = _session_key(payload)
+        with self._lock:
+            records = self._records.get(key)
+            if not records:
+                raise NoRecordingError(f"no recorded coordinator response for sessionID {key}")
+            idx = self._cursor.get(key, 0)
+            record = records[min(idx, len(records) - 1)]
+            self._cursor[key] = idx + 1
+        if record.get("error") or record.get("response") is None:
+            raise TransportError(record.get("error") or "recorded error")
+        resp = record["response"]
+        return CoordinatorResponse(int(resp.get("status_code", 200)), resp.get("text", ""))
+
+
+class CircuitBreaker:
+    """
+    Client-side circuit breaker with closed, open and half-open states.
+
+    After `failure_threshold` consecutive failures the breaker opens and
+    `allow()` returns False, so callers fail fast. Once `reset_timeout`
+    seconds have passed it goes half-open and lets a single probe through:
+    success closes it, failure re-opens it.
+
+    The state is published as the `coordinator_breaker_state` gauge and as a
+    "breaker" status event for the GUI.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    # Truthy `allow()` result that hands the caller the half-open probe
+    PROBE = "probe"
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        metrics.set_gauge("coordinator_breaker_state", self._state)
+
+    def _set_state_locked(self, state):
+        if state != self._state:
+            print(f"Coordinator circuit breaker: {self._state} -> {state}")
+            self._state = state
+            metrics.set_gauge("coordinator_breaker_state", state)
+            metrics.incr(f"coordinator_breaker_{state}")
+            status.publish("breaker", state=state, retry_in=self.reset_timeout if state == self.OPEN else 0.0)
+
+    @property
+    def state(self):
+        """Current state; an expired open breaker reports half_open."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def retry_in(self):
+        """Seconds until an open breaker allows a probe (0 when not open)."""
+        with self._lock:
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def allow(self):
+        """
+        Return whether a call may go out now: False to fail fast, `PROBE` when
+        the caller holds the half-open probe, True for a normal closed-state call.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._set_state_locked(self.HALF_OPEN)
+            # Half-open: only one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return self.PROBE
+
+    def release(self):
+        """Give back the half-open probe (`allow()` returned `PROBE`) without making a call."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def reset(self):
+        """Close the breaker and forget past failures (benchmarks, tests)."""
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state_locked(self.CLOSED)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state_locked(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if was_probe or self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._set_state_locked(self.OPEN)
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: `rate` tokens per second, bursts up to `capacity`.
+    """
+
+    def __init__(self, rate=0.5, capacity=5):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill_locked(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; never blocks."""
+        with self._lock:
+            self._refill_locked(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """Block until a token is available or `timeout` seconds pass. Returns True on success."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill_locked(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate if self.rate > 0 else 1.0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    async def acquire_async(self, timeout=None):
+        """Like `acquire()`, but waits with `asyncio.sleep` so other tasks keep running."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_acquire():
+            with self._lock:
+                wait = (1.0 - self._tokens) / self.rate if self.rate > 0 else 1.0
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            await asyncio.sleep(max(wait, 0.01))
+        return True
+
+
+# Shared by every coordinator caller (match lookups, prefetches, ...)
+breaker = CircuitBreaker()
+rate_limiter = TokenBucket()
+
+
+def configure_limits(settings):
+    """Apply breaker / rate-limit settings (`coordinator_breaker_failures`,
+    `coordinator_breaker_reset_s`, `coordinator_rate_per_min`, `coordinator_burst`)."""
+    try:
+        breaker.failure_threshold = max(1, int(settings.get("coordinator_breaker_failures", breaker.failure_threshold)))
+        breaker.reset_timeout = float(settings.get("coordinator_breaker_reset_s", breaker.reset_timeout))
+        if "coordinator_rate_per_min" in settings:
+            rate_limiter.rate = float(settings["coordinator_rate_per_min"]) / 60.0
+        if "coordinator_burst" in settings:
+            rate_limiter.capacity = float(settings["coordinator_burst"])
+    except Exception as e:
+        print(f"WARNING: invalid coordinator limit settings: {e}")
+
+
+def transport_from_settings(settings, base_dir=None):
+    """Build a transport from settings.json values. Unknown modes fall back to live."""
+    mode = str(settings.get("coordinator_mode", "live")).lower()
+    url = settings.get("coordinator_url") or COORDINATOR_URL
+    recordings = settings.get("coordinator_recordings") or DEFAULT_RECORDINGS_DIR
+    if base_dir and not os.path.isabs(recordings):
+        recordings = os.path.join(base_dir, recordings)
+
+    if mode == "replay":
+        return ReplayTransport(recordings)
+    if mode == "record":
+        return RecordingTransport(LiveTransport(url), recordings)
+    if mode != "live":
+        print(f"WARNING: unknown coordinator_mode {mode!r}; using live")
+    return LiveTransport(url)
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def set_transport(transport):
+    """Install the transport used by `get_matches()` (None resets to settings-based default)."""
+    global _transport
+    with _transport_lock:
+        _transport = transport
+
+
+def get_transport():
+    """Return the active transport, creating it from settings.json on first use."""
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            settings = {}
+            try:
+                if os.path.exists("settings.json"):
+                    with open("settings.json", "r", encoding="utf-8") as sf:
+                        settings = json.load(sf)
+            except Exception:
+                settings = {}
+            _transport = transport_from_settings(settings)
+            configure_limits(settings)
+            print(f"Coordinator transport: {_transport.mode}")
+        return _transport
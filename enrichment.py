@@ -0,0 +1,204 @@
+"""
+Per-player enrichment for match overlays.
+
+`get_match_player_info()` only knows what is in the `find.matches` payload.
+`PlayerEnricher` adds extra per-player data (recent form from the local match
+history, rank or other fields from an HTTP endpoint) by querying every player
+in parallel, at most `concurrency` at a time, with a per-SteamID cache.
+`enrich()` returns when all lookups finish or the deadline passes, whichever
+comes first; lookups still running keep going in the background and fill the
+cache for the next update.
+
+Sources are callables `source(steam_id) -> dict` (plain or coroutine
+functions). Every outcome is counted in `metrics`: `enrichment_lookups`,
+`enrichment_cache_hits`, `enrichment_errors`, `enrichment_late`, and the
+`enrichment_ms` timing.
+
+Enabled with `enrichment_sources` in settings.json (see
+`enricher_from_settings()`).
+"""
+
+import asyncio
+import inspect
+import time
+
+import requests
+
+import metrics
+from models import coerce_players
+
+ENRICH_DEADLINE_S = 1.5
+ENRICH_CONCURRENCY = 4
+ENRICH_CACHE_TTL_S = 600.0
+# Matches summarised by the history source's form string
+FORM_LENGTH = 5
+
+
+def history_form_source(store, length=FORM_LENGTH):
+    """
+    Source: recent form from a `MatchHistoryStore`.
+
+    Returns {"form": "WLW..." (newest first), "elo_trend": summed ELO change}
+    over the player's last `length` matches with a known result, or {} if none.
+    """
+    def source(steam_id):
+        rows = [r for r in store.player_matches(steam_id, limit=length + 1) if r["elo_delta"]]
+        rows = rows[:length]
+        if not rows:
+            return {}
+        return {
+            "form": "".join("W" if r["elo_delta"] > 0 else "L" for r in rows),
+            "elo_trend": round(sum(r["elo_delta"] for r in rows), 1),
+        }
+    return source
+
+
+def http_json_source(url_template, timeout=2.0):
+    """
+    Source: GET `url_template.format(steam_id=...)` and use the JSON object it
+    returns (e.g. {"rank": 12}). Non-200 responses yield {}.
+    """
+    session = requests.Session()
+
+    def source(steam_id):
+        response = session.get(url_template.format(steam_id=steam_id), timeout=timeout)
+        if response.status_code != 200:
+            return {}
+        data = response.json()
+        return data if isinstance(data, dict) else {}
+    return source
+
+
+class PlayerEnricher:
+    """
+    Bounded-parallel, cached per-player lookups with a deadline.
+
+    Args:
+        sources (list): Callables `source(steam_id) -> dict`; results are merged in order.
+        concurrency (int): Maximum players looked up at once.
+        deadline (float): Seconds `enrich()` waits before returning what has arrived.
+        cache_ttl (float): Seconds a player's merged result is reused.
+    """
+
+    def __init__(self, sources, concurrency=ENRICH_CONCURRENCY, deadline=ENRICH_DEADLINE_S,
+                 cache_ttl=ENRICH_CACHE_TTL_S):
+        self.sources = list(sources)
+        self.concurrency = max(1, int(concurrency))
+        self.deadline = float(deadline)
+        self.cache_ttl = float(cache_ttl)
+        self._cache = {}  # steam_id -> (result, expires_at)
+        self._inflight = {}  # steam_id -> asyncio.Task
+        self._semaphore = None
+        self._loop = None
+
+    def cached(self, steam_id):
+        """Return the cached result for `steam_id`, or None if missing or expired."""
+        entry = self._cache.get(steam_id)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._cache[steam_id]
+            return None
+        return result
+
+    async def _call(self, source, steam_id):
+        if inspect.iscoroutinefunction(source):
+            return await source(steam_id)
+        return await asyncio.to_thread(source, steam_id)
+
+    async def _lookup(self, steam_id):
+        merged = {}
+        try:
+            async with self._semaphore:
+                metrics.incr("enrichment_lookups")
+                for source in self.sources:
+                    try:
+                        result = await self._call(source, steam_id)
+                    except Exception as e:
+                        print(f"WARNING: enrichment lookup failed for {steam_id}: {e}")
+                        metrics.incr("enrichment_errors")
+                        continue
+                    if result:
+                        merged.update(result)
+            self._cache[steam_id] = (merged, time.monotonic() + self.cache_ttl)
+        finally:
+            self._inflight.pop(steam_id, None)
+        return merged
+
+    def cancel(self):
+        """Cancel lookups still running (e.g. past the deadline) and return their tasks."""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    async def enrich(self, players_info, deadline=None):
+        """
+        Return `players_info` as `PlayerInfo` copies carrying their enrichment results in `extra`.
+
+        Players whose lookup misses the deadline get whatever the cache holds
+        (possibly {}); their lookups keep running in the background.
+        """
+        if deadline is None:
+            deadline = self.deadline
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tasks and the semaphore belong to one loop; start fresh on a new one
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._inflight = {}
+
+        players_info = coerce_players(players_info)
+        start = time.perf_counter()
+        pending = {}
+        for p in players_info:
+            steam_id = p.steam_id
+            if steam_id is None or steam_id in pending:
+                continue
+            if self.cached(steam_id) is not None:
+                metrics.incr("enrichment_cache_hits")
+                continue
+            task = self._inflight.get(steam_id)
+            if task is None:
+                task = asyncio.create_task(self._lookup(steam_id))
+                self._inflight[steam_id] = task
+            pending[steam_id] = task
+
+        if pending:
+            _, late = await asyncio.wait(list(pending.values()), timeout=deadline)
+            if late:
+                print(f"DEBUG: enrichment deadline passed with {len(late)} lookup(s) outstanding")
+                metrics.incr("enrichment_late", len(late))
+        metrics.observe("enrichment_ms", (time.perf_counter() - start) * 1000)
+
+        return [p.with_extra(self.cached(p.steam_id) if p.steam_id is not None else None) for p in players_info]
+
+
+def enricher_from_settings(settings, history=None):
+    """
+    Build a `PlayerEnricher` from settings.json, or None when no source is enabled.
+
+    Keys: `enrichment_sources` (any of "history", "http"), `enrichment_url`
+    (URL template with `{steam_id}`, used by "http"), `enrichment_deadline_s`,
+    `enrichment_concurrency`.
+    """
+    sources = []
+    for name in settings.get("enrichment_sources") or []:
+        if name == "history" and history is not None:
+            sources.append(history_form_source(history))
+        elif name == "http" and settings.get("enrichment_url"):
+            sources.append(http_json_source(settings["enrichment_url"]))
+        else:
+            print(f"WARNING: enrichment source {name!r} unavailable; skipping")
+    if not sources:
+        return None
+    try:
+        return PlayerEnricher(
+            sources,
+            concurrency=int(settings.get("enrichment_concurrency", ENRICH_CONCURRENCY)),
+            deadline=float(settings.get("enrichment_deadline_s", ENRICH_DEADLINE_S)),
+        )
+    except Exception as e:
+        print(f"WARNING: invalid enrichment settings: {e}")
+        return None
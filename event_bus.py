@@ -0,0 +1,254 @@
+"""
+Match lifecycle event bus for plugins and external tools.
+
+The monitor publishes four events on the shared `bus`:
+
+- match_detected:   map_name, session_id, match_id, detected_at
+- players_resolved: map_name, session_id, players (list of `PlayerInfo.to_dict()` dicts)
+- overlay_written:  map_name, outputs (target -> path), write_ms, partial (players still loading),
+                    hidden (the hidden page after a match), players (count)
+- match_ended:      map_name, session_id
+
+Every subscriber has its own bounded queue and daemon worker thread, so
+`publish()` never blocks: a slow subscriber only drops its own oldest events
+(`plugin_events_dropped`) and a crashing one is counted (`plugin_errors`)
+without affecting the monitor or other subscribers.
+
+Plugins are Python files in the `plugins/` directory next to the program,
+each defining `register(bus)`. Events can also be fanned out as JSON to a
+local UDP socket (`event_udp`: "127.0.0.1:9999") or a named pipe / FIFO
+(`event_pipe`), so tools in other languages can react without polling.
+"""
+
+import importlib.util
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+import metrics
+
+MATCH_DETECTED = "match_detected"
+PLAYERS_RESOLVED = "players_resolved"
+OVERLAY_WRITTEN = "overlay_written"
+MATCH_ENDED = "match_ended"
+EVENT_TYPES = (MATCH_DETECTED, PLAYERS_RESOLVED, OVERLAY_WRITTEN, MATCH_ENDED)
+
+DEFAULT_PLUGINS_DIR = "plugins"
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """
+    One subscriber: a bounded queue drained by its own daemon thread.
+
+    Args:
+        callback (callable): `callback(event)`; `event` is a dict with "event",
+            "time" and the payload fields. Treat it as read-only.
+        events (iterable): Event types to receive; None for all.
+        name (str): Name used in log messages.
+        maxsize (int): Queue size; when full the oldest event is dropped.
+    """
+
+    def __init__(self, callback, events=None, name=None, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        self.callback = callback
+        self.events = frozenset(events) if events else None
+        self.name = name or getattr(callback, "__name__", repr(callback))
+        self._queue = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"plugin-{self.name}", daemon=True)
+        self._thread.start()
+
+    def wants(self, event_type):
+        return not self._closed and (self.events is None or event_type in self.events)
+
+    def offer(self, event):
+        """Queue `event` without blocking, dropping the oldest queued event if full."""
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    metrics.incr("plugin_events_dropped")
+                except queue.Empty:
+                    pass
+
+    def close(self):
+        self._closed = True
+        self.offer(None)
+
+    def join(self, timeout=None):
+        """After `close()`, wait until the events queued before it have been delivered."""
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            try:
+                self.callback(event)
+            except Exception as e:
+                print(f"ERROR in plugin {self.name} handling {event.get('event')}: {e}")
+                metrics.incr("plugin_errors")
+
+
+class EventBus:
+    """Fan-out of lifecycle events to subscribers; `publish()` never blocks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = []
+
+    def subscribe(self, callback, events=None, name=None, maxsize=SUBSCRIBER_QUEUE_SIZE):
+        """Register `callback` for `events` (None for all). Returns the `Subscription`."""
+        sub = Subscription(callback, events=events, name=name, maxsize=maxsize)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+        sub.close()
+
+    def publish(self, event_type, **payload):
+        """Queue an event for every interested subscriber."""
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s.wants(event_type)]
+        if not subscribers:
+            return
+        event = {"event": event_type, "time": time.time()}
+        event.update(payload)
+        metrics.incr(f"plugin_event_{event_type}")
+        for sub in subscribers:
+            sub.offer(event)
+
+
+# Shared by the monitor and every plugin
+bus = EventBus()
+
+
+def _to_json(event):
+    return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class UdpSink:
+    """Subscriber callback that sends each event as one JSON datagram to `host:port`."""
+
+    def __init__(self, host, port):
+        self.address = (host, int(port))
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__name__ = f"udp:{host}:{port}"
+
+    def __call__(self, event):
+        self._sock.sendto(_to_json(event).encode("utf-8"), self.address)
+
+
+class PipeSink:
+    """
+    Subscriber callback that writes each event as a JSON line to a named pipe
+    (Windows `\\\\.\\pipe\\name`) or FIFO. Events are skipped while no reader
+    is connected.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+        self.__name__ = f"pipe:{path}"
+
+    def _open(self):
+        if os.name == "nt":
+            return open(self.path, "w", encoding="utf-8")
+        # Non-blocking open fails at once when the FIFO has no reader
+        fd = os.open(self.path, os.O_WRONLY | os.O_NONBLOCK)
+        os.set_blocking(fd, True)
+        return os.fdopen(fd, "w", encoding="utf-8")
+
+    def __call__(self, event):
+        try:
+            if self._fh is None:
+                self._fh = self._open()
+            self._fh.write(_to_json(event) + "\n")
+            self._fh.flush()
+        except OSError:
+            # No reader (or it went away); reconnect on the next event
+            if self._fh is not None:
+                try:
+                    self._fh.close()
+                except OSError:
+                    pass
+            self._fh = None
+            metrics.incr("plugin_pipe_skipped")
+
+
+def load_plugins(directory, target_bus=None):
+    """
+    Import every `*.py` in `directory` and call its `register(bus)`.
+    Returns the names of plugins loaded; failures are logged and skipped.
+    """
+    target_bus = target_bus or bus
+    loaded = []
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".py") and not n.startswith("_"))
+    except FileNotFoundError:
+        return loaded
+    except Exception as e:
+        print(f"ERROR listing plugins in {directory}: {e}")
+        return loaded
+    for name in names:
+        module_name = f"cncdocker_plugin_{os.path.splitext(name)[0]}"
+        try:
+            spec = importlib.util.spec_from_file_location(module_name, os.path.join(directory, name))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            register = getattr(module, "register", None)
+            if register is None:
+                print(f"WARNING: plugin {name} has no register(bus); skipping")
+                continue
+            register(target_bus)
+            loaded.append(name)
+            print(f"Loaded plugin: {name}")
+        except Exception as e:
+            print(f"ERROR loading plugin {name}: {e}")
+            metrics.incr("plugin_errors")
+    return loaded
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_from_settings(settings, base_dir=None):
+    """
+    Load plugins and attach UDP / pipe fan-out from settings.json, once per process.
+
+    Keys: `plugins_dir` (default "plugins", relative to `base_dir`),
+    `event_udp` ("host:port"), `event_pipe` (pipe or FIFO path).
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+
+    plugins_dir = settings.get("plugins_dir") or DEFAULT_PLUGINS_DIR
+    if base_dir and not os.path.isabs(plugins_dir):
+        plugins_dir = os.path.join(base_dir, plugins_dir)
+    load_plugins(plugins_dir)
+
+    udp = settings.get("event_udp")
+    if udp:
+        try:
+            host, port = str(udp).rsplit(":", 1)
+            bus.subscribe(UdpSink(host, port))
+        except Exception as e:
+            print(f"WARNING: invalid event_udp {udp!r}: {e}")
+    pipe = settings.get("event_pipe")
+    if pipe:
+        bus.subscribe(PipeSink(pipe))
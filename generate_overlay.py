@@ -8,7 +8,10 @@ import html
 import re
 import sys
 import urllib.parse
-from datetime import datetime
+from datetime import datetime, timezone
+
+from models import coerce_players
+from themes import ThemeCache, theme_directory
 
 
 def generate_placeholder_overlay(output_dir=None, html_name="match_info.html"):
@@ -31,34 +34,12 @@ def generate_placeholder_overlay(output_dir=None, html_name="match_info.html"):
     except Exception:
         pass
 
-    html_content = f"""<!doctype html>
-<html lang="en">
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <title>Match Overlay</title>
-    <style>
-        /* Futuristic / modern styles */
-        html, body {{ height:100%; background: transparent !important; }}
-        body {{ margin:0; padding:0; font-family: 'Orbitron', 'Segoe UI', Tahoma, Arial, sans-serif; background: transparent !important; color: #e6f0ff; }}
-        /* Removed opaque outer background to ensure OBS transparency works (Streamlabs/CEF) */
-        .wrap {{ padding: 18px; box-sizing: border-box; background: transparent; border-radius: 0; backdrop-filter: none; width: 420px; }}
-        .placeholder {{ font-size: 24px; font-weight: 800; color: #9ff0ff; text-align: center; letter-spacing: 0.6px; text-shadow: -2px -2px 0 #000, 2px -2px 0 #000, -2px 2px 0 #000, 2px 2px 0 #000, 0 4px 12px rgba(0,0,0,0.6); }}
-    </style>
-</head>
-<body>
-    <div class="wrap">
-        <div class="placeholder">⏳ Waiting for match...</div>
-    </div>
-</body>
-</html>
-"""
+    html_content = theme_cache.render("placeholder")
 
     html_path = os.path.join(output_dir, html_name)
 
     try:
-        with open(html_path, 'w', encoding='utf-8') as hf:
-            hf.write(html_content)
+        write_file_atomic(html_path, html_content)
         print(f"Placeholder overlay created: {os.path.abspath(html_path)}")
         return html_path
     except Exception as e:
@@ -102,6 +83,22 @@ def _get_resource_dir():
         return os.path.dirname(__file__)
 
 
+def svg_to_data_uri(svg_text):
+    """Return a compact data URI for SVG markup.
+
+    Only the characters that are unsafe inside a double-quoted CSS/HTML URL are
+    percent-encoded; this is ~20% smaller than full URL-encoding or base64.
+    Falls back to full URL-encoding if the SVG uses single quotes itself.
+    """
+    text = re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', svg_text.strip()))
+    if "'" in text:
+        return f'data:image/svg+xml;utf8,{urllib.parse.quote(text)}'
+    text = text.replace('"', "'")
+    for ch, enc in (('%', '%25'), ('#', '%23'), ('<', '%3C'), ('>', '%3E')):
+        text = text.replace(ch, enc)
+    return f'data:image/svg+xml;utf8,{text}'
+
+
 def _flag_to_data_uri(flag_filename, output_dir=None):
     """Return a data URI for the given SVG flag, or fallback to a file:// URL.
 
@@ -138,9 +135,7 @@ def _flag_to_data_uri(flag_filename, output_dir=None):
                     b64 = base64.b64encode(data).decode('ascii')
                     return f'data:image/svg+xml;base64,{b64}'
 
-                # URL-encode the SVG text for safe inclusion
-                svg_escaped = urllib.parse.quote(text)
-                return f'data:image/svg+xml;utf8,{svg_escaped}'
+                return svg_to_data_uri(text)
         except Exception:
             continue
 
@@ -159,350 +154,564 @@ def _flag_to_data_uri(flag_filename, output_dir=None):
     return fallback
 
 
-def generate_match_webpage(players_info, map_name, output_dir=None, refresh_interval=5,
-                           html_name="match_info.html"):
+# Player color index -> name-box border color
+COLOR_MAP = {
+    0: "#FFFF00",
+    1: "#00FFFF",
+    2: "#FF3333",
+    3: "#00FF00",
+    4: "#FFA500",
+    5: "#3366FF",
+    6: "#800080",
+    7: "#FF69B4",
+}
+DEFAULT_COLOR = "#CCCCCC"
+
+# Map faction numbers to flag filenames in the Flags/ directory
+FLAG_MAP = {
+    4: "su.svg",
+    6: "ua.svg",
+    1: "tr.svg",
+    8: "fr.svg",
+    7: "de.svg",
+    3: "gr.svg",
+    2: "es.svg",
+    5: "gb.svg",
+}
+
+# Map-specific display names and start-position labels
+MAP_POSITION_MAPPINGS = {
+    "MOBIUS_RED_ALERT_MULTIPLAYER_123_MAP": {
+        "display": "Bullseye",
+        "positions": {
+            0: "Top Right",
+            1: "Bot Left",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_COMMUNITY_2_MAP": {
+        "display": "Tournament Arena",
+        "positions": {
+            0: "Bot Right",
+            1: "Top Left",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_22_MAP": {
+        "display": "Path Beyond",
+        "positions": {
+            0: "Bot Right",
+            1: "Top Left",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_COMMUNITY_3_MAP": {
+        "display": "Ore Rift",
+        "positions": {
+            0: "Left",
+            1: "Right",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_5_MAP": {
+        "display": "Keep Off the Grass",
+        "positions": {
+            0: "Top Left",
+            1: "Bot Right",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_COMMUNITY_1_MAP": {
+        "display": "Canyon",
+        "positions": {
+            0: "Top Right",
+            1: "Bot Left",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_K0_MAP": {
+        "display": "Arena Valley",
+        "positions": {
+            0: "Bot Right",
+            1: "Top Left",
+        }
+    },
+    "MOBIUS_RED_ALERT_MULTIPLAYER_9_MAP": {
+        "display": "North by Northwest",
+        "positions": {
+            0: "Top Right",
+            1: "Right Top",
+            2: "Right Bot",
+            3: "Bot Right",
+            4: "Bot Left",
+            5: "Left Bot",
+            6: "Left Top",
+            7: "Top Left",
+        }
+    },
+}
+
+# Flag SVGs never change while the program runs; resolve each one once
+_flag_src_cache = {}
+
+
+def _flag_src(flag_filename, output_dir=None):
+    key = (flag_filename, output_dir)
+    src = _flag_src_cache.get(key)
+    if src is None:
+        src = _flag_to_data_uri(flag_filename, output_dir=output_dir)
+        if not src:
+            # Last-resort: use a relative path
+            src = os.path.join("Flags", flag_filename).replace('\\', '/')
+        _flag_src_cache[key] = src
+    return src
+
+
+def get_map_display_name(map_name):
+    """Return the friendly map name, or "Unknown Map" (raw map keys are never shown)."""
+    try:
+        map_info = MAP_POSITION_MAPPINGS.get(str(map_name), None)
+        display_map = map_info.get("display") if map_info else None
+    except Exception:
+        display_map = None
+    return display_map or "Unknown Map"
+
+
+def get_position_label(map_key, pos):
+    """Return the human-readable start position for a map, falling back to the number."""
+    try:
+        info = MAP_POSITION_MAPPINGS.get(map_key, None)
+        if info and isinstance(pos, int):
+            return info["positions"].get(pos, str(pos))
+    except Exception:
+        pass
+    return str(pos)
+
+
+def format_session_stats(stats):
+    """Return the plain-text session stats line, or "" when there is nothing to show."""
+    if not stats:
+        return ""
+    parts = []
+    elo_change = stats.get("elo_change")
+    if isinstance(elo_change, (int, float)):
+        parts.append(f"Session {elo_change:+.0f} ELO")
+    wins = stats.get("wins", 0)
+    losses = stats.get("losses", 0)
+    if wins or losses:
+        parts.append(f"W/L {wins}-{losses}")
+    wins_today = stats.get("wins_today", 0)
+    losses_today = stats.get("losses_today", 0)
+    if wins_today or losses_today:
+        parts.append(f"Today {wins_today}-{losses_today}")
+    map_rec = stats.get("map") or {}
+    if map_rec.get("wins") or map_rec.get("losses"):
+        parts.append(f"This map {map_rec.get('wins', 0)}-{map_rec.get('losses', 0)}")
+    return " · ".join(parts)
+
+
+def build_match_view(players_info, map_name, stats=None, output_dir=None, pending=False):
     """
-    Generate a static HTML overlay with meta-refresh.
-    
+    Normalize one match update into the view-model shared by every renderer.
+
+    Names are decoded, the map and start positions are resolved to display labels
+    and flags to image sources exactly once here; the HTML, JSON and text renderers
+    only format the result.
+
     Args:
-        players_info (list): List of dicts with keys: 'name', 'elo', 'start_position', 'color', etc.
-        map_name (str): Map name string.
-        output_dir (str): Output directory. Defaults to module directory.
-        refresh_interval (int): Page refresh interval in seconds. Default 5.
-        html_name (str): Output HTML filename.
-    
+        players_info (list): `PlayerInfo` (or player dicts) as returned by `get_match_player_info()`.
+        map_name (str): Raw map key from the log.
+        stats (dict): Optional session summary from `SessionStats.summary()`.
+        output_dir (str): Output directory, used to locate Flags/ next to the overlay.
+        pending (bool): True for the partial view shown while player data is still loading.
+
     Returns:
-        str: Path to generated HTML file, or None on error.
+        dict: {'map_key', 'map_display', 'players', 'stats', 'stats_text', 'pending', 'hidden', 'updated'}.
     """
-    if output_dir is None:
-        output_dir = os.path.dirname(__file__)
+    map_key = str(map_name) if map_name is not None else None
+    players = []
+    for p in coerce_players(players_info):
+        # Decode octal escapes in the name
+        name = decode_octal_escapes(p.name)
 
-    try:
-        os.makedirs(output_dir, exist_ok=True)
-    except Exception:
-        pass
+        elo_text = f"{p.elo:.0f}" if p.elo is not None else "N/A"
 
-    color_map = {
-        0: "#FFFF00",
-        1: "#00FFFF",
-        2: "#FF3333",
-        3: "#00FF00",
-        4: "#FFA500",
-        5: "#3366FF",
-        6: "#800080",
-        7: "#FF69B4",
+        # Map start position to human-readable label where possible
+        if p.start_position is not None:
+            start_label = get_position_label(map_key, p.start_position)
+        else:
+            start_label = "-"
+
+        color_index = int(p.color) if p.color is not None else None
+        faction = int(p.faction) if p.faction is not None else None
+        flag_file = FLAG_MAP.get(faction) if faction is not None else None
+
+        players.append({
+            "name": name,
+            "elo": p.elo,
+            "elo_text": elo_text,
+            "team": p.team,
+            "steam_id": p.steam_id,
+            "start_position": p.start_position,
+            "start_label": start_label,
+            "color": color_index,
+            "color_hex": COLOR_MAP.get(color_index, DEFAULT_COLOR),
+            "faction": faction,
+            "flag_file": flag_file,
+            # Prefer embedding the SVG as a data URI so OBS/CEF can render it
+            "flag_src": _flag_src(flag_file, output_dir) if flag_file else None,
+            # Enrichment results (e.g. rank, form); empty when enrichment is off or missed its deadline
+            "extra": p.extras,
+        })
+
+    return {
+        "map_key": map_key,
+        "map_display": get_map_display_name(map_key),
+        "players": players,
+        "stats": stats,
+        "stats_text": format_session_stats(stats),
+        "pending": bool(pending),
+        "hidden": False,
+        "updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
     }
 
-    # Map faction numbers to flag filenames in the Flags/ directory
-    flag_map = {
-        4: "su.svg",
-        6: "ua.svg",
-        1: "tr.svg",
-        8: "fr.svg",
-        7: "de.svg",
-        3: "gr.svg",
-        2: "es.svg",
-        5: "gb.svg",
-    }
 
-    # (safe_map will be derived from the friendly mapping below; do not expose raw map keys)
-
-    # Map-specific display names and start-position labels
-    map_position_mappings = {
-        "MOBIUS_RED_ALERT_MULTIPLAYER_123_MAP": {
-            "display": "Bullseye",
-            "positions": {
-                0: "Top Right",
-                1: "Bot Left",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_COMMUNITY_2_MAP": {
-            "display": "Tournament Arena",
-            "positions": {
-                0: "Bot Right",
-                1: "Top Left",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_22_MAP": {
-            "display": "Path Beyond",
-            "positions": {                
-                0: "Bot Right",
-                1: "Top Left",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_COMMUNITY_3_MAP": {
-            "display": "Ore Rift",
-            "positions": {
-                0: "Left",
-                1: "Right",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_5_MAP": {
-            "display": "Keep Off the Grass",
-            "positions": {
-                0: "Top Left",
-                1: "Bot Right",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_COMMUNITY_1_MAP": {
-            "display": "Canyon",
-            "positions": {
-                0: "Top Right",
-                1: "Bot Left",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_K0_MAP": {
-            "display": "Arena Valley",
-            "positions": {
-                0: "Bot Right",
-                1: "Top Left",
-            }
-        },
-        "MOBIUS_RED_ALERT_MULTIPLAYER_9_MAP": {
-            "display": "North by Northwest",
-            "positions": {
-                0: "Top Right",
-                1: "Right Top",
-                2: "Right Bot",
-                3: "Bot Right",
-                4: "Bot Left",
-                5: "Left Bot",
-                6: "Left Top",
-                7: "Top Left",
-            }
-        },
+def build_hidden_view():
+    """View-model for a hidden overlay: no map, players or stats, so every target is cleared."""
+    return {
+        "map_key": None,
+        "map_display": "",
+        "players": [],
+        "stats": None,
+        "stats_text": "",
+        "pending": False,
+        "hidden": True,
+        "updated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
     }
 
-    def get_position_label(map_key, pos):
-        try:
-            info = map_position_mappings.get(map_key, None)
-            if info and isinstance(pos, int):
-                return info["positions"].get(pos, str(pos))
-        except Exception:
-            pass
-        return str(pos)
 
-    # Prefer friendly display name when available; do NOT show raw map keys
-    try:
-        map_info = map_position_mappings.get(str(map_name), None)
-        display_map = map_info.get("display") if map_info else None
-    except Exception:
-        display_map = None
-    # If no friendly name is available, show a generic placeholder (do not expose raw map key)
-    display_map = display_map or "Unknown Map"
-    safe_map = html.escape(str(display_map))
-
-    # Build player HTML rows
-    player_html = ""
-    if players_info:
-        for p in players_info:
-            name = p.get("name", "Unknown")
-            # Decode octal escapes in the name
-            name = decode_octal_escapes(name)
-            name = html.escape(name)
-            
-            elo = p.get("elo", "N/A")
-            if isinstance(elo, (int, float)):
-                elo_text = f"{elo:.0f}"
-            else:
-                elo_text = html.escape(str(elo))
-            
-            start = p.get("start_position", "-")
-            color_idx = p.get("color", None)
-            try:
-                color_hex = color_map.get(int(color_idx), "#CCCCCC")
-            except Exception:
-                color_hex = "#CCCCCC"
-
-            faction = p.get("faction", None)
-            faction_text = html.escape(str(faction)) if faction is not None else ""
-
-            # Map start position to human-readable label where possible
-            try:
-                start_int = int(start)
-            except Exception:
-                start_int = None
-            if start_int is not None:
-                start_label = get_position_label(str(map_name), start_int)
-            else:
-                start_label = str(start)
-            # Only show start position in the left meta; faction is represented by the flag image
-            left_meta = f"Start: {html.escape(str(start_label))}"
-            # Determine flag path, if available
-            flag_filename = None
-            try:
-                faction_val = p.get("faction", None)
-                if faction_val is not None:
-                    faction_int = int(faction_val)
-                    flag_filename = flag_map.get(faction_int)
-            except Exception:
-                flag_filename = None
+def write_file_atomic(path, content):
+    """Write `content` via a temp file + rename so OBS never reads a half-written file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        fh.write(content)
+    os.replace(tmp_path, path)
+
+
+# Shared overlay stylesheet. Minified once at import; per-update CSS only adds
+# the color and flag classes actually used by the players on screen.
+MATCH_CSS = """
+/* Futuristic / modern styles */
+html, body { height:100%; background: transparent !important; }
+body { margin:0; padding:0; font-family: 'Orbitron', 'Segoe UI', Tahoma, Arial, sans-serif; background: transparent !important; color: #e6f0ff; }
+.wrap { padding: 18px; box-sizing: border-box; background: rgba(8,10,14,0.35); border-radius: 12px; }
+/* darker outline using multiple shadows for better contrast */
+.map { font-size: 30px; font-weight: 900; color: #9ff0ff; margin: 0 0 12px 0; letter-spacing: 0.6px; text-align: center;
+       text-shadow: -2px -2px 0 #000, 2px -2px 0 #000, -2px 2px 0 #000, 2px 2px 0 #000, 0 4px 12px rgba(0,0,0,0.6); }
+/* Force player boxes to sit horizontally next to each other.
+   The outer container width is computed to fit the players, so
+   we don't need a horizontal scrollbar. */
+.players { display: flex; gap: 12px; flex-wrap: nowrap; overflow: visible; }
+.player { background: linear-gradient(180deg, rgba(255,255,255,0.02), rgba(255,255,255,0.01)); padding: 10px; border-radius: 10px; flex: 0 0 260px; display:flex; align-items:center; gap:10px; border:1px solid rgba(160,220,255,0.06); box-shadow: 0 8px 24px rgba(0,0,0,0.6); overflow: hidden; box-sizing: border-box; }
+.flag { display:inline-block; flex:0 0 auto; width:28px; height:18px; vertical-align:middle; margin-right:8px; border-radius:2px; box-shadow:0 2px 6px rgba(0,0,0,0.6); background-size:100% 100%; }
+.player-left { display:flex; flex-direction:column; flex:1; min-width:0 }
+.name-box { display:inline-block; padding:8px 12px; border-radius:8px; font-weight:800; color:#fff; background:transparent; border:2px solid rgba(255,255,255,0.04); backdrop-filter: blur(2px); max-width: 180px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+.name-box.none { background:#666; color:#fff; }
+.session { font-size: 15px; font-weight: 700; color: #cfd8e6; margin: -6px 0 12px 0; text-align: center; text-shadow: -1px -1px 0 #000, 1px -1px 0 #000, -1px 1px 0 #000, 1px 1px 0 #000; }
+.meta { margin-top:8px; font-size:13px; color:#cfd8e6; display:flex; justify-content:space-between; align-items:center }
+.meta .left { font-size:13px; color:#cfd8e6; }
+.meta .elo { font-size:20px; font-weight:900; color:#ffffff; padding:6px 10px; border-radius:8px; background:linear-gradient(90deg, rgba(255,255,255,0.03), rgba(255,255,255,0.01)); box-shadow: 0 4px 12px rgba(0,0,0,0.6); }
+"""
 
-            flag_html = ""
-            if flag_filename:
-                # Prefer embedding the SVG as a data URI so OBS/CEF can render it
-                flag_src = _flag_to_data_uri(flag_filename, output_dir=output_dir)
-                if flag_src:
-                    flag_html = f"<img class=\"flag\" src=\"{flag_src}\" alt=\"flag\">"
-                else:
-                    # Last-resort: use a relative path
-                    flag_path = os.path.join("Flags", flag_filename).replace('\\', '/')
-                    flag_html = f"<img class=\"flag\" src=\"{flag_path}\" alt=\"flag\">"
+# Shown in place of the player boxes on a partial (log-only) overlay
+PENDING_PLAYERS_TEXT = "Loading players..."
 
-            # render player block with left column (name + meta) and right column (elo)
-            player_html += f"""
-            <div class="player">
-                {flag_html}
-                <div class="player-left">
-                    <div class="name-box" style="border-color:{color_hex};">{name}</div>
-                    <div class="meta"><div class="left">{left_meta}</div><div class="elo">{elo_text}</div></div>
-                </div>
-            </div>
-"""
-    else:
-        player_html = """
-      <div class="player">
-        <div class="name-box" style="background:#666; color:#fff;">No players</div>
-      </div>
-"""
+# Size budget for a rendered match overlay (8 players, every flag embedded once).
+# Checked by tests/test_overlay_size.py (and `scripts/generate_sample_overlay.py --check-budget`).
+OVERLAY_SIZE_BUDGET = 64 * 1024
 
-    # Compute container width so it fits the player boxes snugly but doesn't leave excessive empty space.
-    try:
-        players_count = len(players_info) if players_info else 1
-    except Exception:
-        players_count = 1
 
-    # Measurements (keep in sync with CSS .player flex-basis and gaps)
-    player_box_width = 260  # matches flex-basis used for .player (includes padding/border due to box-sizing)
-    gap = 12
-    padding = 18  # left+right padding from .wrap (wrap uses border-box)
+def minify_css(css):
+    """
+    Strip comments and redundant whitespace from a stylesheet.
+
+    Only for the built-in stylesheets: it does not keep quoted strings intact
+    and drops the space in descendant selectors like `.a :first-child`, so
+    user theme CSS is used as written.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{}:;,>])\s*', r'\1', css)
+    css = css.replace(';}', '}')
+    return css.strip()
 
-    total_width = players_count * player_box_width + max(0, players_count - 1) * gap
-    # Add a small extra margin to account for shadows/borders and rounding
-    extra_margin = 24
-    total_width += extra_margin
-    # Clamp to reasonable bounds so overlay isn't absurdly small or huge
-    min_width = 420
-    max_width = 1200
-    wrap_width = int(max(min_width, min(total_width, max_width)))
 
-    html_content = f"""<!doctype html>
+def minify_html(markup):
+    """Collapse whitespace between tags. Not safe for pages with <pre> or inline scripts, so built-in templates only."""
+    markup = re.sub(r'>\s+<', '><', markup)
+    return markup.strip()
+
+
+# Built-in theme. User themes (see themes.py) may replace any template or
+# stylesheet; templates are string.Template text, so a literal $ is written $$.
+MATCH_TEMPLATE = """<!doctype html>
 <html lang="en">
 <head>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <meta http-equiv="refresh" content="{int(refresh_interval)}">
+    <meta http-equiv="refresh" content="$refresh">
+    <meta name="cncdocker-page" content="match">
     <title>Match Overlay</title>
-    <style>
-        /* Futuristic / modern styles */
-        html, body {{ height:100%; background: transparent !important; }}
-        body {{ margin:0; padding:0; font-family: 'Orbitron', 'Segoe UI', Tahoma, Arial, sans-serif; background: transparent !important; color: #e6f0ff; }}
-        .wrap {{ padding: 18px; box-sizing: border-box; background: rgba(8,10,14,0.35); border-radius: 12px; }}
-        .map {{ font-size: 30px; font-weight: 900; color: #9ff0ff; margin: 0 0 12px 0; letter-spacing: 0.6px; text-align: center; /* center the map title */
-             /* darker outline using multiple shadows for better contrast */
-             text-shadow: -2px -2px 0 #000, 2px -2px 0 #000, -2px 2px 0 #000, 2px 2px 0 #000, 0 4px 12px rgba(0,0,0,0.6); }}
-          /* Force player boxes to sit horizontally next to each other.
-              The outer container width is computed to fit the players, so
-              we don't need a horizontal scrollbar. */
-          .players {{ display: flex; gap: 12px; flex-wrap: nowrap; overflow: visible; }}
-        .player {{ background: linear-gradient(180deg, rgba(255,255,255,0.02), rgba(255,255,255,0.01)); padding: 10px; border-radius: 10px; flex: 0 0 260px; display:flex; align-items:center; gap:10px; border:1px solid rgba(160,220,255,0.06); box-shadow: 0 8px 24px rgba(0,0,0,0.6); overflow: hidden; box-sizing: border-box; }}
-        .flag {{ width:28px; height:18px; vertical-align:middle; margin-right:8px; border-radius:2px; box-shadow:0 2px 6px rgba(0,0,0,0.6); }}
-        .player-left {{ display:flex; flex-direction:column; flex:1; min-width:0 }}
-        .name-box {{ display:inline-block; padding:8px 12px; border-radius:8px; font-weight:800; color:#fff; background:transparent; border:2px solid rgba(255,255,255,0.04); backdrop-filter: blur(2px); max-width: 180px; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }}
-        .meta {{ margin-top:8px; font-size:13px; color:#cfd8e6; display:flex; justify-content:space-between; align-items:center }}
-        .meta .left {{ font-size:13px; color:#cfd8e6; }}
-        .meta .elo {{ font-size:20px; font-weight:900; color:#ffffff; padding:6px 10px; border-radius:8px; background:linear-gradient(90deg, rgba(255,255,255,0.03), rgba(255,255,255,0.01)); box-shadow: 0 4px 12px rgba(0,0,0,0.6); }}
-    </style>
+    <style>$css</style>
 </head>
 <body>
-    <div class="wrap" style="width:{wrap_width}px;">
-        <div class="map">{safe_map}</div>
-        <div class="players">{player_html}
-        </div>
+    <div class="wrap">
+        <div class="map">$map</div>$session<div class="players">$players</div>
     </div>
 </body>
 </html>
 """
 
-    html_path = os.path.join(output_dir, html_name)
-
-    try:
-        with open(html_path, 'w', encoding='utf-8') as hf:
-            hf.write(html_content)
-        print(f"Webpage generated successfully: {os.path.abspath(html_path)}")
-        return html_path
-    except Exception as e:
-        print(f"ERROR writing HTML overlay: {e}")
-        return None
-
-
-def hide_overlay(output_dir=None, html_name="match_info.html"):
-    """Overwrite the overlay HTML with a minimal fully-transparent page.
-
-    This keeps the same filename so OBS Browser sources remain pointed to the
-    same path but nothing is visible on the stream until the next match.
-    """
-    if output_dir is None:
-        output_dir = os.path.dirname(__file__)
-
-        # Create a minimal transparent page that still runs the JS poller.
-        # The poller will fetch the same file every 2s and inject any new map/players
-        # HTML when a match overlay is written, so OBS will update automatically.
-        html = """<!doctype html>
+PLACEHOLDER_TEMPLATE = """<!doctype html>
 <html lang="en">
 <head>
     <meta charset="utf-8">
     <meta name="viewport" content="width=device-width, initial-scale=1">
-    <title>Overlay Hidden</title>
-    <style>
-        html,body{height:100%;background:transparent!important;margin:0;padding:0}
-        .map{display:none}
-        .players{display:none}
-    </style>
+    <title>Match Overlay</title>
+    <style>$css</style>
 </head>
 <body>
-    <div class="map"></div>
-    <div class="players"></div>
-    <script>
+    <div class="wrap">
+        <div class="placeholder">⏳ Waiting for match...</div>
+    </div>
+</body>
+</html>
+"""
+
+PLACEHOLDER_CSS = """
+/* Futuristic / modern styles */
+html, body { height:100%; background: transparent !important; }
+body { margin:0; padding:0; font-family: 'Orbitron', 'Segoe UI', Tahoma, Arial, sans-serif; background: transparent !important; color: #e6f0ff; }
+/* Removed opaque outer background to ensure OBS transparency works (Streamlabs/CEF) */
+.wrap { padding: 18px; box-sizing: border-box; background: transparent; border-radius: 0; backdrop-filter: none; width: 420px; }
+.placeholder { font-size: 24px; font-weight: 800; color: #9ff0ff; text-align: center; letter-spacing: 0.6px; text-shadow: -2px -2px 0 #000, 2px -2px 0 #000, -2px 2px 0 #000, 2px 2px 0 #000, 0 4px 12px rgba(0,0,0,0.6); }
+"""
+
+# Emitted only by match pages; the hidden page's poller looks for it. Added to
+# custom match.html templates that leave it out (see render_match_html()).
+MATCH_PAGE_MARKER = '<meta name="cncdocker-page" content="match">'
+
+# The hidden page polls its own file every 2s and reloads as soon as a match
+# overlay has been written, so the page picks up its stylesheet and OBS
+# updates automatically. Custom hidden.html templates must keep $poller.
+# The marker is assembled at runtime so the poller's own source never
+# contains it (the hidden page would otherwise match itself and reload forever).
+HIDDEN_POLLER = """<script>
     (function(){
         const pollInterval = 2000; // ms
+        const marker = ['name="cncdocker-page"', 'content="match"'].join(' ');
         async function fetchAndUpdate(){
             try{
                 const url = window.location.href.split('#')[0].split('?')[0] + '?_=' + Date.now();
                 const res = await fetch(url, {cache: 'no-store'});
                 if(!res.ok) return;
                 const text = await res.text();
-                // Try to extract the map/players sections from the fetched HTML
-                const mapMatch = text.match(/<div class=\"map\">([\s\S]*?)<\/div>/i);
-                const playersMatch = text.match(/<div class=\"players\">([\s\S]*?)<\/div>/i);
-                if(mapMatch && playersMatch){
-                    const curMap = document.querySelector('.map');
-                    const curPlayers = document.querySelector('.players');
-                    if(curMap && curPlayers){
-                        const newMapHtml = mapMatch[1];
-                        const newPlayersHtml = playersMatch[1];
-                        // If found, replace DOM and make visible
-                        if(curMap.innerHTML !== newMapHtml) curMap.innerHTML = newMapHtml;
-                        if(curPlayers.innerHTML !== newPlayersHtml) curPlayers.innerHTML = newPlayersHtml;
-                        curMap.style.display = '';
-                        curPlayers.style.display = '';
-                    }
-                }
+                // A match overlay carries the page marker; reload to show it with its own styles
+                if(text.indexOf(marker) !== -1) window.location.reload();
             }catch(e){/* ignore */}
         }
         setInterval(fetchAndUpdate, pollInterval);
         // also run immediately once
         fetchAndUpdate();
     })();
-    </script>
+    </script>"""
+
+HIDDEN_TEMPLATE = """<!doctype html>
+<html lang="en">
+<head>
+    <meta charset="utf-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <title>Overlay Hidden</title>
+    <style>$css</style>
+</head>
+<body>
+    $poller
 </body>
 </html>
 """
 
+HIDDEN_CSS = "html,body{height:100%;background:transparent!important;margin:0;padding:0}"
+
+# The built-in match page and stylesheets are minified here, once. User theme
+# files are used as written: the minifiers are not safe for arbitrary CSS/HTML.
+DEFAULT_THEME = {
+    "match": (minify_html(MATCH_TEMPLATE) + "\n", minify_css(MATCH_CSS)),
+    "placeholder": (PLACEHOLDER_TEMPLATE, minify_css(PLACEHOLDER_CSS)),
+    "hidden": (HIDDEN_TEMPLATE, HIDDEN_CSS),
+}
+
+# Compiled once; `configure_theme()` switches to a user theme and the monitor
+# calls `theme_cache.check_for_changes()` to pick up edits.
+theme_cache = ThemeCache(DEFAULT_THEME)
+
+
+def configure_theme(settings, base_dir=None):
+    """Select the theme named by `theme` / `themes_dir` in settings.json (built-in if unset)."""
+    directory = theme_directory(settings, base_dir)
+    if directory != theme_cache.directory:
+        theme_cache.set_directory(directory)
+        print(f"Overlay theme: {directory or 'built-in'}")
+
+
+def _color_class(color_index):
+    return f"c{color_index}" if color_index in COLOR_MAP else "cx"
+
+
+def _flag_class(flag_file):
+    return "f-" + os.path.splitext(flag_file)[0]
+
+
+def render_match_html(view, refresh_interval=5):
+    """
+    Render the overlay HTML for a view-model from `build_match_view()`.
+
+    With the built-in theme the output is compact: minified CSS and markup, and
+    per-player colors and flags emitted once as shared classes instead of
+    repeated inline styles and repeated SVG data URIs. User theme files are
+    used as written.
+    """
+    safe_map = html.escape(view["map_display"])
+
+    # Build player HTML rows and collect the color/flag classes they use
+    player_html = []
+    color_rules = {}
+    flag_rules = {}
+    players = view["players"]
+    if players:
+        for p in players:
+            flag_html = ""
+            if p["flag_src"]:
+                flag_cls = _flag_class(p["flag_file"])
+                flag_rules.setdefault(flag_cls, p["flag_src"])
+                flag_html = f'<i class="flag {flag_cls}"></i>'
+            color_cls = _color_class(p["color"])
+            color_rules.setdefault(color_cls, p["color_hex"])
+            # Only show start position in the left meta; faction is represented by the flag image
+            left_meta = f"Start: {html.escape(str(p['start_label']))}"
+            extra = p.get("extra") or {}
+            if extra.get("rank") is not None:
+                left_meta += f" · #{html.escape(str(extra['rank']))}"
+            if extra.get("form"):
+                left_meta += f" · {html.escape(str(extra['form']))}"
+
+            # render player block with left column (name + meta) and right column (elo)
+            player_html.append(
+                f'<div class="player">{flag_html}<div class="player-left">'
+                f'<div class="name-box {color_cls}">{html.escape(p["name"])}</div>'
+                f'<div class="meta"><div class="left">{left_meta}</div><div class="elo">{html.escape(p["elo_text"])}</div></div>'
+                f'</div></div>'
+            )
+    elif view.get("pending"):
+        player_html.append(f'<div class="player"><div class="name-box none">{PENDING_PLAYERS_TEXT}</div></div>')
+    else:
+        player_html.append('<div class="player"><div class="name-box none">No players</div></div>')
+
+    # Compute container width so it fits the player boxes snugly but doesn't leave excessive empty space.
+    players_count = len(players) if players else 1
+
+    # Measurements (keep in sync with CSS .player flex-basis and gaps)
+    player_box_width = 260  # matches flex-basis used for .player (includes padding/border due to box-sizing)
+    gap = 12
+
+    total_width = players_count * player_box_width + max(0, players_count - 1) * gap
+    # Add a small extra margin to account for shadows/borders and rounding
+    extra_margin = 24
+    total_width += extra_margin
+    # Clamp to reasonable bounds so overlay isn't absurdly small or huge
+    min_width = 420
+    max_width = 1200
+    wrap_width = int(max(min_width, min(total_width, max_width)))
+
+    session_text = html.escape(view.get("stats_text") or "")
+    session_html = f'<div class="session">{session_text}</div>' if session_text else ""
+
+    dynamic_css = f".wrap{{width:{wrap_width}px}}"
+    dynamic_css += "".join(f".{cls}{{border-color:{hexval}}}" for cls, hexval in color_rules.items())
+    dynamic_css += "".join(f'.{cls}{{background-image:url("{src}")}}' for cls, src in flag_rules.items())
+
+    html_content = theme_cache.render(
+        "match",
+        extra_css=dynamic_css,
+        refresh=int(refresh_interval),
+        map=safe_map,
+        session=session_html,
+        players="".join(player_html),
+    )
+
+    if MATCH_PAGE_MARKER not in html_content:
+        # Custom match.html without the marker: the hidden page could not detect it
+        html_content = html_content.replace("</head>", MATCH_PAGE_MARKER + "</head>", 1)
+
+    return html_content
+
+
+def write_match_html(view, output_dir=None, refresh_interval=5, html_name="match_info.html"):
+    """
+    Render `view` and write it as the overlay HTML file.
+
+    Returns:
+        str: Path to generated HTML file, or None on error.
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except Exception:
+        pass
+
+    html_path = os.path.join(output_dir, html_name)
+
+    try:
+        write_file_atomic(html_path, render_match_html(view, refresh_interval=refresh_interval))
+        print(f"Webpage generated successfully: {os.path.abspath(html_path)}")
+        return html_path
+    except Exception as e:
+        print(f"ERROR writing HTML overlay: {e}")
+        return None
+
+
+def generate_match_webpage(players_info, map_name, output_dir=None, refresh_interval=5,
+                           html_name="match_info.html", stats=None):
+    """
+    Generate a static HTML overlay with meta-refresh.
+    
+    Args:
+        players_info (list): List of dicts with keys: 'name', 'elo', 'start_position', 'color', etc.
+        map_name (str): Map name string.
+        output_dir (str): Output directory. Defaults to module directory.
+        refresh_interval (int): Page refresh interval in seconds. Default 5.
+        html_name (str): Output HTML filename.
+        stats (dict): Optional session summary from `SessionStats.summary()`, shown under the map name.
+    
+    Returns:
+        str: Path to generated HTML file, or None on error.
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
+    view = build_match_view(players_info, map_name, stats=stats, output_dir=output_dir)
+    return write_match_html(view, output_dir=output_dir, refresh_interval=refresh_interval, html_name=html_name)
+
+
+def hide_overlay(output_dir=None, html_name="match_info.html"):
+    """Overwrite the overlay HTML with a minimal fully-transparent page.
+
+    This keeps the same filename so OBS Browser sources remain pointed to the
+    same path but nothing is visible on the stream until the next match.
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
+
+    # Minimal transparent page that still runs the JS poller (see HIDDEN_POLLER)
+    hidden_html = theme_cache.render("hidden", poller=HIDDEN_POLLER)
+
     path = os.path.join(output_dir, html_name)
     try:
-        with open(path, 'w', encoding='utf-8') as fh:
-            fh.write(html)
+        write_file_atomic(path, hidden_html)
         print(f"Overlay hidden: {os.path.abspath(path)}")
         return path
     except Exception as e:
@@ -0,0 +1,313 @@
+"""
+Bulk import of archived game logs into the match history.
+
+Streamers keep old `LogFile_*.txt` copies for months. `import_logs()` splits
+every file into newline-aligned byte ranges and scans them on a process pool,
+one range per task, so a directory of gigabytes uses every core. Each worker
+runs the monitor's own `parse_log_events()` over its range; a range that
+starts mid-file picks up the sessionID in effect with `find_last_session_id()`.
+
+The parent process deduplicates matches by (sessionID, match ID) across files
+(archived copies often overlap) and against the existing database, and
+writes new ones with `MatchHistoryStore.record_many()` in batches. A
+`quickmatchfound` line without a match ID is stored under the same "crc:"
+line id the live monitor uses (see `tail_state.line_match_id()`), so two
+matches on the same map in one session stay apart and a match recorded live
+is found again on import.
+The logs carry no player data, so imported matches have map, sessionID,
+match ID and the streamer's SteamID only. `detected_at` comes from the
+line's HH:MM:SS stamp: the file's modification time gives the date of its
+last line, and earlier lines go back one day per midnight crossing, so
+imported matches sort with live ones in `player_matches()` and
+`head_to_head()`.
+"""
+
+import bisect
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from log_scan import LINE_TIME_RE, find_last_session_id, head_steam_id, line_seconds, stamp_seconds
+from tail_state import line_match_id
+
+DEFAULT_PATTERN = "LogFile_*.txt"
+# Files larger than this are split into several tasks
+SPLIT_BYTES = 64 << 20
+# Bytes read and parsed at a time inside a worker
+READ_CHUNK_BYTES = 4 << 20
+INSERT_BATCH_SIZE = 1000
+# A line stamped this much earlier than the one before it means the log crossed midnight
+MIDNIGHT_GAP_S = 12 * 3600
+
+
+def find_log_files(directory, pattern=DEFAULT_PATTERN, recursive=False):
+    """Return the log files in `directory` matching `pattern`, sorted by path."""
+    if recursive:
+        paths = glob.glob(os.path.join(directory, "**", pattern), recursive=True)
+    else:
+        paths = glob.glob(os.path.join(directory, pattern))
+    return sorted(p for p in paths if os.path.isfile(p))
+
+
+def plan_ranges(paths, split_bytes=SPLIT_BYTES):
+    """
+    Split files into (path, start, end) tasks of about `split_bytes`.
+
+    Boundaries are moved forward to the next line start, so every line
+    belongs to exactly one range.
+    """
+    tasks = []
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"WARNING: skipping {path}: {e}")
+            continue
+        if size == 0:
+            continue
+        bounds = [0]
+        with open(path, "rb") as f:
+            pos = split_bytes
+            while pos < size:
+                f.seek(pos)
+                f.readline()
+                pos = f.tell()
+                if pos >= size:
+                    break
+                bounds.append(pos)
+                pos += split_bytes
+        bounds.append(size)
+        for start, end in zip(bounds, bounds[1:]):
+            if end > start:
+                tasks.append((path, start, end))
+    return tasks
+
+
+def scan_log_range(path, start, end, read_chunk=READ_CHUNK_BYTES):
+    """
+    Worker: parse the lines of `path` in bytes [start, end) into match records.
+
+    Returns:
+        dict: {path, start, bytes, lines, matches, first_secs, last_secs, days}.
+        Each match is a `record_many()` record without `detected_at`; its
+        match_id falls back to the line's "crc:" id, and it carries "secs"
+        (the line's time of day, or None) and "day" (midnight crossings in the
+        range before it). `first_secs` / `last_secs` are the range's first and
+        last line stamps and `days` its midnight crossings, so
+        `assign_detected_at()` can place the range within the file.
+    """
+    # Imported here so only workers pay for the monitor's imports
+    from log_monitor import parse_log_events
+
+    session_id = find_last_session_id(path, end=start) if start > 0 else None
+    steam_id = head_steam_id(path)
+    matches = []
+    lines = 0
+    day = 0
+    first_secs = prev_secs = None
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        carry = b""
+        while remaining > 0 or carry:
+            data = f.read(min(read_chunk, remaining)) if remaining > 0 else b""
+            remaining -= len(data)
+            data = carry + data
+            if remaining > 0:
+                cut = data.rfind(b"\n") + 1
+                if cut == 0:
+                    carry = data
+                    continue
+                data, carry = data[:cut], data[cut:]
+            else:
+                carry = b""
+            text = data.decode("utf-8", errors="ignore")
+            lines += text.count("\n")
+
+            # Offsets in `text` where a line starts a new day
+            chunk_day = day
+            crossings = []
+            for m in LINE_TIME_RE.finditer(text):
+                secs = stamp_seconds(m)
+                if prev_secs is not None and prev_secs - secs > MIDNIGHT_GAP_S:
+                    day += 1
+                    crossings.append(m.start())
+                if first_secs is None:
+                    first_secs = secs
+                prev_secs = secs
+
+            events, session_id = parse_log_events(text, session_id)
+            cursor = 0
+            for event in events:
+                if event["type"] != "match_found":
+                    continue
+                pos = text.find(event["line"], cursor)
+                if pos < 0:
+                    pos = cursor
+                cursor = pos + len(event["line"])
+                matches.append({
+                    "players": [],
+                    "map_name": event["map_name"],
+                    "session_id": event["session_id"],
+                    "match_id": line_match_id(event["match_id"], event["line"]),
+                    "local_steam_id": steam_id,
+                    "secs": line_seconds(event["line"]),
+                    "day": chunk_day + bisect.bisect_right(crossings, pos),
+                })
+    return {
+        "path": path, "start": start, "bytes": end - start, "lines": lines, "matches": matches,
+        "first_secs": first_secs, "last_secs": prev_secs, "days": day,
+    }
+
+
+def assign_detected_at(results, mtime):
+    """
+    Set `detected_at` on the matches of one file from its `scan_log_range()` results.
+
+    The file's modification time gives the date of its last stamped line
+    (the day before when that line's time of day is later than the mtime's);
+    every midnight crossing between a match and the end of the file moves it
+    back one day. Matches without a stamp keep their place in the log just
+    after the previous match. Returns the matches in log order.
+    """
+    results = sorted(results, key=lambda r: r["start"])
+    offset = 0
+    prev_last = None
+    bases = []
+    for r in results:
+        if prev_last is not None and r["first_secs"] is not None and prev_last - r["first_secs"] > MIDNIGHT_GAP_S:
+            offset += 1
+        bases.append(offset)
+        offset += r["days"]
+        if r["last_secs"] is not None:
+            prev_last = r["last_secs"]
+
+    end = datetime.fromtimestamp(mtime)
+    end_day = end.date()
+    if prev_last is not None and prev_last > end.hour * 3600 + end.minute * 60 + end.second + 1:
+        end_day -= timedelta(days=1)
+
+    matches = []
+    for r, base in zip(results, bases):
+        for m in r["matches"]:
+            m["day"] += base
+            matches.append(m)
+    last = None
+    for i, m in enumerate(matches):
+        secs = m.pop("secs")
+        day = m.pop("day")
+        if secs is not None:
+            midnight = datetime.combine(end_day - timedelta(days=offset - day), datetime.min.time())
+            m["detected_at"] = (midnight + timedelta(seconds=secs)).timestamp()
+        elif last is not None:
+            m["detected_at"] = last + 0.001
+        else:
+            m["detected_at"] = mtime - (len(matches) - i) * 0.001
+        last = m["detected_at"]
+    return matches
+
+
+def _session_int(session_id):
+    try:
+        return int(session_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def import_logs(paths, store, workers=None, split_bytes=SPLIT_BYTES, batch_size=INSERT_BATCH_SIZE, progress=None):
+    """
+    Scan `paths` in parallel and record every new match in `store`.
+
+    Args:
+        paths (list): Log files to import.
+        store (MatchHistoryStore): Destination history.
+        workers (int): Worker processes. Defaults to the CPU count.
+        split_bytes (int): Target bytes per task.
+        batch_size (int): Matches per `record_many()` transaction.
+        progress (callable): Called with the running stats dict after each task.
+
+    Returns:
+        dict: {tasks, done, files, bytes, total_bytes, lines, matches, duplicates,
+        no_session, inserted, errors, elapsed_s, mb_per_s}.
+    """
+    tasks = plan_ranges(paths, split_bytes)
+    stats = {
+        "tasks": len(tasks),
+        "done": 0,
+        "files": len({t[0] for t in tasks}),
+        "bytes": 0,
+        "total_bytes": sum(end - start for _, start, end in tasks),
+        "lines": 0,
+        "matches": 0,
+        "duplicates": 0,
+        "no_session": 0,
+        "inserted": 0,
+        "errors": 0,
+        "elapsed_s": 0.0,
+        "mb_per_s": 0.0,
+    }
+    # (session_id, match_id) of every stored or queued match, like the table's unique index
+    stored = {(session_id, match_id) for session_id, match_id, _ in store.known_matches()}
+    # A file's matches are timed and recorded once all of its ranges are scanned
+    remaining = {}
+    for path, _, _ in tasks:
+        remaining[path] = remaining.get(path, 0) + 1
+    scanned = {}
+    pending = []
+    started = time.perf_counter()
+
+    def flush():
+        if pending:
+            stats["inserted"] += store.record_many(pending)
+            pending.clear()
+
+    def add_file(path):
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            mtime = time.time()
+        for record in assign_detected_at(scanned.pop(path), mtime):
+            stats["matches"] += 1
+            if record["session_id"] is None:
+                # No sessionID before the match: it could never be looked up or deduplicated
+                stats["no_session"] += 1
+                continue
+            key = (_session_int(record["session_id"]), str(record["match_id"]))
+            if key in stored:
+                stats["duplicates"] += 1
+                continue
+            stored.add(key)
+            pending.append(record)
+
+    if not tasks:
+        return stats
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = {pool.submit(scan_log_range, *task): task for task in tasks}
+        for future in as_completed(futures):
+            path, start, end = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"ERROR scanning {path} [{start}:{end}]: {e}")
+                stats["errors"] += 1
+                result = {"start": start, "bytes": end - start, "lines": 0, "matches": [],
+                          "first_secs": None, "last_secs": None, "days": 0}
+            stats["done"] += 1
+            stats["bytes"] += result["bytes"]
+            stats["lines"] += result["lines"]
+            scanned.setdefault(path, []).append(result)
+            remaining[path] -= 1
+            if not remaining[path]:
+                add_file(path)
+            if len(pending) >= batch_size:
+                flush()
+            elapsed = time.perf_counter() - started
+            stats["elapsed_s"] = round(elapsed, 2)
+            stats["mb_per_s"] = round(stats["bytes"] / (1 << 20) / elapsed, 1) if elapsed > 0 else 0.0
+            if progress:
+                progress(stats)
+    flush()
+    stats["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return stats
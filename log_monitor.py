@@ -2,22 +2,72 @@ import time
 import os
 import re
 import json
-import tkinter as tk
-from tkinter import messagebox
+import asyncio
+import inspect
 import threading
-import requests
-from generate_overlay import generate_match_webpage, hide_overlay
+from generate_overlay import configure_theme, theme_cache
+from overlay_outputs import render_match, render_hidden, DEFAULT_TARGETS
+from coordinator import get_transport, NoRecordingError, TransportError, breaker, rate_limiter
+from match_history import MatchHistoryStore, DEFAULT_DB_NAME
+from match_stats import SessionStats
+from prefetch import MatchPrefetcher
+from enrichment import enricher_from_settings
+from tail_state import TailCheckpoint, match_key, line_match_id
+from themes import THEME_CHECK_INTERVAL_S
+from log_scan import STEAM_ID_SCAN_BYTES, backscan_log, find_last_session_id, head_steam_id, parse_session_id_from_line
+import metrics
+import status
+import event_bus
+from profiling import profiler, configure_from_settings as configure_profiling
+from supervisor import Supervisor, HealthServer, WorkerRun, STALL_TIMEOUT_S
+from models import PlayerInfo, MatchSnapshot
 
 # Shared event imported into main script
 stop_log_event = threading.Event()
 
+# Coordinator retry schedule: attempts per lookup, upper bound for one request,
+# delay between attempts and the longest wait for a rate-limit token
+MAX_ATTEMPTS = 3
+REQUEST_TIMEOUT_S = 15
+RETRY_DELAY_S = 10
+RATE_LIMIT_WAIT_S = 10
+# Upper bound for resolving a match's players overall; covers the whole retry
+# schedule so the last attempt is never cut off
+RESOLVE_TIMEOUT_S = MAX_ATTEMPTS * (RATE_LIMIT_WAIT_S + REQUEST_TIMEOUT_S) + (MAX_ATTEMPTS - 1) * RETRY_DELAY_S
+# Target time from detecting quickmatchfound to the first overlay paint
+FIRST_PAINT_SLO_MS = 500
+# How often tasks check `stop_log_event` while waiting
+STOP_CHECK_INTERVAL = 0.1
+# Seconds a cancelled run waits for its tasks to unwind
+CANCEL_WAIT_S = 2.0
+# Delay before hiding the overlay after a match ends (close_overlay_on_match_complete)
+OVERLAY_HIDE_DELAY_S = 5
 
-def get_matches(session_id):
+
+def get_matches(session_id, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY_S, transport=None):
     """
     Performs the same PUT request as the previous module's `get_matches()`.
-    Returns the response text or raises on network errors.
+    Returns the response text, or None if every attempt failed.
+
+    Synchronous wrapper around `get_matches_async()` for threads and scripts;
+    do not call it from code already running on an event loop.
+    """
+    return asyncio.run(get_matches_async(session_id, max_attempts, retry_delay, transport))
+
+
+async def get_matches_async(session_id, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY_S, transport=None,
+                            request_timeout=REQUEST_TIMEOUT_S):
     """
-    url = "https://coordinator.cnctdra.ea.com:6531/Coordinator/webresources/com.petroglyph.coord.observer.match.find.matches/"
+    Coroutine version of `get_matches()`.
+
+    The request goes through the coordinator transport (live, record or replay;
+    see coordinator.py) unless an explicit `transport` is given. The blocking
+    transport call runs in the loop's executor and is bounded by
+    `request_timeout`; retry delays are cancellable sleeps, so a slow
+    coordinator never stalls other tasks on the loop.
+    """
+    if transport is None:
+        transport = get_transport()
 
     payload = {
         "observerMatchFindMatches": {
@@ -33,163 +83,911 @@ def get_matches(session_id):
 
     print("Executing PUT request in get_matches()...")
 
-    max_attempts = 3
     retry_statuses = {400, 403, 500}
 
     for attempt in range(1, max_attempts + 1):
+        # Shared breaker/limiter: fail fast while the coordinator is known to be down
+        allowed = breaker.allow()
+        if not allowed:
+            print(f"Coordinator circuit {breaker.state}; failing fast (retry in {breaker.retry_in():.0f}s).")
+            metrics.incr("coordinator_fast_fail")
+            return None
+        # Holding the half-open probe: every way out of this attempt must record an
+        # outcome or give it back. A closed-state pass has nothing to give back.
+        holding = allowed == breaker.PROBE
         try:
-            response = requests.put(url, json=payload, headers=headers, timeout=10)
-            print(f"Attempt {attempt}: Status code: {response.status_code}")
+            if not await rate_limiter.acquire_async(timeout=RATE_LIMIT_WAIT_S):
+                print("Coordinator rate limit reached; skipping request.")
+                metrics.incr("coordinator_rate_limited")
+                if holding:
+                    breaker.release()
+                    holding = False
+                return None
+
+            try:
+                start = time.perf_counter()
+                try:
+                    response = await asyncio.wait_for(
+                        asyncio.to_thread(transport.put, payload, headers), request_timeout
+                    )
+                except asyncio.TimeoutError as e:
+                    raise TransportError(f"no response within {request_timeout}s") from e
+                finally:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    metrics.observe("coordinator_request_ms", elapsed_ms)
+                print(f"Attempt {attempt}: Status code: {response.status_code}")
+                status.publish("api", latency_ms=round(elapsed_ms, 1), status=response.status_code, attempt=attempt)
+
+                if response.status_code in retry_statuses:
+                    breaker.record_failure()
+                    holding = False
+                    if attempt < max_attempts and breaker.state == breaker.CLOSED:
+                        print(f"Received {response.status_code}, retrying in {retry_delay} seconds...")
+                        status.publish("retry", attempt=attempt, reason=f"HTTP {response.status_code}")
+                        await asyncio.sleep(retry_delay)
+                        continue
+                    else:
+                        print(f"Received {response.status_code} on final attempt, giving up.")
+                        return None
 
-            if response.status_code in retry_statuses:
-                if attempt < max_attempts:
-                    print(f"Received {response.status_code}, retrying in 10 seconds...")
-                    time.sleep(10)
+                # Successful-ish response; return body
+                breaker.record_success()
+                holding = False
+                print("HTTP Response Body:")
+                print(response.text)
+                return response.text
+
+            except NoRecordingError as e:
+                # Replay of a session that was never recorded: the coordinator did not fail
+                print(f"Attempt {attempt}: {e}; giving up.")
+                metrics.incr("coordinator_replay_miss")
+                if holding:
+                    breaker.release()
+                    holding = False
+                return None
+
+            except TransportError as e:
+                breaker.record_failure()
+                holding = False
+                print(f"Attempt {attempt}: Network error: {e}")
+                status.publish("api", latency_ms=round(elapsed_ms, 1), status=None, attempt=attempt)
+                if attempt < max_attempts and breaker.state == breaker.CLOSED:
+                    print(f"Retrying in {retry_delay} seconds...")
+                    status.publish("retry", attempt=attempt, reason="network error")
+                    await asyncio.sleep(retry_delay)
                     continue
                 else:
-                    print(f"Received {response.status_code} on final attempt, giving up.")
+                    print("Network error on final attempt, giving up.")
                     return None
 
-            # Successful-ish response; return body
-            print("HTTP Response Body:")
-            print(response.text)
-            return response.text
+        except BaseException:
+            # Cancelled (resolve timeout, watchdog, stop) or an unexpected transport error
+            if holding:
+                breaker.release()
+            raise
 
-        except requests.exceptions.RequestException as e:
-            print(f"Attempt {attempt}: Network error: {e}")
-            if attempt < max_attempts:
-                print("Retrying in 10 seconds...")
-                time.sleep(10)
-                continue
-            else:
-                print("Network error on final attempt, giving up.")
-                return None
 
+def parse_log_events(data, session_id=None):
+    """
+    Split a chunk of log text into monitor events, in log order.
 
-def tail_log_file(filepath, output_dir=None):
-    print("DEBUG: tail_log_file started")
+    Args:
+        data (str): Newly read log text.
+        session_id (str): sessionID in effect before this chunk, if known.
+
+    Returns:
+        tuple: (events, session_id). Each event is a dict with a "type" of
+        "match_found" (line, map_name, match_id, session_id) or "match_ended"
+        (line); session_id is the last sessionID seen in the chunk, or the one
+        passed in.
+    """
+    events = []
+    for line in data.splitlines():
+        if "sessionID" in line:
+            session_id = parse_session_id_from_line(line) or session_id
+        lower = line.lower()
+        if "quickmatchfound" in lower:
+            events.append({
+                "type": "match_found",
+                "line": line,
+                "map_name": parse_map_name_from_log(line),
+                "match_id": parse_match_id_from_log(line),
+                "session_id": session_id,
+                "detected_at": time.time(),
+            })
+        elif "removed player" in lower:
+            events.append({"type": "match_ended", "line": line})
+    return events, session_id
+
+
+def coalesce_events(events):
+    """
+    Collapse a backlog of events so only the newest match is rendered.
+
+    Args:
+        events (list): Events in log order (see `parse_log_events()`).
+
+    Returns:
+        tuple: (stale_matches, newest_match, ended_before, ended).
+        `stale_matches` are earlier match_found events that should only be
+        recorded; `newest_match` is the match to render (or None);
+        `ended_before` is True if a match ended before the newest match was
+        found (so the match on screen ended); `ended` is True if the newest
+        match (or, without one, the current overlay's match) has ended since.
+    """
+    newest = None
+    for i in range(len(events) - 1, -1, -1):
+        if events[i]["type"] == "match_found":
+            newest = i
+            break
+    if newest is None:
+        return [], None, False, any(e["type"] == "match_ended" for e in events)
+
+    stale = [e for e in events[:newest] if e["type"] == "match_found"]
+    ended_before = any(e["type"] == "match_ended" for e in events[:newest])
+    ended = any(e["type"] == "match_ended" for e in events[newest + 1:])
+    return stale, events[newest], ended_before, ended
+
+
+class MatchEventProcessor:
+    """
+    Consumes monitor events in order on the monitor's event loop: resolves and
+    renders matches, records history and stats, and hides the overlay when a
+    match ends.
+
+    Args:
+        filepath (str): Path to LogFile_0.txt (for SteamID / sessionID fallbacks).
+        output_dir (str): Directory for the overlay and history.
+        fetch_matches (callable): `fetch_matches(session_id) -> str or None`; may be a
+            coroutine function. Plain functions run in the loop's executor.
+        checkpoint (TailCheckpoint): Tail checkpoint; committed after each chunk's events.
+        resolve_timeout (float): Seconds to wait for match data before rendering map-only.
+        progressive (bool): Paint a partial overlay from the log when match data is not
+            ready within half the first-paint SLO, then upgrade it.
+        first_paint_slo_ms (float): Time-to-first-paint target, measured from detection.
+        run (WorkerRun): Supervised run; once it is cancelled, no more overlay files are written.
+        session_stats (SessionStats): Session aggregates to continue, e.g. from the run before a
+            watchdog restart. A new one is started when None.
+    """
+
+    def __init__(self, filepath, output_dir, fetch_matches, checkpoint, resolve_timeout=RESOLVE_TIMEOUT_S,
+                 progressive=True, first_paint_slo_ms=FIRST_PAINT_SLO_MS, run=None, session_stats=None):
+        self.filepath = filepath
+        self.output_dir = output_dir
+        self.fetch_matches = fetch_matches
+        self.checkpoint = checkpoint
+        self.resolve_timeout = resolve_timeout
+        self.progressive = progressive
+        self.first_paint_slo_ms = float(first_paint_slo_ms)
+        self.run = run
+        metrics.set_gauge("first_paint_slo_ms", self.first_paint_slo_ms)
+        self.overlay_hidden = False
+        self._render_seq = 0
+        # The match on screen, for the match_ended event (None once it has ended)
+        self._current_match = None
+        # What the HTML overlay currently shows ("match" or "hidden"), and the last match render's inputs
+        self._screen = None
+        self._last_render = None
+        # Overlay writes run in worker threads; one at a time, so a slow write never lands after a newer one
+        self._write_lock = asyncio.Lock()
+        # Pending timers (delayed hides) and match lookups; cancelled on close
+        self._tasks = set()
+        # Set from the cold-start backscan when available; otherwise read from the log head once
+        self.steam_id = None
+        # Log head bytes already searched without finding a SteamID; only a grown head is searched again
+        self._steam_id_searched = 0
+
+        # Every match is recorded; writes are batched off this thread
+        self.history = None
+        try:
+            history_dir = output_dir if output_dir is not None else os.path.dirname(__file__)
+            self.history = MatchHistoryStore(os.path.join(history_dir, DEFAULT_DB_NAME))
+        except Exception as e:
+            print("ERROR opening match history store:", e)
+
+        # Running session aggregates shown on the overlay (ELO change, W/L, per-map record)
+        self.session_stats = session_stats if session_stats is not None else SessionStats()
+
+        # Warms match data on earlier lifecycle signals so quickmatchfound rarely waits on the network.
+        # Prefetches are tasks on this loop, sharing the breaker and rate limiter with match lookups.
+        self.prefetcher = MatchPrefetcher(self._fetch)
+
+        settings = _load_settings()
+        # All configured output targets (html/json/text) are written from one view-model per update
+        self.output_targets = settings.get("output_targets") or list(DEFAULT_TARGETS)
+
+        # Optional per-player extras (recent form, rank), looked up in parallel under a deadline
+        self.enricher = enricher_from_settings(settings, self.history)
+
+    async def process(self, events):
+        """Handle a batch of events drained from the queue, coalescing stale matches."""
+        commits = [e for e in events if e["type"] == "checkpoint"]
+        events = [e for e in events if e["type"] != "checkpoint"]
+
+        stale, newest, ended_before, ended = coalesce_events(events)
+        if ended_before:
+            # The match on screen ended in this batch; plugins still get its match_ended
+            self._publish_match_ended()
+        for event in stale:
+            await self._record_stale(event)
+        if newest is not None:
+            await self._handle_match(newest)
+        if ended:
+            self._handle_match_end()
+
+        # Only advance the checkpoint once the events before it are handled
+        for commit in commits:
+            if commit.get("truncated"):
+                # A new game session may be signed in with another account
+                self.checkpoint.head_signature = None
+                self.steam_id = None
+                self._steam_id_searched = 0
+            self.checkpoint.update(self.filepath, commit["position"])
+        if commits:
+            self.checkpoint.save()
+            metrics.write_snapshot(self.output_dir)
+
+    def _write(self, func, *args, **kwargs):
+        """Run an overlay write in a worker thread; None without writing once the run is cancelled."""
+        if self.run is not None and self.run.cancelled.is_set():
+            # A restarted run owns the overlay now
+            return None
+        return func(*args, **kwargs)
+
+    def cancel_tasks(self):
+        """Cancel pending timers (delayed hides), match lookups, prefetches and enrichment lookups, and return them."""
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        tasks += self.prefetcher.cancel()
+        if self.enricher is not None:
+            tasks += self.enricher.cancel()
+        return tasks
+
+    def close(self, save_checkpoint=True):
+        self.cancel_tasks()
+        if self.history is not None:
+            self.history.close()
+        if save_checkpoint:
+            self.checkpoint.save()
+
+    async def _session_int(self, event):
+        session_id = event.get("session_id")
+        if not session_id:
+            # Searches the log file; keep it off the loop
+            session_id = await asyncio.to_thread(get_last_session_id, self.filepath)
+        print(f"Using sessionID: {session_id!r}")
+        if not session_id:
+            print("WARNING: No sessionID found in log; skipping API call.")
+            return None
+        try:
+            return int(str(session_id).strip())
+        except Exception as e:
+            print(f"WARNING: sessionID is not numeric ({session_id!r}):", e)
+            print("Skipping API call due to invalid sessionID.")
+            return None
+
+    def _claim(self, event, sid_int):
+        """Return the dedup key for a new match, or None if it was already processed."""
+        key = match_key(sid_int, event["map_name"], event["match_id"], event["line"])
+        if self.checkpoint.processed.check_and_add(key):
+            print(f"DEBUG: match {key} already processed — skipping.")
+            metrics.incr("duplicate_matches_skipped")
+            return None
+        return key
+
+    @staticmethod
+    def _history_match_id(event):
+        """Match ID stored in history: the "crc:" line id when the line has none, like the importer."""
+        return line_match_id(event["match_id"], event["line"])
+
+    async def _record_stale(self, event):
+        """Record a match that was superseded before it could be rendered (no API call)."""
+        if not event["map_name"]:
+            return
+        sid_int = await self._session_int(event)
+        if sid_int is None or self._claim(event, sid_int) is None:
+            return
+        print(f"DEBUG: coalescing stale match on {event['map_name']} (session {sid_int})")
+        metrics.incr("matches_coalesced")
+        metrics.incr("matches_detected")
+        if self.history is not None:
+            self.history.record_snapshot(MatchSnapshot.create(
+                (),
+                map_name=event["map_name"],
+                session_id=sid_int,
+                match_id=self._history_match_id(event),
+                detected_at=event.get("detected_at"),
+            ))
+
+    async def _fetch(self, sid_int):
+        if inspect.iscoroutinefunction(self.fetch_matches):
+            return await self.fetch_matches(sid_int)
+        return await asyncio.to_thread(self.fetch_matches, sid_int)
+
+    async def _resolve_players(self, sid_int, steam_id):
+        """Return players_info for the match, preferring a prefetched response. None if the API failed."""
+        response = await self.prefetcher.take(sid_int)
+        if response is not None:
+            players_info = profiler.call("get_match_player_info", get_match_player_info, response, steam_id)
+            if players_info:
+                print("DEBUG: using prefetched match data")
+                self.prefetcher.mark_used()
+                return players_info
+            self.prefetcher.mark_wasted()
+
+        response = await self._fetch(sid_int)
+        print(f"API response: {response}")
+        if response is None:
+            return None
+        return profiler.call("get_match_player_info", get_match_player_info, response, steam_id)
+
+    async def _handle_match(self, event):
+        print("MATCH:", event["line"])
+        map_name = event["map_name"]
+        print(f"PARSED MAP NAME: {map_name}")
+        if not map_name:
+            print(f"WARNING: Could not parse match ID from line: {event['line']}")
+            return
+        print(f"SUCCESS: Found map name {map_name}")
+
+        try:
+            sid_int = await self._session_int(event)
+            # Duplicate triggers (re-read chunk, repeated line) stop here, before any network call
+            key = self._claim(event, sid_int) if sid_int is not None else None
+            if key is None:
+                return
+            metrics.incr("matches_detected")
+            status.publish("match", map_name=map_name, session_id=sid_int)
+            event_bus.bus.publish(
+                event_bus.MATCH_DETECTED,
+                map_name=map_name,
+                session_id=sid_int,
+                match_id=event["match_id"],
+                detected_at=event.get("detected_at"),
+            )
+            self._current_match = {"map_name": map_name, "session_id": sid_int}
+            status.publish("stage", stage="resolving players")
+
+            if self.steam_id is None:
+                # Searches the log head when the cold-start scan did not find it
+                self.steam_id = await asyncio.to_thread(self._search_steam_id)
+            steam_id = self.steam_id
+            detected_at = event.get("detected_at") or time.time()
+            resolve = asyncio.create_task(self._resolve_in_time(sid_int, steam_id))
+            # Tracked so a cancelled run can cancel and await it with the other tasks
+            self._tasks.add(resolve)
+            resolve.add_done_callback(self._tasks.discard)
+
+            # Progressive mode: if the coordinator has not answered within half the SLO,
+            # paint what the log already tells us and upgrade when the data arrives
+            painted = False
+            if self.progressive:
+                wait_s = max(0.0, self.first_paint_slo_ms / 2000 - (time.time() - detected_at))
+                done, _ = await asyncio.wait({resolve}, timeout=wait_s)
+                if not done:
+                    painted = await self._render(
+                        [], map_name, stats=self.session_stats.summary(map_name=map_name), pending=True
+                    )
+                    if painted:
+                        self._record_first_paint(detected_at, partial=True)
+            players_info = await resolve
+
+            if players_info is None:
+                print("WARNING: get_matches() failed — showing map-only overlay and continuing tail.")
+                # Fall back at once (the breaker makes this immediate while the coordinator is down)
+                if self.history is not None:
+                    self.history.record_snapshot(MatchSnapshot.create(
+                        (),
+                        map_name=map_name,
+                        session_id=sid_int,
+                        match_id=self._history_match_id(event),
+                        local_steam_id=steam_id,
+                        detected_at=event.get("detected_at"),
+                    ))
+                if await self._render([], map_name) and not painted:
+                    self._record_first_paint(detected_at, partial=False)
+                return
+            print(f"Players info: {players_info}")
+
+            if self.enricher is not None and players_info:
+                status.publish("stage", stage="enriching players")
+                players_info = await self.enricher.enrich(players_info)
+
+            snapshot = MatchSnapshot.create(
+                players_info,
+                map_name=map_name,
+                session_id=sid_int,
+                match_id=self._history_match_id(event),
+                local_steam_id=steam_id,
+                detected_at=event.get("detected_at"),
+            )
+            players_info = snapshot.players
+            event_bus.bus.publish(
+                event_bus.PLAYERS_RESOLVED, map_name=map_name, session_id=sid_int,
+                players=[p.to_dict() for p in players_info],
+            )
+
+            if self.session_stats.local_steam_id is None:
+                self.session_stats.local_steam_id = steam_id
+            self.session_stats.update(players_info, map_name=map_name, detected_at=event.get("detected_at"), key=key)
+
+            if self.history is not None:
+                self.history.record_snapshot(snapshot)
+
+            if await self._render(players_info, map_name, stats=self.session_stats.summary(map_name=map_name)):
+                if not painted:
+                    self._record_first_paint(detected_at, partial=False)
+                metrics.observe("time_to_full_overlay_ms", (time.time() - detected_at) * 1000)
+
+        except Exception as e:
+            print("ERROR while retrieving sessionID or calling API:", e)
+
+    def _search_steam_id(self):
+        try:
+            head = min(os.path.getsize(self.filepath), STEAM_ID_SCAN_BYTES)
+        except OSError:
+            head = 0
+        if head and head <= self._steam_id_searched:
+            return None
+        steam_id = extract_steam_id(self.filepath)
+        if steam_id is None:
+            self._steam_id_searched = head
+        return steam_id
+
+    async def _resolve_in_time(self, sid_int, steam_id):
+        """`_resolve_players()` bounded by `resolve_timeout`; None on timeout or error."""
+        try:
+            return await asyncio.wait_for(self._resolve_players(sid_int, steam_id), self.resolve_timeout)
+        except asyncio.TimeoutError:
+            print(f"WARNING: no match data within {self.resolve_timeout}s.")
+            metrics.incr("match_resolve_timeouts")
+        except Exception as e:
+            print("ERROR resolving players for match:", e)
+        return None
+
+    def _record_first_paint(self, detected_at, partial):
+        ms = (time.time() - detected_at) * 1000
+        metrics.observe("time_to_first_paint_ms", ms)
+        if partial:
+            metrics.incr("partial_overlays")
+        if ms <= self.first_paint_slo_ms:
+            metrics.incr("first_paint_slo_met")
+        else:
+            metrics.incr("first_paint_slo_missed")
+            print(f"WARNING: first overlay paint took {ms:.0f} ms (SLO {self.first_paint_slo_ms:.0f} ms)")
+
+    async def _render(self, players_info, map_name, stats=None, pending=False):
+        """Write the overlay; `pending` renders the partial (log-only) view. Returns True on success."""
+        # Generate webpage with player and map info; file writes run off the loop
+        status.publish("stage", stage="rendering")
+        rendered = False
+        try:
+            async with self._write_lock:
+                start = time.perf_counter()
+                outputs = await asyncio.to_thread(
+                    self._write,
+                    profiler.call,
+                    "render_match",
+                    render_match,
+                    players_info,
+                    map_name,
+                    targets=self.output_targets,
+                    output_dir=self.output_dir,
+                    stats=stats,
+                    pending=pending,
+                )
+                if outputs is None:
+                    return False
+                write_ms = (time.perf_counter() - start) * 1000
+                self._screen = "match"
+                self._last_render = (players_info, map_name, stats, pending)
+                # A pending hide for an earlier match must not hide this one
+                self._render_seq += 1
+                self.overlay_hidden = False
+            metrics.observe("overlay_write_ms", write_ms)
+            print(f"Webpage generated: {outputs.get('html')}")
+            status.publish("overlay", write_ms=round(write_ms, 1), path=outputs.get("html"))
+            event_bus.bus.publish(
+                event_bus.OVERLAY_WRITTEN, map_name=map_name, outputs=outputs, write_ms=round(write_ms, 1),
+                partial=pending, hidden=False, players=len(players_info),
+            )
+            rendered = True
+        except Exception as e:
+            print("ERROR generating webpage:", e)
+            status.publish("error", message=f"Overlay write failed: {e}")
+        status.publish("stage", stage="tailing")
+        return rendered
+
+    async def refresh_overlay(self):
+        """Re-render the page currently on screen, e.g. after the theme changed."""
+        if "html" not in self.output_targets:
+            return
+        try:
+            # Read what is on screen under the lock, so a partial page never replaces the full one written meanwhile
+            async with self._write_lock:
+                # Every target, like any other update, so they all keep showing the same state
+                if self._screen == "hidden":
+                    await asyncio.to_thread(self._write, render_hidden, targets=self.output_targets,
+                                            output_dir=self.output_dir)
+                elif self._screen == "match":
+                    players_info, map_name, stats, pending = self._last_render
+                    await asyncio.to_thread(
+                        self._write, render_match, players_info, map_name, targets=self.output_targets,
+                        output_dir=self.output_dir, stats=stats, pending=pending,
+                    )
+                else:
+                    return
+            print("DEBUG: overlay re-rendered with updated theme")
+        except Exception as e:
+            print("ERROR re-rendering overlay after theme change:", e)
+
+    def _publish_match_ended(self):
+        if self._current_match is not None:
+            event_bus.bus.publish(event_bus.MATCH_ENDED, **self._current_match)
+            self._current_match = None
 
-    search_text = "quickmatchfound"
-    block_size = 20480  # 20 KB
-    last_position = 0  # Track position to avoid re-reading
+    def _handle_match_end(self):
+        self._publish_match_ended()
 
-    overlay_hidden = False
-    def _delayed_hide(out_dir):
+        # Load settings to check whether we should close overlay on match complete
+        settings = _load_settings()
+
+        if settings.get("close_overlay_on_match_complete", False) and not self.overlay_hidden:
+            print(f"DEBUG: Detected 'Removed player' and setting enabled — scheduling overlay hide in {OVERLAY_HIDE_DELAY_S}s")
+            self.overlay_hidden = True
+            task = asyncio.create_task(self._delayed_hide(self._render_seq))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _delayed_hide(self, seq):
         # Sleep and then attempt to hide the overlay
-        time.sleep(5)
+        await asyncio.sleep(OVERLAY_HIDE_DELAY_S)
         try:
-            hide_overlay(output_dir=out_dir)
+            async with self._write_lock:
+                # Checked under the lock: a render in flight when the timer fired bumps the sequence first
+                if seq != self._render_seq:
+                    print("DEBUG: new match rendered since match end — keeping overlay")
+                    return
+                start = time.perf_counter()
+                # Clears the JSON and text targets too, not just the HTML page
+                outputs = await asyncio.to_thread(self._write, render_hidden, targets=self.output_targets,
+                                                  output_dir=self.output_dir)
+                if outputs is None:
+                    return
+                write_ms = (time.perf_counter() - start) * 1000
+                self._screen = "hidden"
+            event_bus.bus.publish(
+                event_bus.OVERLAY_WRITTEN, map_name=None, outputs=outputs, write_ms=round(write_ms, 1),
+                partial=False, hidden=True, players=0,
+            )
             print("DEBUG: overlay hidden after match end")
+            status.publish("stage", stage="match ended, overlay hidden")
         except Exception as e:
             print("ERROR hiding overlay:", e)
 
-    while not stop_log_event.is_set():
+
+async def _drain_events(event_queue, processor, run):
+    """Consumer task: process queued events in order until the stop sentinel arrives."""
+    while True:
+        run.idle("events")
+        item = await event_queue.get()
+        run.beat("events")
+        batch = []
+        stop = item is None
+        if not stop:
+            batch.append(item)
+        # Everything already queued is handled together so stale matches can be coalesced
+        while not stop:
+            try:
+                item = event_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is None:
+                stop = True
+            else:
+                batch.append(item)
+        metrics.set_gauge("event_queue_depth", event_queue.qsize())
+        if batch:
+            try:
+                await processor.process(batch)
+            except Exception as e:
+                print("ERROR processing log events:", e)
+        if stop:
+            return
+
+
+async def _watch_theme(processor, interval, run):
+    """Watcher task: poll theme file mtimes and re-render the overlay when they change."""
+    while not await _wait_for_stop(interval, run):
+        run.beat("theme")
+        try:
+            if await asyncio.to_thread(theme_cache.check_for_changes):
+                print("Overlay theme changed; reloading")
+                await processor.refresh_overlay()
+        except Exception as e:
+            print("ERROR checking overlay theme:", e)
+        run.idle("theme")
+
+
+def _stopping(run=None):
+    """True once `stop_log_event` is set or the watchdog cancelled `run`."""
+    return stop_log_event.is_set() or (run is not None and run.cancelled.is_set())
+
+
+async def _wait_for_stop(timeout, run=None):
+    """Sleep up to `timeout` seconds, returning early (True) once `_stopping(run)`."""
+    deadline = time.monotonic() + timeout
+    while not _stopping(run):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(STOP_CHECK_INTERVAL, remaining))
+    return True
+
+
+def _read_new_data(filepath, last_position):
+    """Return (file_size, text after `last_position` or None). Size below `last_position` means truncation."""
+    with open(filepath, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        file_size = f.tell()
+        if file_size <= last_position:
+            return file_size, None
+        f.seek(last_position)
+        return file_size, f.read(file_size - last_position).decode("utf-8", errors="ignore")
+
+
+def tail_log_file(filepath, output_dir=None, poll_interval=10, fetch_matches=None):
+    """
+    Tail the game log until `stop_log_event` is set, rendering an overlay for each detected match.
+
+    Synchronous wrapper that runs `tail_log_file_async()` on its own event
+    loop; the GUI and scripts start it on a thread as before. Unless
+    `watchdog` is false in settings.json, each run is supervised: a stage
+    that stalls for `stall_timeout_s` gets the run restarted from the tail
+    checkpoint, and `health_port` serves /health and /ready on localhost.
+    Session statistics are kept across restarts, so the overlay's session
+    line does not reset.
+    """
+    settings = _load_settings()
+    if not settings.get("watchdog", True):
+        asyncio.run(tail_log_file_async(filepath, output_dir, poll_interval, fetch_matches))
+        return
+
+    # Outlives each run, so a watchdog restart keeps the overlay's session line
+    session_stats = SessionStats()
+
+    def run_monitor(run):
+        loop = asyncio.new_event_loop()
         try:
-            with open(filepath, "rb") as f:
-                # Get current file size
-                f.seek(0, os.SEEK_END)
-                file_size = f.tell()
+            loop.run_until_complete(tail_log_file_async(
+                filepath, output_dir, poll_interval, fetch_matches, run=run, session_stats=session_stats
+            ))
+            if not run.cancelled.is_set():
+                loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            # A cancelled run may leave a stuck read on an executor thread; don't wait for it
+            loop.close()
+
+    supervisor = Supervisor(
+        run_monitor, stop_log_event, stall_timeout=float(settings.get("stall_timeout_s", STALL_TIMEOUT_S))
+    )
+    health = None
+    if settings.get("health_port") is not None:
+        try:
+            health = HealthServer(supervisor, int(settings["health_port"])).start()
+        except Exception as e:
+            print(f"WARNING: health endpoint unavailable on port {settings['health_port']}: {e}")
+    try:
+        supervisor.serve()
+    finally:
+        if health is not None:
+            health.stop()
+
+
+async def tail_log_file_async(filepath, output_dir=None, poll_interval=10, fetch_matches=None, run=None,
+                              session_stats=None):
+    """
+    Coroutine that tails the game log until `stop_log_event` is set.
+
+    Log watching and event processing are separate tasks on one event loop:
+    the watcher turns new log text into ordered events on a queue, and the
+    consumer resolves, records and renders them (see `MatchEventProcessor`).
+    Coordinator calls, overlay writes and hide timers are awaited, so a slow
+    request never delays reading the log. When the consumer falls behind,
+    every queued match is recorded but only the newest one is rendered.
+
+    Args:
+        filepath (str): Path to LogFile_0.txt.
+        output_dir (str): Directory for the overlay and history. Defaults to module directory.
+        poll_interval (float): Seconds between log scans. Default 10.
+        fetch_matches (callable): `fetch_matches(session_id) -> str or None`, plain or
+            coroutine function. Defaults to `get_matches_async`; replay runs pass
+            recorded responses here.
+        run (WorkerRun): Heartbeats, readiness and cancellation for a supervised run.
+        session_stats (SessionStats): Session aggregates carried over from an earlier run.
+    """
+    print("DEBUG: tail_log_file started")
+    if run is None:
+        run = WorkerRun()
+    run.attach(asyncio.get_running_loop(), asyncio.current_task())
+    status.publish("stage", stage="starting")
+
+    if fetch_matches is None:
+        fetch_matches = get_matches_async
+
+    # Resume from the saved position; processed matches are remembered across restarts
+    checkpoint = TailCheckpoint.load(output_dir)
+    last_position = checkpoint.resume_position(filepath)  # Track position to avoid re-reading
+    session_id = None
+    if last_position:
+        print(f"DEBUG: resuming log tail at byte {last_position}")
+        session_id = find_last_session_id(filepath, end=last_position)
+
+    settings = _load_settings()
+    # Plugins and UDP/pipe fan-out; subscribers run on their own threads
+    base_dir = output_dir if output_dir is not None else os.path.dirname(__file__)
+    event_bus.configure_from_settings(settings, base_dir=base_dir)
+    configure_profiling(settings, base_dir=base_dir)
+    configure_theme(settings, base_dir=base_dir)
+    processor = MatchEventProcessor(
+        filepath, output_dir, fetch_matches, checkpoint,
+        resolve_timeout=float(settings.get("match_resolve_timeout_s", RESOLVE_TIMEOUT_S)),
+        progressive=bool(settings.get("progressive_overlay", True)),
+        first_paint_slo_ms=float(settings.get("first_paint_slo_ms", FIRST_PAINT_SLO_MS)),
+        run=run,
+        session_stats=session_stats,
+    )
+    prefetch_triggers = [str(t).lower() for t in settings.get("prefetch_triggers", []) if t]
+
+    event_queue = asyncio.Queue()
+    consumer = theme_watcher = None
+    run.register("tail", timeout=max(run.stall_timeout, poll_interval * 3))
+    # A match may legitimately take the whole resolve timeout
+    run.register("events", timeout=run.stall_timeout + processor.resolve_timeout)
+    run.register("theme")
+
+    try:
+        # Cold start: search backwards from EOF for the current state instead of reading the whole log
+        if not last_position:
+            run.beat("tail")
+            try:
+                scan = await asyncio.to_thread(backscan_log, filepath)
+                print(f"DEBUG: cold-start scan in {scan['elapsed_ms']} ms (steam_id={scan['steam_id']}, "
+                      f"sessionID={scan['session_id']}, match in progress={scan['match_in_progress']})")
+                last_position = scan["size"]
+                session_id = scan["session_id"]
+                processor.steam_id = scan["steam_id"]
+                if scan["match_in_progress"]:
+                    events, _ = parse_log_events(scan["match_line"], scan["match_session_id"])
+                    for event in events:
+                        event_queue.put_nowait(event)
+                event_queue.put_nowait({"type": "checkpoint", "position": last_position, "truncated": False})
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print("ERROR scanning log on cold start:", e)
+                last_position = 0
+
+        consumer = asyncio.create_task(_drain_events(event_queue, processor, run))
+        # Theme files are only stat'ed here; rendering uses the compiled cache
+        theme_watcher = asyncio.create_task(
+            _watch_theme(processor, float(settings.get("theme_check_interval_s", THEME_CHECK_INTERVAL_S)), run)
+        )
+        status.publish("stage", stage="tailing")
+        run.ready.set()
+
+        while not _stopping(run):
+            run.beat("tail")
+            try:
+                file_size, data = await asyncio.to_thread(
+                    profiler.call, "tail_log_file.read", _read_new_data, filepath, last_position,
+                    every=profiler.sample_every,
+                )
 
                 # If logfile was truncated or rotated (size decreased), reset our read position
-                if file_size < last_position:
+                truncated = file_size < last_position
+                if truncated:
                     print("DEBUG: logfile size decreased — resetting last_position to 0")
                     last_position = 0
+                    session_id = None
+                    if file_size:
+                        file_size, data = await asyncio.to_thread(_read_new_data, filepath, 0)
+
+                # If file grew, parse from last position to end
+                if data is not None:
+                    events, session_id = profiler.call(
+                        "tail_log_file.parse", parse_log_events, data, session_id, every=profiler.sample_every
+                    )
 
-                # If file grew, search from last position to end
-                if file_size > last_position:
-                    f.seek(last_position)
-                    data = f.read().decode("utf-8", errors="ignore")
-                    
-                    # Detect match start
-                    if search_text.lower() in data.lower():
+                    # Start warming match data on earlier signals (new sessionID, queue join)
+                    data_lower = data.lower()
+                    if "quickmatchfound" not in data_lower:
+                        _prefetch_from_chunk(processor.prefetcher, data_lower, prefetch_triggers, session_id)
+                    if any(e["type"] == "match_found" for e in events):
                         print("DEBUG: FOUND QUICKMATCH!")
-                        
-                        # Find all lines containing the search text
-                        lines = data.splitlines()
-                        for line in reversed(lines):
-                            if search_text.lower() in line.lower():
-                                print("MATCH:", line)
-                                map_name = parse_map_name_from_log(line)
-                                print(f"PARSED MAP NAME: {map_name}")
-                                if map_name:
-                                    print(f"SUCCESS: Found map name {map_name}")
-                                    # Safely get last session ID and call API
-                                    try:
-                                        sessionID = get_last_session_id(filepath)
-                                        print(f"Using sessionID: {sessionID!r}")
-
-                                        if not sessionID:
-                                            print("WARNING: No sessionID found in log; skipping API call.")
-                                        else:
-                                            # Ensure we have a numeric session ID
-                                            try:
-                                                sid_int = int(str(sessionID).strip())
-                                            except Exception as e:
-                                                print(f"WARNING: sessionID is not numeric ({sessionID!r}):", e)
-                                                print("Skipping API call due to invalid sessionID.")
-                                            else:
-                                                # First call the API and handle network errors separately
-                                                try:
-                                                    response = get_matches(sid_int)
-                                                    print(f"API response: {response}")
-                                                    if response is None:
-                                                        print("WARNING: get_matches() failed after retries — skipping this match and continuing tail.")
-                                                        # Stop processing this matched line and continue scanning the logfile
-                                                        break
-                                                except Exception as e:
-                                                    print("ERROR calling get_matches():", e)
-                                                else:
-                                                    steam_id = extract_steam_id(filepath)
-                                                    # Then parse player info in its own try/except
-                                                    try:
-                                                        time.sleep(1)
-                                                        players_info = get_match_player_info(response, steam_id)
-                                                        print(f"Players info: {players_info}")
-                                                        
-                                                        # Generate webpage with player and map info
-                                                        try:
-                                                            webpage_path = generate_match_webpage(players_info, map_name, output_dir=output_dir)
-                                                            print(f"Webpage generated: {webpage_path}")
-                                                            # reset overlay_hidden flag when a new match overlay is generated
-                                                            overlay_hidden = False
-                                                        except Exception as e:
-                                                            print("ERROR generating webpage:", e)
-                                                    except Exception as e:
-                                                        print("ERROR parsing players info from API response:", e)
-
-                                    except Exception as e:
-                                        print("ERROR while retrieving sessionID or calling API:", e)
-
-                                else:
-                                    print(f"WARNING: Could not parse match ID from line: {line}")
-                                break
-                    
-                    # Detect match end lines (e.g., a player being removed indicates match end)
-                    if "removed player" in data.lower():
-                        # Load settings to check whether we should close overlay on match complete
-                        try:
-                            settings = {}
-                            if os.path.exists("settings.json"):
-                                with open("settings.json", "r", encoding="utf-8") as sf:
-                                    settings = json.load(sf)
-                        except Exception:
-                            settings = {}
-
-                        if settings.get("close_overlay_on_match_complete", False) and not overlay_hidden:
-                            print("DEBUG: Detected 'Removed player' and setting enabled — scheduling overlay hide in 5s")
-                            overlay_hidden = True
-                            t = threading.Thread(target=_delayed_hide, args=(output_dir,), daemon=True)
-                            t.start()
+                    for event in events:
+                        event_queue.put_nowait(event)
+                    metrics.incr("log_events_queued", len(events))
+                    event_queue.put_nowait({"type": "checkpoint", "position": file_size, "truncated": truncated})
+                    metrics.set_gauge("event_queue_depth", event_queue.qsize())
 
                     last_position = file_size
 
-        except Exception as e:
-            print("ERROR in tail_log_file:", e)
+            except Exception as e:
+                print("ERROR in tail_log_file:", e)
+                status.publish("error", message=f"Log read failed: {e}")
+
+            # Wait before scanning again
+            run.idle("tail")
+            await _wait_for_stop(poll_interval, run)
+
+        theme_watcher.cancel()
+        if not run.cancelled.is_set():
+            # Let the consumer finish what was already read (bounded by the resolve timeout), then shut down
+            event_queue.put_nowait(None)
+            try:
+                await asyncio.wait_for(consumer, processor.resolve_timeout + 10)
+            except asyncio.TimeoutError:
+                print("WARNING: pending match events dropped on stop.")
+    except asyncio.CancelledError:
+        run.cancelled.set()
+
+    if run.cancelled.is_set():
+        # Cancelled by the watchdog: drop in-flight work; the next run resumes from the last saved checkpoint
+        tasks = [t for t in (consumer, theme_watcher) if t is not None] + processor.cancel_tasks()
+        for task in tasks:
+            task.cancel()
+        # Let them unwind before run_monitor() closes the loop; overlay writes are already blocked
+        pending = set(tasks)
+        deadline = time.monotonic() + CANCEL_WAIT_S
+        while pending and time.monotonic() < deadline:
+            try:
+                _, pending = await asyncio.wait(pending, timeout=deadline - time.monotonic())
+            except asyncio.CancelledError:
+                # The watchdog's cancel lands here when the run saw `run.cancelled` before it
+                continue
+        if pending:
+            print(f"WARNING: {len(pending)} task(s) of run {run.generation} did not stop in time.")
+        processor.close(save_checkpoint=False)
+        print(f"Log monitoring run {run.generation} cancelled.")
+        return
 
-        # Wait before scanning again
-        time.sleep(10)
+    # Lookups that outlived their deadline must not be left pending when the loop closes
+    await asyncio.gather(*processor.cancel_tasks(), return_exceptions=True)
+    processor.close()
+    profiler.dump()
 
     print("Log monitoring stopped.")
+    status.publish("stage", stage="stopped")
+
+def _load_settings():
+    """Read settings.json from the working directory; returns {} if missing or invalid."""
+    try:
+        if os.path.exists("settings.json"):
+            with open("settings.json", "r", encoding="utf-8") as sf:
+                return json.load(sf)
+    except Exception:
+        pass
+    return {}
+
+
+def _prefetch_from_chunk(prefetcher, data_lower, triggers, session_id):
+    """
+    Trigger a match-data prefetch if this log chunk contains an early lifecycle signal.
+
+    `session_id` is the sessionID the watcher tracks after parsing the chunk,
+    so the log is never searched again here (this runs on the event loop).
+    """
+    if "sessionid" in data_lower:
+        reason = "sessionID line"
+    else:
+        reason = next((t for t in triggers if t in data_lower), None)
+        if reason is None:
+            return
+    if session_id:
+        prefetcher.trigger(session_id, reason)
+
 
 def parse_map_name_from_log(line: str):
     """
@@ -205,7 +1003,24 @@ def parse_map_name_from_log(line: str):
         return mapname_match.group(1)  # Already a string
     return None
 
+def parse_match_id_from_log(line: str):
+    """
+    Extracts the matchid value from a `quickmatchfound` log line, e.g.
+    "matchid": "123456" or "matchid": 123456
+
+    Returns:
+        str match id, or None if not found.
+    """
+    matchid_match = re.search(r'"matchid"\s*:\s*"?([^",}\s]+)', line, re.IGNORECASE)
+    if matchid_match:
+        return matchid_match.group(1)
+    return None
+
 def show_match_popup(matchdata):
+    # Imported here so the monitor itself never loads tkinter; call only from the GUI thread
+    import tkinter as tk
+    from tkinter import messagebox
+
     root = tk.Tk()
     root.withdraw()
 
@@ -224,35 +1039,12 @@ def show_match_popup(matchdata):
 
 def get_last_session_id(file_path):
     """
-    Reads the log file and returns the last sessionID found.
-    Matches the behavior of the Java version.
+    Returns the last sessionID found in the log file.
+    Matches the behavior of the Java version, but searches backwards from EOF
+    (see log_scan.py) instead of reading the whole file.
     """
-    session_id = None
+    return find_last_session_id(file_path)
 
-    try:
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                if "sessionID" in line:
-                    start_index = line.find("sessionID") + len("sessionID") + 1  # move past 'sessionID'
-                    
-                    # skip potential characters like ':' or '"' or ' ' 
-                    while start_index < len(line) and line[start_index] in [":", " ", "\""]:
-                        start_index += 1
-
-                    # find where the value ends
-                    end_index = line.find(",", start_index)
-                    if end_index == -1:
-                        end_index = line.find("}", start_index)
-
-                    if end_index != -1:
-                        session_id = line[start_index:end_index].strip().replace('"', '')
-
-        return session_id
-
-    except Exception as e:
-        print("Error reading sessionID:", e)
-        return None
-    
 def get_match_player_info(json_response, player_id):
     """
     Parse the observer match list JSON and extract player info for the match containing a specific player_id.
@@ -264,7 +1056,7 @@ def get_match_player_info(json_response, player_id):
         player_id (int or str): The player Steam ID to search for.
 
     Returns:
-        list of dict: Each dict contains 'name', 'team', 'elo', 'color', 'start_position', 'steam_id'.
+        list of PlayerInfo: One normalized `PlayerInfo` per player, in slot order.
                       Returns empty list if no match contains the player.
     """
     # Normalize player_id to int where possible
@@ -317,7 +1109,7 @@ def get_match_player_info(json_response, player_id):
                 steam_val = None
                 if i < len(norm_players):
                     steam_val = norm_players[i]
-                players_info.append({
+                players_info.append(PlayerInfo.from_dict({
                     "name": names[i],
                     "team": teams[i] if i < len(teams) else None,
                     "elo": elos[i] if i < len(elos) else None,
@@ -325,7 +1117,7 @@ def get_match_player_info(json_response, player_id):
                     "faction": factions[i] if i < len(factions) else None,
                     "start_position": start_positions[i],
                     "steam_id": steam_val
-                })
+                }))
 
             return players_info
 
@@ -333,20 +1125,15 @@ def get_match_player_info(json_response, player_id):
 
 
 def extract_steam_id(logfile):
-    """Extract SteamID from log file."""
+    """Return the first SteamID in the log head (`log_scan.STEAM_ID_SCAN_BYTES`), or None."""
     try:
-        with open(logfile, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                match = re.search(r"ID:\s*(\d{17})", line)
-                if match:
-                    return match.group(1)
-
+        return head_steam_id(logfile)
     except Exception as e:
-        messagebox.showerror("Error Reading Log File", str(e))
+        # Runs on the monitor thread: report through the status queue, never a tkinter dialog
+        print("ERROR reading log file for SteamID:", e)
+        status.publish("error", message=f"Error reading log file: {e}")
         return None
 
-    return None
-
 if __name__ == "__main__":
     # Example usage (runs only when executed directly)
     json_response = """<your JSON response here>"""
@@ -0,0 +1,190 @@
+"""
+Cold-start backscan of the game log.
+
+On a first run there is no saved position, but the monitor still needs the
+streamer's SteamID, the latest sessionID and whether a match is in progress.
+`backscan_log()` memory-maps the log and searches backwards from EOF in
+bounded windows, stopping as soon as each fact is known, so the cost depends
+on how far back the facts are rather than on the size of the log. Live
+tailing then starts at EOF.
+
+The SteamID is the exception: the streamer's is the first one in the log
+(later IDs belong to lobbies and other players), so it is read from a
+bounded window at the start of the file instead.
+"""
+
+import mmap
+import os
+import re
+import time
+
+import metrics
+
+# Bytes searched per step; windows overlap by SCAN_OVERLAP so a needle split across two is still found
+SCAN_WINDOW_BYTES = 1 << 20
+SCAN_OVERLAP = 256
+# Give up on a fact after searching this far back from EOF
+MAX_SCAN_BYTES = 64 << 20
+# The streamer's SteamID is expected near the top of the log
+STEAM_ID_SCAN_BYTES = 1 << 20
+
+_STEAM_ID_RE = re.compile(rb"ID:\s*(\d{17})")
+# HH:MM:SS[.fff] stamp at the start of a log line (multiline, for scanning whole chunks)
+LINE_TIME_RE = re.compile(r"^[^\w\n]{0,2}(\d{1,2}):(\d{2}):(\d{2})(?:[.,](\d{1,6}))?", re.M)
+
+
+def parse_session_id_from_line(line):
+    """
+    Extracts the sessionID value from a single log line, or None if the line
+    has no complete sessionID field.
+    """
+    start_index = line.find("sessionID")
+    if start_index == -1:
+        return None
+    start_index += len("sessionID") + 1  # move past 'sessionID'
+
+    # skip potential characters like ':' or '"' or ' '
+    while start_index < len(line) and line[start_index] in [":", " ", "\""]:
+        start_index += 1
+
+    # find where the value ends
+    end_index = line.find(",", start_index)
+    if end_index == -1:
+        end_index = line.find("}", start_index)
+
+    if end_index != -1:
+        return line[start_index:end_index].strip().replace('"', '')
+    return None
+
+
+def stamp_seconds(match):
+    """Seconds since midnight for a `LINE_TIME_RE` match."""
+    h, mi, sec, frac = match.groups()
+    return int(h) * 3600 + int(mi) * 60 + int(sec) + (float(f"0.{frac}") if frac else 0.0)
+
+
+def line_seconds(line):
+    """Return the seconds since midnight of a log line's HH:MM:SS stamp, or None if it has none."""
+    m = LINE_TIME_RE.match(line)
+    return stamp_seconds(m) if m else None
+
+
+def _line_at(mm, pos):
+    """Return the decoded line containing byte offset `pos`."""
+    start = mm.rfind(b"\n", 0, pos) + 1
+    end = mm.find(b"\n", pos)
+    if end == -1:
+        end = len(mm)
+    return mm[start:end].decode("utf-8", errors="ignore")
+
+
+def _windows(end, window=SCAN_WINDOW_BYTES, limit=MAX_SCAN_BYTES):
+    """Yield (start, end) byte ranges walking backwards from `end`, at most `limit` bytes in total."""
+    floor = max(0, end - limit)
+    while end > floor:
+        start = max(floor, end - window)
+        yield start, end
+        if start == floor:
+            return
+        end = start + SCAN_OVERLAP
+
+
+def _last_session_before(mm, end, window=SCAN_WINDOW_BYTES, limit=MAX_SCAN_BYTES):
+    """Return (sessionID, offset) of the last complete sessionID before byte `end`, or (None, -1)."""
+    for start, stop in _windows(end, window, limit):
+        pos = mm.rfind(b"sessionID", start, stop)
+        while pos != -1:
+            session_id = parse_session_id_from_line(_line_at(mm, pos))
+            if session_id:
+                return session_id, pos
+            pos = mm.rfind(b"sessionID", start, pos)
+    return None, -1
+
+
+def head_steam_id(filepath, limit=STEAM_ID_SCAN_BYTES):
+    """Return the first SteamID in the first `limit` bytes of `filepath`, or None."""
+    with open(filepath, "rb") as f:
+        m = _STEAM_ID_RE.search(f.read(limit))
+    return m.group(1).decode("ascii") if m else None
+
+
+def find_last_session_id(filepath, end=None):
+    """
+    Return the last sessionID in `filepath` (before byte `end`, if given) by
+    searching backwards from that point. None if there is none.
+    """
+    try:
+        with open(filepath, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = size if end is None else min(end, size)
+                return _last_session_before(mm, end, limit=end)[0]
+    except Exception as e:
+        print("Error reading sessionID:", e)
+        return None
+
+
+def backscan_log(filepath, window=SCAN_WINDOW_BYTES, limit=MAX_SCAN_BYTES):
+    """
+    Find the cold-start facts by searching the log backwards from EOF.
+
+    Args:
+        filepath (str): Path to LogFile_0.txt.
+        window (int): Bytes searched per step.
+        limit (int): Maximum bytes searched back from EOF per fact.
+
+    Returns:
+        dict: {size, steam_id, session_id, match_in_progress, match_line,
+        match_session_id, elapsed_ms}. `size` is where live tailing should
+        start. `steam_id` is the first SteamID within the first
+        `STEAM_ID_SCAN_BYTES` of the log. `match_line` is the newest
+        `quickmatchfound` line when no "Removed player" follows it, and
+        `match_session_id` the sessionID in effect for it. Facts not found
+        within `limit` are None.
+    """
+    started = time.perf_counter()
+    result = {
+        "size": 0,
+        "steam_id": None,
+        "session_id": None,
+        "match_in_progress": False,
+        "match_line": None,
+        "match_session_id": None,
+        "elapsed_ms": 0.0,
+    }
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        result["size"] = size
+        if size == 0:
+            return result
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            m = _STEAM_ID_RE.search(mm, 0, min(size, STEAM_ID_SCAN_BYTES))
+            if m:
+                result["steam_id"] = m.group(1).decode("ascii")
+
+            # Whichever of quickmatchfound / removed player is met first going backwards decides the match state
+            match_pos = -1
+            for start, stop in _windows(size, window, limit):
+                lower = mm[start:stop].lower()
+                found = lower.rfind(b"quickmatchfound")
+                ended = lower.rfind(b"removed player")
+                if found != -1 or ended != -1:
+                    if found > ended:
+                        match_pos = start + found
+                    break
+
+            session_id, session_pos = _last_session_before(mm, size, window, limit)
+            result["session_id"] = session_id
+            if match_pos != -1:
+                result["match_in_progress"] = True
+                result["match_line"] = _line_at(mm, match_pos)
+                if session_pos < match_pos:
+                    result["match_session_id"] = session_id
+                else:
+                    result["match_session_id"] = _last_session_before(mm, match_pos, window, limit)[0]
+
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    metrics.observe("cold_start_scan_ms", result["elapsed_ms"])
+    return result
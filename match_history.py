@@ -0,0 +1,381 @@
+"""
+Embedded SQLite store for every detected match.
+
+Matches are queued by the log monitor and written in batches by a background
+writer thread, so recording history never delays the tail loop or the overlay.
+The database runs in WAL mode so overlay queries (head-to-head record, recent
+form) can read while the writer is committing.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import replace
+
+from models import MatchSnapshot
+
+DEFAULT_DB_NAME = "match_history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id INTEGER,
+    match_id TEXT,
+    map_name TEXT,
+    local_steam_id INTEGER,
+    detected_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_players (
+    match_row INTEGER NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    steam_id INTEGER,
+    name TEXT,
+    team INTEGER,
+    elo REAL,
+    faction INTEGER,
+    color INTEGER,
+    start_position INTEGER,
+    detected_at REAL,
+    PRIMARY KEY (match_row, slot)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_session_match ON matches(session_id, match_id);
+CREATE INDEX IF NOT EXISTS idx_matches_detected_at ON matches(detected_at);
+"""
+
+# Created after _migrate(): databases from before match_players.detected_at lack the column
+INDEXES = """
+DROP INDEX IF EXISTS idx_match_players_steam;
+CREATE INDEX IF NOT EXISTS idx_match_players_steam_time ON match_players(steam_id, detected_at, match_row);
+"""
+
+# ELO of player row `p` at that player's next match, by (detected_at, match_row)
+_NEXT_ELO = """(
+    SELECT n.elo FROM match_players n
+    WHERE n.steam_id = p.steam_id AND (n.detected_at, n.match_row) > (p.detected_at, p.match_row)
+    ORDER BY n.detected_at, n.match_row
+    LIMIT 1
+) AS next_elo"""
+
+_STOP = object()
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+
+class MatchHistoryStore:
+    """
+    Thread-safe match history backed by a single SQLite file.
+
+    `record_match()` only enqueues; a daemon writer thread commits queued
+    matches in one transaction per batch. Read helpers open one connection
+    per calling thread (including executor workers); `close()` closes them all.
+
+    Args:
+        db_path (str): Path to the database file. Defaults to
+            `match_history.db` in the module directory.
+        batch_size (int): Maximum matches committed per transaction.
+        flush_interval (float): Seconds the writer waits to fill a batch.
+    """
+
+    def __init__(self, db_path=None, batch_size=50, flush_interval=0.5):
+        if db_path is None:
+            db_path = os.path.join(os.path.dirname(__file__), DEFAULT_DB_NAME)
+        self.db_path = db_path
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        try:
+            os.makedirs(db_dir, exist_ok=True)
+        except Exception:
+            pass
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            self._migrate(conn)
+            conn.executescript(INDEXES)
+            conn.commit()
+        finally:
+            conn.close()
+
+        self._local = threading.local()
+        # Every thread's reader connection, so close() can reach the ones opened on other threads
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._writer_loop, name="match-history-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @staticmethod
+    def _migrate(conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(match_players)")}
+        if "detected_at" not in columns:
+            # Copied from matches so per-player history is read from one index, in time order
+            with conn:
+                conn.execute("ALTER TABLE match_players ADD COLUMN detected_at REAL")
+                conn.execute(
+                    "UPDATE match_players SET detected_at = "
+                    "(SELECT m.detected_at FROM matches m WHERE m.id = match_players.match_row)"
+                )
+
+    def _reader(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Only its own thread queries it; close() may run on another one
+            conn = self._connect(check_same_thread=False)
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    # ------------------------------------------------------------------ writes
+
+    def record_match(self, players_info, map_name=None, session_id=None, match_id=None,
+                     local_steam_id=None, detected_at=None):
+        """
+        Queue a match for the writer thread. Never blocks on disk I/O.
+
+        Args:
+            players_info (list): `PlayerInfo` (or player dicts) as returned by `get_match_player_info()`.
+            map_name (str): Raw map key from the log.
+            session_id (int or str): Coordinator session ID.
+            match_id (str): Match ID from the `quickmatchfound` line, if known.
+            local_steam_id (int or str): SteamID of the streamer.
+            detected_at (float): Unix timestamp. Defaults to now.
+        """
+        self.record_snapshot(MatchSnapshot.create(
+            players_info,
+            map_name=map_name,
+            session_id=session_id,
+            match_id=match_id,
+            local_steam_id=local_steam_id,
+            detected_at=detected_at,
+        ))
+
+    def record_snapshot(self, snapshot):
+        """Queue a `MatchSnapshot` for the writer thread; `detected_at` defaults to now."""
+        if self._closed:
+            return
+        if snapshot.detected_at is None:
+            snapshot = replace(snapshot, detected_at=time.time())
+        self._queue.put(snapshot)
+
+    def record_many(self, records):
+        """Write a list of match records synchronously in a single transaction.
+
+        Each record is a `MatchSnapshot` or a dict with the same keys as
+        `record_match()` arguments (`players`, `map_name`, `session_id`,
+        `match_id`, `local_steam_id`, `detected_at`). Matches already stored
+        for the same session/match ID are skipped. Returns the number of new
+        matches inserted.
+        """
+        normalized = []
+        now = time.time()
+        for r in records:
+            if not isinstance(r, MatchSnapshot):
+                r = MatchSnapshot.create(
+                    r.get("players"),
+                    map_name=r.get("map_name"),
+                    session_id=r.get("session_id"),
+                    match_id=r.get("match_id"),
+                    local_steam_id=r.get("local_steam_id"),
+                    detected_at=r.get("detected_at"),
+                )
+            normalized.append(r if r.detected_at is not None else replace(r, detected_at=now))
+        conn = self._connect()
+        try:
+            return self._write_batch(conn, normalized)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, batch):
+        inserted = 0
+        with conn:
+            for item in batch:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO matches (session_id, match_id, map_name, local_steam_id, detected_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (item.session_id, item.match_id, item.map_name, item.local_steam_id, item.detected_at),
+                )
+                if cur.rowcount == 0:
+                    continue
+                inserted += 1
+                match_row = cur.lastrowid
+                rows = [
+                    (
+                        match_row,
+                        slot,
+                        p.steam_id,
+                        p.name,
+                        p.team,
+                        p.elo,
+                        # Enums are stored as their plain int ids
+                        _to_int(p.faction),
+                        _to_int(p.color),
+                        p.start_position,
+                        item.detected_at,
+                    )
+                    for slot, p in enumerate(item.players)
+                ]
+                conn.executemany(
+                    "INSERT INTO match_players "
+                    "(match_row, slot, steam_id, name, team, elo, faction, color, start_position, detected_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return inserted
+
+    def _writer_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    self._queue.task_done()
+                    return
+                batch = [item]
+                stop = False
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        nxt = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if nxt is _STOP:
+                        stop = True
+                        break
+                    batch.append(nxt)
+                try:
+                    self._write_batch(conn, batch)
+                except Exception as e:
+                    print(f"ERROR writing match history batch ({len(batch)} matches): {e}")
+                for _ in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def flush(self):
+        """Block until every queued match has been committed."""
+        self._queue.join()
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join(timeout=10)
+        with self._readers_lock:
+            readers, self._readers = self._readers, []
+            # Reads after close() open a fresh connection instead of using a closed one
+            self._local = threading.local()
+        for conn in readers:
+            try:
+                conn.close()
+            except Exception as e:
+                print(f"WARNING: closing match history reader failed: {e}")
+
+    # ------------------------------------------------------------------ reads
+
+    def match_count(self):
+        """Return the number of stored matches."""
+        return self._reader().execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    def known_matches(self):
+        """Return {(session_id, match_id, map_name)} for every stored match."""
+        return set(self._reader().execute("SELECT session_id, match_id, map_name FROM matches").fetchall())
+
+    def player_matches(self, steam_id, limit=20):
+        """
+        Return the most recent matches for a SteamID, newest first.
+
+        Each entry has 'detected_at', 'map_name', 'session_id', 'match_id', 'elo',
+        'faction' and 'elo_delta' (ELO at the following match minus ELO at this one,
+        None for the latest match).
+        """
+        sid = _to_int(steam_id)
+        if sid is None:
+            return []
+        # Walks the (steam_id, detected_at) index newest first and stops at the limit;
+        # only the returned rows look up their next match, with one more index seek each
+        rows = self._reader().execute(
+            f"""
+            SELECT p.detected_at, m.map_name, m.session_id, m.match_id, p.elo, p.faction, {_NEXT_ELO}
+            FROM match_players p JOIN matches m ON m.id = p.match_row
+            WHERE p.steam_id = ?
+            ORDER BY p.detected_at DESC, p.match_row DESC
+            LIMIT ?
+            """,
+            (sid, int(limit)),
+        ).fetchall()
+        result = []
+        for detected_at, map_name, session_id, match_id, elo, faction, next_elo in rows:
+            delta = None
+            if elo is not None and next_elo is not None:
+                delta = next_elo - elo
+            result.append({
+                "detected_at": detected_at,
+                "map_name": map_name,
+                "session_id": session_id,
+                "match_id": match_id,
+                "elo": elo,
+                "faction": faction,
+                "elo_delta": delta,
+            })
+        return result
+
+    def head_to_head(self, steam_id, opponent_steam_id):
+        """
+        Summarize past matches between two SteamIDs on opposing teams.
+
+        The coordinator only reports pre-match ELO, so the outcome of a match is
+        inferred from the sign of the player's ELO change at their next match.
+
+        Returns:
+            dict: {'matches', 'wins', 'losses', 'last_played'}.
+        """
+        a = _to_int(steam_id)
+        b = _to_int(opponent_steam_id)
+        summary = {"matches": 0, "wins": 0, "losses": 0, "last_played": None}
+        if a is None or b is None:
+            return summary
+        # CROSS JOIN keeps the opponent's (usually few) matches as the outer loop: the streamer is in every match
+        rows = self._reader().execute(
+            f"""
+            SELECT p.detected_at, p.elo, {_NEXT_ELO}
+            FROM match_players o CROSS JOIN match_players p ON p.match_row = o.match_row
+            WHERE o.steam_id = ? AND p.steam_id = ?
+              AND (o.team IS NULL OR p.team IS NULL OR o.team != p.team)
+            """,
+            (b, a),
+        ).fetchall()
+        for detected_at, elo, next_elo in rows:
+            summary["matches"] += 1
+            if elo is not None and next_elo is not None:
+                if next_elo > elo:
+                    summary["wins"] += 1
+                elif next_elo < elo:
+                    summary["losses"] += 1
+            if summary["last_played"] is None or detected_at > summary["last_played"]:
+                summary["last_played"] = detected_at
+        return summary
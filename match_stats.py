@@ -0,0 +1,183 @@
+"""
+Running session statistics for the overlay.
+
+Counters are updated once per detected match in O(players) time and never
+rescan history, so the renderer can show "ELO this session", "W/L today" and
+per-map / per-faction records at constant cost.
+
+The coordinator only reports pre-match ELO. A result is therefore credited when
+the same SteamID shows up in its next match: a higher ELO means the previous
+match was won, a lower one means it was lost. That result counts toward the
+day the previous match was played, not the day it is credited.
+"""
+
+import threading
+import time
+from datetime import date
+
+from models import coerce_players
+
+
+def _new_record():
+    return {"matches": 0, "wins": 0, "losses": 0}
+
+
+def _credit(record, delta):
+    if delta > 0:
+        record["wins"] += 1
+    elif delta < 0:
+        record["losses"] += 1
+
+
+class SessionStats:
+    """
+    Incrementally maintained aggregates per SteamID, per map key and per faction id.
+
+    Map and faction `matches` count every appearance; their `wins`/`losses` are
+    from the local player's point of view.
+
+    Args:
+        local_steam_id (int or str): SteamID used by `summary()` when none is given.
+    """
+
+    def __init__(self, local_steam_id=None):
+        self.local_steam_id = local_steam_id
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._players = {}
+        self._maps = {}
+        self._factions = {}
+        # Dedup keys of the matches folded in, so a match re-read after a restart counts once
+        self._keys = set()
+
+    def _player(self, steam_id):
+        rec = self._players.get(steam_id)
+        if rec is None:
+            rec = {
+                "first_elo": None,
+                "last_elo": None,
+                "matches": 0,
+                "wins": 0,
+                "losses": 0,
+                # Day the *_today counters belong to (None until a result is credited)
+                "today": None,
+                "wins_today": 0,
+                "losses_today": 0,
+                # map key / faction / day of the last match, credited when the next one arrives
+                "pending_map": None,
+                "pending_faction": None,
+                "pending_day": None,
+            }
+            self._players[steam_id] = rec
+        return rec
+
+    def update(self, players_info, map_name=None, detected_at=None, key=None):
+        """
+        Fold one match into the aggregates.
+
+        Args:
+            players_info (list): `PlayerInfo` (or player dicts) as returned by `get_match_player_info()`.
+            map_name (str): Raw map key from the log.
+            detected_at (float): Unix timestamp of the match. Defaults to now.
+            key (str): The match's dedup key (`tail_state.match_key()`); a key
+                already folded in is ignored.
+        """
+        if not players_info:
+            return
+        day = date.fromtimestamp(detected_at) if detected_at is not None else date.today()
+        try:
+            local = int(self.local_steam_id)
+        except Exception:
+            local = None
+
+        with self._lock:
+            if key is not None:
+                if key in self._keys:
+                    return
+                self._keys.add(key)
+            map_rec = self._maps.setdefault(map_name, _new_record())
+            map_rec["matches"] += 1
+
+            for p in coerce_players(players_info):
+                steam_id, elo, faction = p.steam_id, p.elo, p.faction
+                if steam_id is None:
+                    continue
+
+                rec = self._player(steam_id)
+
+                # Credit the previous match now that we know the ELO it produced
+                if elo is not None and rec["last_elo"] is not None:
+                    delta = elo - rec["last_elo"]
+                    _credit(rec, delta)
+                    if rec["today"] != rec["pending_day"]:
+                        rec["today"] = rec["pending_day"]
+                        rec["wins_today"] = 0
+                        rec["losses_today"] = 0
+                    if delta > 0:
+                        rec["wins_today"] += 1
+                    elif delta < 0:
+                        rec["losses_today"] += 1
+                    if steam_id == local:
+                        _credit(self._maps.setdefault(rec["pending_map"], _new_record()), delta)
+                        if rec["pending_faction"] is not None:
+                            _credit(self._factions.setdefault(rec["pending_faction"], _new_record()), delta)
+
+                if elo is not None:
+                    if rec["first_elo"] is None:
+                        rec["first_elo"] = elo
+                    rec["last_elo"] = elo
+                rec["matches"] += 1
+                rec["pending_map"] = map_name
+                rec["pending_faction"] = faction
+                rec["pending_day"] = day
+
+                if faction is not None:
+                    self._factions.setdefault(faction, _new_record())["matches"] += 1
+
+    def player(self, steam_id):
+        """Return a copy of the counters for one SteamID, or None if unseen."""
+        try:
+            key = int(steam_id)
+        except Exception:
+            return None
+        with self._lock:
+            rec = self._players.get(key)
+            return dict(rec) if rec else None
+
+    def map_record(self, map_name):
+        """Return {'matches', 'wins', 'losses'} for a map key."""
+        with self._lock:
+            return dict(self._maps.get(map_name) or _new_record())
+
+    def faction_record(self, faction):
+        """Return {'matches', 'wins', 'losses'} for a faction id."""
+        with self._lock:
+            return dict(self._factions.get(faction) or _new_record())
+
+    def summary(self, steam_id=None, map_name=None):
+        """
+        Build the small dict the overlay renderer consumes.
+
+        Returns:
+            dict or None: {'elo_change', 'matches', 'wins', 'losses', 'wins_today',
+            'losses_today', 'map'} for the given (or local) SteamID, or None when
+            that player has not been seen this session.
+        """
+        if steam_id is None:
+            steam_id = self.local_steam_id
+        rec = self.player(steam_id) if steam_id is not None else None
+        if not rec:
+            return None
+        elo_change = None
+        if rec["first_elo"] is not None and rec["last_elo"] is not None:
+            elo_change = rec["last_elo"] - rec["first_elo"]
+        today = rec["today"] == date.today()
+        return {
+            "elo_change": elo_change,
+            "matches": rec["matches"],
+            "wins": rec["wins"],
+            "losses": rec["losses"],
+            "wins_today": rec["wins_today"] if today else 0,
+            "losses_today": rec["losses_today"] if today else 0,
+            "map": self.map_record(map_name) if map_name is not None else None,
+        }
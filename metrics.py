@@ -0,0 +1,96 @@
+"""
+Process-wide pipeline metrics: counters, gauges and timings.
+
+All functions are thread-safe and cheap enough to call from the tail loop.
+`write_snapshot()` dumps the current values as JSON next to the overlay so
+users can attach it to bug reports.
+"""
+
+import json
+import os
+import threading
+import time
+
+METRICS_FILENAME = "metrics.json"
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_timings = {}
+_started_at = time.time()
+
+
+def incr(name, amount=1):
+    """Increase counter `name` by `amount`."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def set_gauge(name, value):
+    """Set gauge `name` to its current value."""
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name, value_ms):
+    """Record one timing sample (milliseconds) for `name`."""
+    with _lock:
+        t = _timings.get(name)
+        if t is None:
+            t = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            _timings[name] = t
+        t["count"] += 1
+        t["total_ms"] += value_ms
+        t["last_ms"] = value_ms
+        if value_ms > t["max_ms"]:
+            t["max_ms"] = value_ms
+
+
+def get_counter(name):
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def get_gauge(name, default=None):
+    with _lock:
+        return _gauges.get(name, default)
+
+
+def snapshot():
+    """Return a JSON-serializable copy of all metrics."""
+    with _lock:
+        timings = {}
+        for name, t in _timings.items():
+            timings[name] = dict(t, avg_ms=(t["total_ms"] / t["count"]) if t["count"] else 0.0)
+        return {
+            "uptime_s": round(time.time() - _started_at, 3),
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "timings": timings,
+        }
+
+
+def write_snapshot(output_dir=None, filename=METRICS_FILENAME):
+    """Write `snapshot()` as JSON into `output_dir`. Returns the path or None on error."""
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
+    path = os.path.join(output_dir, filename)
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(snapshot(), fh, indent=2)
+        os.replace(tmp_path, path)
+        return path
+    except Exception as e:
+        print(f"ERROR writing metrics: {e}")
+        return None
+
+
+def reset():
+    """Clear all metrics (used by replay/benchmark runs)."""
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _timings.clear()
+        _started_at = time.time()
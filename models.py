@@ -0,0 +1,159 @@
+"""
+Typed player and match records shared by the pipeline.
+
+`get_match_player_info()` normalizes each coordinator player once into an
+immutable `PlayerInfo`: SteamID, team and start position as int, ELO as
+float, faction and color as enums. Renderers, session stats, enrichment and
+the history store read the attributes directly instead of re-validating
+dict fields on every update. Both types use `__slots__` (no per-instance
+dict), and equality compares field tuples, so "did anything change" checks
+are cheap.
+
+Plain player dicts (sample data, older plugins) are still accepted wherever
+players go in; `coerce_players()` converts them at the boundary.
+"""
+
+from dataclasses import dataclass, field, replace
+from enum import IntEnum
+
+
+class Faction(IntEnum):
+    """Coordinator faction ids (Red Alert countries)."""
+    TURKEY = 1
+    SPAIN = 2
+    GREECE = 3
+    USSR = 4
+    ENGLAND = 5
+    UKRAINE = 6
+    GERMANY = 7
+    FRANCE = 8
+
+
+class PlayerColor(IntEnum):
+    """Coordinator player color ids."""
+    YELLOW = 0
+    CYAN = 1
+    RED = 2
+    GREEN = 3
+    ORANGE = 4
+    BLUE = 5
+    PURPLE = 6
+    PINK = 7
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except Exception:
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except Exception:
+        return None
+
+
+def _to_enum(enum, value):
+    """Return `enum(value)`; ids the enum does not know yet stay plain ints."""
+    value = _to_int(value)
+    if value is None:
+        return None
+    try:
+        return enum(value)
+    except ValueError:
+        return value
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerInfo:
+    """
+    One player in a match, as reported by the coordinator.
+
+    `name` is the raw coordinator name (octal escapes are decoded by the
+    renderers). `extra` holds enrichment results as sorted (key, value) pairs;
+    use `extras` for a dict.
+    """
+    name: str = "Unknown"
+    team: int | None = None
+    elo: float | None = None
+    color: PlayerColor | int | None = None
+    faction: Faction | int | None = None
+    start_position: int | None = None
+    steam_id: int | None = None
+    extra: tuple = field(default=())
+
+    @classmethod
+    def from_dict(cls, data):
+        """Normalize a player dict (`get_match_player_info()` keys, optional "extra")."""
+        name = data.get("name")
+        return cls(
+            name=str(name) if name is not None else "Unknown",
+            team=_to_int(data.get("team")),
+            elo=_to_float(data.get("elo")),
+            color=_to_enum(PlayerColor, data.get("color")),
+            faction=_to_enum(Faction, data.get("faction")),
+            start_position=_to_int(data.get("start_position")),
+            steam_id=_to_int(data.get("steam_id")),
+            extra=tuple(sorted((data.get("extra") or {}).items())),
+        )
+
+    @property
+    def extras(self):
+        return dict(self.extra)
+
+    def with_extra(self, extra):
+        """Return a copy with enrichment results `extra` (dict) replacing the current ones."""
+        return replace(self, extra=tuple(sorted((extra or {}).items())))
+
+    def to_dict(self):
+        """JSON-friendly dict with the `get_match_player_info()` keys plus "extra"."""
+        return {
+            "name": self.name,
+            "team": self.team,
+            "elo": self.elo,
+            "color": int(self.color) if self.color is not None else None,
+            "faction": int(self.faction) if self.faction is not None else None,
+            "start_position": self.start_position,
+            "steam_id": self.steam_id,
+            "extra": self.extras,
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class MatchSnapshot:
+    """One detected match: where it was played and who was in it (empty if unresolved)."""
+    map_name: str | None
+    players: tuple = ()
+    session_id: int | None = None
+    match_id: str | None = None
+    local_steam_id: int | None = None
+    detected_at: float | None = None
+
+    @classmethod
+    def create(cls, players, map_name=None, session_id=None, match_id=None, local_steam_id=None, detected_at=None):
+        """Build a snapshot, normalizing players and IDs."""
+        return cls(
+            map_name=map_name,
+            players=coerce_players(players),
+            session_id=_to_int(session_id),
+            match_id=str(match_id) if match_id is not None else None,
+            local_steam_id=_to_int(local_steam_id),
+            detected_at=detected_at,
+        )
+
+    def to_dict(self):
+        return {
+            "map_name": self.map_name,
+            "players": [p.to_dict() for p in self.players],
+            "session_id": self.session_id,
+            "match_id": self.match_id,
+            "local_steam_id": self.local_steam_id,
+            "detected_at": self.detected_at,
+        }
+
+
+def coerce_players(players):
+    """Return `players` (PlayerInfo or dicts) as a tuple of `PlayerInfo`."""
+    return tuple(p if isinstance(p, PlayerInfo) else PlayerInfo.from_dict(p) for p in players or ())
@@ -0,0 +1,153 @@
+"""
+Multi-target render pass for match updates.
+
+A match update is normalized once by `build_match_view()`; each configured
+target then only formats that view-model:
+
+- html: the OBS browser-source overlay (match_info.html)
+- json: machine-readable state for chat bots and scripts (match_info.json)
+- text: one small file per field under overlay_text/ for OBS Text sources
+
+Targets are selected with the `output_targets` list in settings.json.
+Hiding the overlay is a render pass too (`render_hidden()`), so no target
+keeps showing a finished match.
+"""
+
+import json
+import os
+
+from generate_overlay import build_hidden_view, build_match_view, hide_overlay, write_match_html, write_file_atomic
+
+DEFAULT_TARGETS = ("html",)
+TEXT_DIR_NAME = "overlay_text"
+# Text files are written for this many player slots so unused slots are blanked
+TEXT_PLAYER_SLOTS = 8
+
+
+def write_match_json(view, output_dir, json_name="match_info.json", **_):
+    """Write the view-model as JSON. Returns the path or None on error."""
+    state = {
+        "map_name": view["map_key"],
+        "map_display": view["map_display"],
+        "players": [
+            {k: v for k, v in p.items() if k != "flag_src"}
+            for p in view["players"]
+        ],
+        "stats": view["stats"],
+        "pending": view.get("pending", False),
+        "hidden": view.get("hidden", False),
+        "updated": view["updated"],
+    }
+    path = os.path.join(output_dir, json_name)
+    try:
+        write_file_atomic(path, json.dumps(state, ensure_ascii=False, indent=2))
+        return path
+    except Exception as e:
+        print(f"ERROR writing JSON state: {e}")
+        return None
+
+
+def _write_if_changed(path, content):
+    # OBS Text sources re-read on change; skip rewriting identical files
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            if fh.read() == content:
+                return
+    except Exception:
+        pass
+    write_file_atomic(path, content)
+
+
+def write_match_text(view, output_dir, text_dir_name=TEXT_DIR_NAME, **_):
+    """
+    Write per-field text files (map.txt, session.txt, players.txt and
+    player<N>_name/elo/start/faction/rank/form.txt). Returns the directory or None on error.
+    """
+    text_dir = os.path.join(output_dir, text_dir_name)
+    try:
+        os.makedirs(text_dir, exist_ok=True)
+        files = {
+            "map.txt": view["map_display"],
+            "session.txt": view["stats_text"],
+            "players.txt": "\n".join(
+                f"{p['name']} ({p['elo_text']}) - {p['start_label']}" for p in view["players"]
+            ),
+        }
+        players = view["players"]
+        for slot in range(max(TEXT_PLAYER_SLOTS, len(players))):
+            p = players[slot] if slot < len(players) else None
+            n = slot + 1
+            files[f"player{n}_name.txt"] = p["name"] if p else ""
+            files[f"player{n}_elo.txt"] = p["elo_text"] if p else ""
+            files[f"player{n}_start.txt"] = p["start_label"] if p else ""
+            files[f"player{n}_faction.txt"] = str(p["faction"]) if p and p["faction"] is not None else ""
+            extra = p.get("extra", {}) if p else {}
+            files[f"player{n}_rank.txt"] = str(extra["rank"]) if extra.get("rank") is not None else ""
+            files[f"player{n}_form.txt"] = str(extra.get("form") or "")
+        for name, content in files.items():
+            _write_if_changed(os.path.join(text_dir, name), content)
+        return text_dir
+    except Exception as e:
+        print(f"ERROR writing text outputs: {e}")
+        return None
+
+
+def _write_html(view, output_dir, refresh_interval=5, html_name="match_info.html", **_):
+    if view.get("hidden"):
+        return hide_overlay(output_dir=output_dir, html_name=html_name)
+    return write_match_html(view, output_dir=output_dir, refresh_interval=refresh_interval, html_name=html_name)
+
+
+RENDERERS = {
+    "html": _write_html,
+    "json": write_match_json,
+    "text": write_match_text,
+}
+
+
+def render_outputs(view, targets=DEFAULT_TARGETS, output_dir=None, **options):
+    """
+    Write `view` to every target in one pass.
+
+    Args:
+        view (dict): View-model from `build_match_view()`.
+        targets (iterable): Renderer names from `RENDERERS`.
+        output_dir (str): Output directory. Defaults to module directory.
+        **options: Passed to every renderer (e.g. refresh_interval, html_name).
+
+    Returns:
+        dict: target name -> written path (None for a failed target).
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except Exception:
+        pass
+
+    results = {}
+    for target in targets or DEFAULT_TARGETS:
+        renderer = RENDERERS.get(target)
+        if renderer is None:
+            print(f"WARNING: unknown output target {target!r}; skipping")
+            continue
+        results[target] = renderer(view, output_dir, **options)
+    return results
+
+
+def render_match(players_info, map_name, targets=DEFAULT_TARGETS, output_dir=None, stats=None, pending=False,
+                 **options):
+    """
+    Build the view-model once and write it to every target. Returns `render_outputs()`'s result.
+
+    `pending=True` renders the partial overlay (map and session stats, players still loading).
+    """
+    if output_dir is None:
+        output_dir = os.path.dirname(__file__)
+    view = build_match_view(players_info, map_name, stats=stats, output_dir=output_dir, pending=pending)
+    return render_outputs(view, targets=targets, output_dir=output_dir, **options)
+
+
+def render_hidden(targets=DEFAULT_TARGETS, output_dir=None, **options):
+    """Hide the overlay on every target: the hidden HTML page, `"hidden": true` JSON and blank text files."""
+    return render_outputs(build_hidden_view(), targets=targets, output_dir=output_dir, **options)
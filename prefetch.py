@@ -0,0 +1,139 @@
+"""
+Speculative prefetch of coordinator match data.
+
+As soon as the log shows an earlier lifecycle signal (a new sessionID, a queue
+join) the monitor asks `MatchPrefetcher` to warm the response cache for that
+session in the background. When the `quickmatchfound` line arrives the handler
+usually finds the payload already in hand instead of paying the full network
+round trip.
+
+Prefetches are bounded (one in flight per session, a rolling budget per
+window) and every outcome is counted in `metrics`:
+`prefetch_started`, `prefetch_hits`, `prefetch_misses`, `prefetch_wasted`,
+`prefetch_skipped`.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+import metrics
+
+
+class MatchPrefetcher:
+    """
+    Background warmer for coordinator match responses, keyed by sessionID.
+
+    Prefetches are tasks on the monitor's event loop, so they share its
+    circuit breaker and rate limiter with the match lookups and need no
+    thread of their own. `trigger()`, `take()` and `cancel()` must be called
+    on that loop.
+
+    Args:
+        fetch (callable): Coroutine function `fetch(session_id) -> str or None`,
+            normally the monitor's `get_matches_async` lookup.
+        ttl (float): Seconds a prefetched response stays usable.
+        max_per_window (int): Maximum prefetches started per `window` seconds.
+        window (float): Length of the rolling budget window in seconds.
+    """
+
+    def __init__(self, fetch, ttl=120.0, max_per_window=6, window=600.0):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_per_window = max_per_window
+        self.window = window
+        self._cache = {}  # session_id -> (response_text, fetched_at)
+        self._inflight = {}  # session_id -> asyncio.Task
+        self._started = deque()
+
+    def _expire(self, now):
+        for sid, (_, fetched_at) in list(self._cache.items()):
+            if now - fetched_at > self.ttl:
+                del self._cache[sid]
+                metrics.incr("prefetch_wasted")
+
+    def trigger(self, session_id, reason=""):
+        """
+        Start a background prefetch for `session_id` unless one is cached, in
+        flight, or the rolling budget is used up. Returns True if started.
+        """
+        try:
+            sid = int(str(session_id).strip())
+        except Exception:
+            return False
+
+        now = time.monotonic()
+        self._expire(now)
+        if sid in self._cache or sid in self._inflight:
+            return False
+        while self._started and now - self._started[0] > self.window:
+            self._started.popleft()
+        if len(self._started) >= self.max_per_window:
+            metrics.incr("prefetch_skipped")
+            return False
+        self._started.append(now)
+
+        metrics.incr("prefetch_started")
+        print(f"DEBUG: prefetching match data for sessionID {sid} ({reason or 'signal'})")
+        self._inflight[sid] = asyncio.create_task(self._run(sid))
+        return True
+
+    async def _run(self, sid):
+        response = None
+        try:
+            response = await self.fetch(sid)
+        except Exception as e:
+            print(f"ERROR during prefetch for sessionID {sid}: {e}")
+        finally:
+            if response is not None:
+                self._cache[sid] = (response, time.monotonic())
+            self._inflight.pop(sid, None)
+
+    def put(self, session_id, response_text):
+        """Seed the cache with a known response (e.g. a recorded one)."""
+        try:
+            sid = int(str(session_id).strip())
+        except Exception:
+            return
+        self._cache[sid] = (response_text, time.monotonic())
+
+    async def take(self, session_id, wait=5.0):
+        """
+        Return the prefetched response for `session_id`, waiting up to `wait`
+        seconds for an in-flight prefetch. Returns None on a miss; the entry is
+        removed either way so the next match fetches fresh data. The caller
+        reports whether the payload was useful via `mark_used()` / `mark_wasted()`.
+        """
+        try:
+            sid = int(str(session_id).strip())
+        except Exception:
+            return None
+
+        task = self._inflight.get(sid)
+        if task is not None and wait:
+            # A prefetch still running after `wait` keeps going and fills the cache
+            await asyncio.wait({task}, timeout=wait)
+
+        now = time.monotonic()
+        entry = self._cache.pop(sid, None)
+        if entry is None or now - entry[1] > self.ttl:
+            metrics.incr("prefetch_misses")
+            if entry is not None:
+                metrics.incr("prefetch_wasted")
+            return None
+        return entry[0]
+
+    def cancel(self):
+        """Cancel in-flight prefetches and return their tasks."""
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    def mark_used(self):
+        """Count a prefetched response that contained the detected match."""
+        metrics.incr("prefetch_hits")
+
+    def mark_wasted(self):
+        """Count a prefetched response that turned out not to contain the match."""
+        metrics.incr("prefetch_wasted")
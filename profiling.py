@@ -0,0 +1,198 @@
+"""
+Built-in profiling mode for bug reports from the frozen exe.
+
+Disabled by default; `profiler.call()` then costs one attribute check. When
+started (`--profile` on the command line or `"profile": true` in
+settings.json), hot paths wrapped with `profiler.call()` are profiled with
+cProfile on a sampled basis: one call in `every` per site, and never two at
+once (a call that arrives while another is being profiled runs unprofiled),
+so the overhead stays low during a real streaming session. tracemalloc
+records allocations with a single frame per trace.
+
+Every `interval` seconds, and when the profiler stops, the results are
+written to `profiles/` in the program directory:
+
+- `profile_<stamp>.prof`: merged cProfile stats (`pstats.Stats(path)`, snakeviz, ...)
+- `alloc_<stamp>.tracemalloc`: allocation snapshot (`tracemalloc.Snapshot.load(path)`)
+- `profile_<stamp>.txt`: samples per site, top functions and top allocation sites
+
+The files are overwritten on each dump, so a session leaves one set behind.
+"""
+
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+PROFILE_DIR = "profiles"
+PROFILE_INTERVAL_S = 60.0
+# Profile one call in this many per site for sites called every poll
+SAMPLE_EVERY = 10
+TRACEMALLOC_FRAMES = 1
+SUMMARY_TOP = 25
+
+
+class Profiler:
+    """
+    Sampled cProfile + tracemalloc recorder.
+
+    Args:
+        interval (float): Seconds between dumps while running.
+        sample_every (int): Sampling rate used by call sites that run every poll.
+    """
+
+    def __init__(self, interval=PROFILE_INTERVAL_S, sample_every=SAMPLE_EVERY):
+        self.interval = interval
+        self.sample_every = sample_every
+        self.enabled = False
+        self.output_dir = None
+        self.stamp = None
+        self._lock = threading.Lock()
+        self._active = threading.Lock()  # held while a sampled call is profiled
+        self._stats = None
+        self._calls = {}  # site -> calls seen
+        self._samples = {}  # site -> calls profiled
+        self._stop = threading.Event()
+        self._thread = None
+        self._atexit = False
+
+    def start(self, output_dir, interval=None, sample_every=None):
+        """Start profiling and periodic dumps to `output_dir`. No-op if already running."""
+        with self._lock:
+            if self.enabled:
+                return
+            if interval is not None:
+                self.interval = float(interval)
+            if sample_every is not None:
+                self.sample_every = max(1, int(sample_every))
+            self.output_dir = output_dir
+            self.stamp = time.strftime("%Y%m%d-%H%M%S")
+            self._stats = None
+            self._calls = {}
+            self._samples = {}
+            self._stop.clear()
+            self.enabled = True
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._thread = threading.Thread(target=self._dump_loop, name="profiler", daemon=True)
+        self._thread.start()
+        if not self._atexit:
+            atexit.register(self.stop)
+            self._atexit = True
+        print(f"Profiling enabled; writing to {output_dir} every {self.interval:.0f}s")
+
+    def stop(self):
+        """Write a final dump and stop profiling."""
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.dump()
+        self.enabled = False
+        tracemalloc.stop()
+
+    def call(self, site, func, *args, every=1, **kwargs):
+        """Call `func(*args, **kwargs)`, profiling one call in `every` for `site` while enabled."""
+        if not self.enabled:
+            return func(*args, **kwargs)
+        with self._lock:
+            n = self._calls.get(site, 0)
+            self._calls[site] = n + 1
+        if n % max(1, every) or not self._active.acquire(blocking=False):
+            return func(*args, **kwargs)
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                prof.disable()
+        finally:
+            self._active.release()
+            self._merge(site, prof)
+
+    def _merge(self, site, prof):
+        try:
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(prof)
+                else:
+                    self._stats.add(prof)
+                self._samples[site] = self._samples.get(site, 0) + 1
+        except Exception as e:
+            print(f"WARNING: could not merge profile sample for {site}: {e}")
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def dump(self):
+        """Write the stats, allocation snapshot and text summary. Returns the paths written."""
+        if not self.enabled or not self.output_dir:
+            return []
+        written = []
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            prof_path = os.path.join(self.output_dir, f"profile_{self.stamp}.prof")
+            alloc_path = os.path.join(self.output_dir, f"alloc_{self.stamp}.tracemalloc")
+            text_path = os.path.join(self.output_dir, f"profile_{self.stamp}.txt")
+
+            out = io.StringIO()
+            with self._lock:
+                calls = dict(self._calls)
+                samples = dict(self._samples)
+                out.write(f"Profile started {self.stamp}, written {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+                out.write("Samples per site (profiled / calls):\n")
+                for site in sorted(calls):
+                    out.write(f"  {site}: {samples.get(site, 0)} / {calls[site]}\n")
+                if self._stats is not None:
+                    self._stats.dump_stats(prof_path)
+                    written.append(prof_path)
+                    out.write(f"\nTop {SUMMARY_TOP} functions by cumulative time:\n")
+                    self._stats.stream = out
+                    self._stats.sort_stats("cumulative").print_stats(SUMMARY_TOP)
+
+            if tracemalloc.is_tracing():
+                snapshot = tracemalloc.take_snapshot()
+                snapshot.dump(alloc_path)
+                written.append(alloc_path)
+                current, peak = tracemalloc.get_traced_memory()
+                out.write(f"\nTraced memory: current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB\n")
+                out.write(f"Top {SUMMARY_TOP} allocation sites:\n")
+                for stat in snapshot.statistics("lineno")[:SUMMARY_TOP]:
+                    out.write(f"  {stat}\n")
+
+            with open(text_path, "w", encoding="utf-8") as fh:
+                fh.write(out.getvalue())
+            written.append(text_path)
+        except Exception as e:
+            print(f"ERROR writing profile: {e}")
+        return written
+
+
+# Shared by the monitor, the renderers and the GUI
+profiler = Profiler()
+
+
+def configure_from_settings(settings, base_dir=None):
+    """
+    Start the shared profiler if settings.json enables it.
+
+    Keys: `profile` (bool), `profile_interval_s` (default 60),
+    `profile_sample_every` (default 10). Output goes to `profiles/` under `base_dir`.
+    """
+    if not settings.get("profile") or profiler.enabled:
+        return
+    try:
+        interval = float(settings.get("profile_interval_s", PROFILE_INTERVAL_S))
+        sample_every = int(settings.get("profile_sample_every", SAMPLE_EVERY))
+    except (TypeError, ValueError):
+        print("WARNING: invalid profile settings; using defaults")
+        interval, sample_every = PROFILE_INTERVAL_S, SAMPLE_EVERY
+    profiler.start(os.path.join(base_dir or os.path.dirname(__file__), PROFILE_DIR),
+                   interval=interval, sample_every=sample_every)
@@ -0,0 +1,123 @@
+"""Measure coordinator retry behaviour and response parsing against the local mock.
+
+Usage:
+  python scripts/bench_coordinator.py [--runs 20] [--matches 2000] [--latency-ms 50]
+                                      [--statuses 403,200] [--retry-delay 0.1] [--record DIR]
+                                      [--enrich [--player-latency-ms 200] [--enrich-concurrency 4]
+                                                [--enrich-deadline 1.5]]
+
+Starts `MockCoordinator` in-process, points a live transport at it and times
+`get_matches()` (including retries) and `get_match_player_info()` per run.
+The shared rate limiter is lifted and the circuit breaker is reset before
+every run, so the timings measure the coordinator path rather than
+throttling, and a run that opens the breaker does not fail the next ones.
+With `--enrich` it also times `PlayerEnricher` against the mock's
+`/player/<steamid>` endpoint (cold cache each run) and reports how many
+players were enriched before the deadline.
+"""
+import os
+import sys
+import time
+import argparse
+import contextlib
+import io
+import asyncio
+import statistics
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from coordinator import LiveTransport, RecordingTransport, breaker, configure_limits
+from enrichment import PlayerEnricher, http_json_source
+from log_monitor import get_matches, get_match_player_info
+from mock_coordinator import MockCoordinator, DEFAULT_PLAYER_ID
+
+
+def _summary(values):
+    values = sorted(values)
+    return {
+        'min': round(values[0], 2),
+        'median': round(statistics.median(values), 2),
+        'p95': round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        'max': round(values[-1], 2),
+    }
+
+
+async def _timed_enrich(enricher, players):
+    # Timed inside the loop: asyncio.run() also waits for late lookups when it shuts down
+    start = time.perf_counter()
+    enriched = await enricher.enrich(players)
+    return enriched, (time.perf_counter() - start) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Benchmark get_matches() against the mock coordinator.')
+    ap.add_argument('--runs', type=int, default=20)
+    ap.add_argument('--matches', type=int, default=2000, help='Matches per response')
+    ap.add_argument('--players', type=int, default=2)
+    ap.add_argument('--latency-ms', type=float, default=0.0)
+    ap.add_argument('--statuses', default='200', help='Status sequence per run, e.g. 403,403,200')
+    ap.add_argument('--retry-delay', type=float, default=0.1, help='Seconds between retries')
+    ap.add_argument('--record', help='Also record request/response pairs into this directory')
+    ap.add_argument('--enrich', action='store_true', help='Also time per-player enrichment')
+    ap.add_argument('--player-latency-ms', type=float, default=200.0, help='Mock delay per player lookup')
+    ap.add_argument('--enrich-concurrency', type=int, default=4)
+    ap.add_argument('--enrich-deadline', type=float, default=1.5)
+    args = ap.parse_args()
+
+    statuses = [int(s) for s in args.statuses.split(',') if s.strip()]
+    # Effectively unlimited: the limiter would otherwise dominate every timing
+    configure_limits({'coordinator_rate_per_min': 1e9, 'coordinator_burst': 1e9})
+    fetch_ms = []
+    parse_ms = []
+    failures = 0
+    response_bytes = 0
+    enrich_ms = []
+    enriched_counts = []
+
+    for _ in range(args.runs):
+        breaker.reset()
+        mock = MockCoordinator(latency_ms=args.latency_ms, statuses=statuses, num_matches=args.matches,
+                               players_per_match=args.players,
+                               player_latency_ms=args.player_latency_ms).start()
+        response_bytes = mock.response_bytes
+        transport = LiveTransport(mock.url)
+        if args.record:
+            transport = RecordingTransport(transport, args.record)
+        try:
+            # get_matches() echoes the full body; keep the benchmark output readable
+            with contextlib.redirect_stdout(io.StringIO()):
+                t0 = time.perf_counter()
+                text = get_matches(12345, retry_delay=args.retry_delay, transport=transport)
+                t1 = time.perf_counter()
+                players = get_match_player_info(text, DEFAULT_PLAYER_ID) if text else []
+                t2 = time.perf_counter()
+                if args.enrich and players:
+                    enricher = PlayerEnricher([http_json_source(mock.url + 'player/{steam_id}')],
+                                              concurrency=args.enrich_concurrency,
+                                              deadline=args.enrich_deadline)
+                    enriched, ms = asyncio.run(_timed_enrich(enricher, players))
+                    enrich_ms.append(ms)
+                    enriched_counts.append(sum(1 for p in enriched if p.extra))
+        finally:
+            mock.stop()
+        fetch_ms.append((t1 - t0) * 1000)
+        if text is None or not players:
+            failures += 1
+        else:
+            parse_ms.append((t2 - t1) * 1000)
+
+    print(f'{args.runs} runs, {args.matches} matches/response ({response_bytes} bytes), statuses {statuses}')
+    print('get_matches ms:', _summary(fetch_ms))
+    if parse_ms:
+        print('get_match_player_info ms:', _summary(parse_ms))
+    if enrich_ms:
+        print(f'enrichment ms ({args.players} players, {args.player_latency_ms:.0f} ms each, '
+              f'concurrency {args.enrich_concurrency}, deadline {args.enrich_deadline}s):', _summary(enrich_ms))
+        print('players enriched before deadline:', _summary(enriched_counts))
+    print('failed runs:', failures)
+
+
+if __name__ == '__main__':
+    main()
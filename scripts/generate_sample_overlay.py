@@ -1,11 +1,14 @@
 """Small CLI/test runner to generate a sample overlay for manual testing.
 
 Usage:
-  python scripts/generate_sample_overlay.py [--output-dir DIR] [--open] [--placeholder]
+  python scripts/generate_sample_overlay.py [--output-dir DIR] [--open] [--placeholder] [--check-budget]
 
 This will write `match_info.html` into the target directory (defaults to repo root)
 and optionally open it in the default browser so you can verify flags and transparency
 in OBS or a regular browser.
+
+`--check-budget` renders the 8-player North by Northwest case instead and exits
+non-zero if the page is larger than `OVERLAY_SIZE_BUDGET`.
 """
 import os
 import sys
@@ -17,7 +20,7 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, ROOT)
 
 try:
-    from generate_overlay import generate_match_webpage, generate_placeholder_overlay
+    from generate_overlay import generate_match_webpage, generate_placeholder_overlay, OVERLAY_SIZE_BUDGET
 except Exception as e:
     print(f"ERROR importing generate_overlay: {e}")
     raise
@@ -47,6 +50,21 @@ SAMPLE_PLAYERS = [
     },
 ]
 
+# Page-size budget case: 8 players on North by Northwest with seven different
+# flags, Spain (by far the largest SVG) twice to confirm flags are embedded once.
+BUDGET_MAP = 'MOBIUS_RED_ALERT_MULTIPLAYER_9_MAP'
+BUDGET_PLAYERS = [
+    {
+        'name': f'Commander{i}\\101',
+        'elo': 1400 + i * 37.5,
+        'start_position': i,
+        'color': i,
+        'faction': faction,
+        'team': i % 2,
+    }
+    for i, faction in enumerate([2, 2, 4, 6, 1, 8, 7, 3])
+]
+
 
 def file_url(path):
     p = os.path.abspath(path).replace('\\', '/')
@@ -61,12 +79,16 @@ def main():
     ap.add_argument('--open', action='store_true', help='Open the generated file in the default browser')
     ap.add_argument('--placeholder', action='store_true', help='Generate placeholder overlay instead of sample match')
     ap.add_argument('--name', default='match_info.html', help='Output HTML filename')
+    ap.add_argument('--check-budget', action='store_true',
+                    help='Render the 8-player budget case and fail if it exceeds OVERLAY_SIZE_BUDGET')
     args = ap.parse_args()
 
     out_dir = os.path.abspath(args.output_dir)
     os.makedirs(out_dir, exist_ok=True)
 
-    if args.placeholder:
+    if args.check_budget:
+        path = generate_match_webpage(BUDGET_PLAYERS, map_name=BUDGET_MAP, output_dir=out_dir, html_name=args.name)
+    elif args.placeholder:
         path = generate_placeholder_overlay(output_dir=out_dir, html_name=args.name)
     else:
         # Use a friendly map name key that the overlay may not know; code will display "Unknown Map"
@@ -78,6 +100,14 @@ def main():
 
     print('Generated:', os.path.abspath(path))
 
+    if args.check_budget:
+        size = os.path.getsize(path)
+        print(f'Overlay size: {size} bytes (budget {OVERLAY_SIZE_BUDGET})')
+        if size > OVERLAY_SIZE_BUDGET:
+            print('FAIL: overlay exceeds size budget.')
+            sys.exit(1)
+        print('OK: overlay within size budget.')
+
     if args.open:
         url = file_url(path)
         print('Opening in default browser:', url)
@@ -0,0 +1,70 @@
+"""Backfill the match history from a directory of archived game logs.
+
+Usage:
+  python scripts/import_logs.py DIR [--pattern "LogFile_*.txt"] [--recursive]
+                                    [--db match_history.db] [--workers N] [--split-mb 64]
+                                    [--json]
+
+Every matching log is split into byte ranges that are scanned on a process
+pool with the monitor's own log parser (see log_import.py). New matches
+(sessionID, map, match ID and the streamer's SteamID) are written to the
+history database in batches; matches already stored, or seen in another
+archived copy, are skipped. Progress and throughput are printed as tasks
+finish.
+"""
+import os
+import sys
+import json
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from log_import import DEFAULT_PATTERN, SPLIT_BYTES, find_log_files, import_logs
+from match_history import MatchHistoryStore, DEFAULT_DB_NAME
+
+
+def _print_progress(stats):
+    pct = 100.0 * stats['bytes'] / stats['total_bytes'] if stats['total_bytes'] else 100.0
+    print(f"[{stats['done']:>4}/{stats['tasks']}] {pct:5.1f}%  "
+          f"{stats['bytes'] / (1 << 20):9.1f} MB  {stats['mb_per_s']:7.1f} MB/s  "
+          f"matches={stats['matches']} duplicates={stats['duplicates']}", flush=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Import archived game logs into the match history.')
+    ap.add_argument('directory', help='Directory containing archived logs')
+    ap.add_argument('--pattern', default=DEFAULT_PATTERN, help=f'File name pattern (default {DEFAULT_PATTERN})')
+    ap.add_argument('--recursive', '-r', action='store_true', help='Search subdirectories too')
+    ap.add_argument('--db', default=os.path.join(ROOT, DEFAULT_DB_NAME), help='History database to write')
+    ap.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    ap.add_argument('--split-mb', type=int, default=SPLIT_BYTES >> 20, help='Target MB per scan task')
+    ap.add_argument('--json', action='store_true', help='Print the final report as JSON')
+    args = ap.parse_args()
+
+    paths = find_log_files(args.directory, args.pattern, recursive=args.recursive)
+    if not paths:
+        print(f"No files matching {args.pattern} in {args.directory}")
+        return 1
+    print(f"Importing {len(paths)} log file(s) into {args.db}")
+
+    store = MatchHistoryStore(args.db)
+    try:
+        report = import_logs(paths, store, workers=args.workers, split_bytes=max(1, args.split_mb) << 20,
+                             progress=None if args.json else _print_progress)
+    finally:
+        store.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Scanned {report['files']} file(s), {report['bytes'] / (1 << 20):.1f} MB, "
+              f"{report['lines']} lines in {report['elapsed_s']}s ({report['mb_per_s']} MB/s)")
+        print(f"Matches found: {report['matches']}, new: {report['inserted']}, "
+              f"duplicates: {report['duplicates']}, without sessionID: {report['no_session']}, "
+              f"failed tasks: {report['errors']}")
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Local mock of the coordinator `find.matches` endpoint.
+
+Usage:
+  python scripts/mock_coordinator.py [--port 8731] [--latency-ms 150] [--statuses 403,403,200]
+                                     [--matches 500] [--players 2] [--player-id STEAMID]
+
+Point the monitor at it with settings.json:
+  "coordinator_url": "http://127.0.0.1:8731/"
+
+Every PUT gets a `find.matches` style payload. `GET /player/<steamid>` returns
+a small per-player JSON object ({"steam_id", "rank", "form"}) for testing the
+enrichment stage ("enrichment_url": "http://127.0.0.1:8731/player/{steam_id}"). `--statuses` is consumed one
+entry per request (the last entry repeats), so "403,403,200" exercises the
+retry path. `--matches` controls response size; the match containing
+`--player-id` is placed last so the parser has to scan the whole list.
+"""
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PLAYER_ID = 76561198000000001
+
+
+def build_payload(num_matches=1, players_per_match=2, player_id=DEFAULT_PLAYER_ID, seed=0):
+    """Return a coordinator-style response dict with `num_matches` matches."""
+    rng = random.Random(seed)
+    matches = []
+    for m in range(num_matches):
+        last = m == num_matches - 1
+        players = [76561198100000000 + m * players_per_match + i for i in range(players_per_match)]
+        if last and player_id is not None:
+            players[0] = int(player_id)
+        matches.append({
+            "matchID": 900000 + m,
+            "players": players,
+            "names": [f"Player{m}_{i}" for i in range(players_per_match)],
+            "teams": [i % 2 for i in range(players_per_match)],
+            "elos": [round(rng.uniform(800, 2000), 4) for _ in range(players_per_match)],
+            "factions": [rng.randint(1, 8) for _ in range(players_per_match)],
+            "colors": list(range(players_per_match)),
+        })
+    return {"matches": matches}
+
+
+def build_player_payload(steam_id):
+    """Return a deterministic per-player enrichment payload for `steam_id`."""
+    h = zlib.crc32(str(steam_id).encode('utf-8'))
+    return {
+        "steam_id": str(steam_id),
+        "rank": 1 + h % 500,
+        "form": "".join("W" if (h >> i) & 1 else "L" for i in range(5)),
+    }
+
+
+class MockCoordinator:
+    """
+    Threaded mock coordinator that can be started from scripts or benchmarks.
+
+    Args:
+        port (int): Port to bind on 127.0.0.1 (0 picks a free port).
+        latency_ms (float): Delay before each response.
+        jitter_ms (float): Extra uniform random delay.
+        statuses (list): Status codes returned per request; the last one repeats.
+        num_matches (int): Matches in each successful response.
+        players_per_match (int): Players per match.
+        player_id (int): SteamID placed in the last match.
+        player_latency_ms (float): Delay before each `/player/<steamid>` response
+            (defaults to `latency_ms`).
+    """
+
+    def __init__(self, port=0, latency_ms=0.0, jitter_ms=0.0, statuses=None, num_matches=1,
+                 players_per_match=2, player_id=DEFAULT_PLAYER_ID, player_latency_ms=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.player_latency_ms = latency_ms if player_latency_ms is None else player_latency_ms
+        self.statuses = list(statuses or [200])
+        self.requests = 0
+        self.player_requests = 0
+        self._lock = threading.Lock()
+        self._body = json.dumps(build_payload(num_matches, players_per_match, player_id)).encode('utf-8')
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_PUT(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                with mock._lock:
+                    idx = mock.requests
+                    mock.requests += 1
+                status = mock.statuses[min(idx, len(mock.statuses) - 1)]
+                delay = mock.latency_ms + (random.uniform(0, mock.jitter_ms) if mock.jitter_ms else 0.0)
+                if delay > 0:
+                    time.sleep(delay / 1000.0)
+                body = mock._body if status == 200 else json.dumps({"error": status}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = self.path.strip('/').split('/')
+                if len(parts) != 2 or parts[0] != 'player':
+                    self.send_error(404)
+                    return
+                with mock._lock:
+                    mock.player_requests += 1
+                if mock.player_latency_ms > 0:
+                    time.sleep(mock.player_latency_ms / 1000.0)
+                body = json.dumps(build_player_payload(parts[1])).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f'http://127.0.0.1:{self.port}/'
+        self._thread = None
+
+    @property
+    def response_bytes(self):
+        return len(self._body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Run a local mock coordinator.')
+    ap.add_argument('--port', type=int, default=8731)
+    ap.add_argument('--latency-ms', type=float, default=0.0, help='Fixed delay per response')
+    ap.add_argument('--jitter-ms', type=float, default=0.0, help='Additional random delay per response')
+    ap.add_argument('--statuses', default='200', help='Comma-separated status codes per request, last repeats')
+    ap.add_argument('--matches', type=int, default=1, help='Matches per response (response size)')
+    ap.add_argument('--players', type=int, default=2, help='Players per match')
+    ap.add_argument('--player-id', type=int, default=DEFAULT_PLAYER_ID, help='SteamID placed in the last match')
+    args = ap.parse_args()
+
+    statuses = [int(s) for s in args.statuses.split(',') if s.strip()]
+    mock = MockCoordinator(args.port, args.latency_ms, args.jitter_ms, statuses, args.matches,
+                           args.players, args.player_id)
+    print(f'Mock coordinator on {mock.url} ({mock.response_bytes} byte responses, statuses {statuses})')
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
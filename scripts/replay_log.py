@@ -0,0 +1,242 @@
+"""Replay a captured LogFile_0.txt through the real log monitor.
+
+Usage:
+  python scripts/replay_log.py LOGFILE [--speed N] [--responses FILE | --recordings DIR]
+                               [--output-dir DIR] [--json]
+
+The captured log is written line by line into a temporary LogFile_0.txt while
+`tail_log_file()` tails it, either with the original timing (taken from the
+HH:MM:SS timestamps in the log, when present) or N times faster. Every overlay
+the monitor writes (match, partial or hidden page) is reported with its time
+offset, taken from the monitor's `overlay_written` events, so detection logic
+can be regression-tested and benchmarked without the game.
+
+`--responses` points to a JSON file mapping sessionID -> coordinator response
+(string or object). When given, the monitor uses these instead of the network;
+sessions missing from the file behave like a failed API call. Alternatively
+`--recordings` replays a directory captured with `coordinator_mode: "record"`.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+import metrics
+import event_bus
+from coordinator import ReplayTransport
+from log_monitor import tail_log_file, stop_log_event, get_matches
+from log_scan import line_seconds
+
+# Overlay events buffered for the report; the bus drops the oldest beyond this
+REPLAY_EVENT_QUEUE_SIZE = 10000
+
+
+def load_log_lines(path):
+    """Return a list of (seconds_since_first_line or None, line) for a captured log."""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as fh:
+        raw_lines = fh.readlines()
+
+    lines = []
+    first = None
+    prev = 0.0
+    for line in raw_lines:
+        offset = None
+        stamp = line_seconds(line)
+        if stamp is not None:
+            if first is None:
+                first = stamp
+            offset = stamp - first
+            if offset < prev:
+                # Crossed midnight
+                offset += 24 * 3600
+            prev = offset
+        lines.append((offset, line))
+    return lines
+
+
+def load_responses(path):
+    """Load a sessionID -> response-text mapping from JSON."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        data = json.load(fh)
+    responses = {}
+    for sid, body in data.items():
+        responses[int(sid)] = body if isinstance(body, str) else json.dumps(body)
+    return responses
+
+
+def _describe_overlay(event, start):
+    """Report entry for one `overlay_written` event; `start` is the replay's wall-clock start."""
+    if event.get('hidden'):
+        kind = 'hidden'
+    elif event.get('partial'):
+        kind = 'partial'
+    else:
+        kind = 'match'
+    return {
+        't': round(event['time'] - start, 3),
+        'kind': kind,
+        'map': event.get('map_name'),
+        'players': event.get('players', 0),
+        'write_ms': event.get('write_ms'),
+    }
+
+
+def run_replay(log_path, speed=1.0, responses=None, output_dir=None, poll_interval=0.25,
+               line_interval=0.0, settle=None, fetch_matches=None):
+    """
+    Replay `log_path` into a temp log tailed by the real monitor and collect the overlays it writes.
+
+    Args:
+        log_path (str): Captured LogFile_0.txt.
+        speed (float): Time scale; 1.0 keeps the original timing, 10 is ten times faster.
+        responses (dict): Optional sessionID -> response text used instead of the network.
+        fetch_matches (callable): Optional `fetch(session_id)` used when `responses` is not given.
+        output_dir (str): Where the monitor writes overlays. Defaults to a temp directory.
+        poll_interval (float): Monitor scan interval in seconds.
+        line_interval (float): Delay between lines that carry no timestamp (before scaling).
+        settle (float): Seconds to keep tailing after the last line. Defaults to 3 poll intervals.
+
+    Returns:
+        dict: {'overlays': [...], 'lines', 'matches_in_log', 'elapsed_s', 'lines_per_s',
+               'detection_latency_ms': [...], 'metrics': {...}}
+    """
+    speed = max(float(speed), 1e-6)
+    if settle is None:
+        settle = poll_interval * 3
+
+    work_dir = tempfile.mkdtemp(prefix='cncdocker_replay_')
+    temp_log = os.path.join(work_dir, 'LogFile_0.txt')
+    if output_dir is None:
+        output_dir = os.path.join(work_dir, 'out')
+    os.makedirs(output_dir, exist_ok=True)
+    open(temp_log, 'w', encoding='utf-8').close()
+
+    if responses is not None:
+        def fetch(session_id):
+            return responses.get(int(session_id))
+    else:
+        fetch = fetch_matches
+
+    lines = load_log_lines(log_path)
+    metrics.reset()
+    stop_log_event.clear()
+    monitor = threading.Thread(
+        target=tail_log_file,
+        args=(temp_log, output_dir),
+        kwargs={'poll_interval': poll_interval, 'fetch_matches': fetch},
+        daemon=True,
+    )
+
+    written = []
+    match_line_times = []
+    # Every overlay write is an event, so a partial page quickly followed by the full one counts twice
+    subscription = event_bus.bus.subscribe(
+        written.append, events=[event_bus.OVERLAY_WRITTEN], name='replay', maxsize=REPLAY_EVENT_QUEUE_SIZE
+    )
+
+    start = time.perf_counter()
+    start_wall = time.time()
+    monitor.start()
+
+    last_offset = 0.0
+    elapsed_virtual = 0.0
+    with open(temp_log, 'a', encoding='utf-8') as out:
+        for offset, line in lines:
+            if offset is not None:
+                delay = max(0.0, offset - last_offset)
+                last_offset = offset
+            else:
+                delay = line_interval
+            elapsed_virtual += delay
+            target = start + elapsed_virtual / speed
+            wait = target - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            out.write(line)
+            out.flush()
+            if 'quickmatchfound' in line.lower():
+                match_line_times.append(time.perf_counter() - start)
+
+    write_done = time.perf_counter() - start
+    time.sleep(settle)
+    stop_log_event.set()
+    monitor.join(timeout=max(5.0, poll_interval * 4))
+    event_bus.bus.unsubscribe(subscription)
+    subscription.join(timeout=1)
+    stop_log_event.clear()
+
+    overlays = [_describe_overlay(event, start_wall) for event in written]
+
+    latencies = []
+    match_overlays = [o for o in overlays if o['kind'] == 'match']
+    for t_line in match_line_times:
+        later = [o['t'] for o in match_overlays if o['t'] >= t_line]
+        if later:
+            latencies.append(round((later[0] - t_line) * 1000, 1))
+
+    report = {
+        'log': os.path.abspath(log_path),
+        'output_dir': os.path.abspath(output_dir),
+        'lines': len(lines),
+        'matches_in_log': len(match_line_times),
+        'elapsed_s': round(write_done, 3),
+        'lines_per_s': round(len(lines) / write_done, 1) if write_done > 0 else None,
+        'overlays': overlays,
+        'detection_latency_ms': latencies,
+        'metrics': metrics.snapshot(),
+    }
+    # Keep overlays written into the temp dir for inspection; drop the temp log itself
+    if os.path.abspath(output_dir).startswith(work_dir):
+        os.remove(temp_log)
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description='Replay a captured log through the log monitor.')
+    ap.add_argument('log', help='Captured LogFile_0.txt')
+    ap.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier (default 1 = original timing)')
+    ap.add_argument('--responses', help='JSON file mapping sessionID -> recorded coordinator response')
+    ap.add_argument('--recordings', help='Directory of coordinator recordings to replay (see coordinator.py)')
+    ap.add_argument('--output-dir', '-o', help='Directory for generated overlays (default: temp dir)')
+    ap.add_argument('--poll-interval', type=float, default=0.25, help='Monitor scan interval in seconds')
+    ap.add_argument('--line-interval', type=float, default=0.0,
+                    help='Seconds between lines without a timestamp (before speed scaling)')
+    ap.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    args = ap.parse_args()
+
+    responses = load_responses(args.responses) if args.responses else None
+    if args.recordings:
+        transport = ReplayTransport(args.recordings)
+
+        def fetch_matches(session_id):
+            return get_matches(session_id, retry_delay=0, transport=transport)
+    else:
+        fetch_matches = None
+
+    report = run_replay(args.log, speed=args.speed, responses=responses, output_dir=args.output_dir,
+                        poll_interval=args.poll_interval, line_interval=args.line_interval,
+                        fetch_matches=fetch_matches)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Replayed {report['lines']} lines in {report['elapsed_s']}s ({report['lines_per_s']} lines/s)")
+    print(f"quickmatchfound lines: {report['matches_in_log']}, overlays written: {len(report['overlays'])}")
+    for o in report['overlays']:
+        print(f"  t={o['t']:>8.3f}s  {o['kind']:<11} map={o['map']!s:<40} players={o['players']} write_ms={o['write_ms']}")
+    if report['detection_latency_ms']:
+        print('Detection latency (ms):', ', '.join(str(v) for v in report['detection_latency_ms']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Pipeline status events for the GUI.
+
+Monitor threads call `publish()`; the GUI drains the queue from its own
+thread with `drain()` (via `root.after`), so no worker thread ever touches
+tkinter. Publishing never blocks: when the queue is full the event is
+dropped and counted as `status_events_dropped`.
+
+Event kinds and their fields:
+
+- stage:   stage (e.g. "tailing", "resolving players", "rendering", "stopped")
+- match:   map_name, session_id
+- api:     latency_ms, status (HTTP status or None), attempt
+- retry:   attempt, reason
+- breaker: state, retry_in
+- overlay: write_ms, path
+- error:   message
+"""
+
+import queue
+import time
+
+import metrics
+
+STATUS_QUEUE_SIZE = 1000
+
+status_queue = queue.Queue(maxsize=STATUS_QUEUE_SIZE)
+
+
+def publish(kind, **fields):
+    """Queue a status event for the GUI. Never blocks."""
+    event = {"kind": kind, "time": time.time()}
+    event.update(fields)
+    try:
+        status_queue.put_nowait(event)
+    except queue.Full:
+        metrics.incr("status_events_dropped")
+
+
+def drain(max_items=200):
+    """Return up to `max_items` queued events, oldest first, without blocking."""
+    events = []
+    while len(events) < max_items:
+        try:
+            events.append(status_queue.get_nowait())
+        except queue.Empty:
+            break
+    return events
@@ -0,0 +1,289 @@
+"""
+Stall watchdog and health endpoint for the log monitor.
+
+The monitor's stages (log tail loop, event consumer, theme watcher) report
+heartbeats on their `WorkerRun`. A stage is stalled when it has been busy
+without a heartbeat for longer than its timeout; a stage waiting for work
+marks itself idle and is never considered stalled.
+
+`Supervisor` runs the monitor on a worker thread and checks the heartbeats
+from its own thread, so it still works when the worker's event loop is
+blocked. On a stall (or if the worker exits on its own) the run is
+cancelled without saving its checkpoint and a fresh run is started, which
+resumes from the last committed tail checkpoint. Restarts back off
+exponentially while they keep happening.
+
+`HealthServer` serves the supervisor's state on localhost for automation:
+
+- GET /health: 200 while the monitor runs with no stalled stage, else 503
+- GET /ready:  200 once the current run is tailing the log, else 503
+
+Both return a JSON body with the run generation, restart count and per-stage
+heartbeat ages.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import metrics
+import status
+
+STALL_TIMEOUT_S = 60.0
+WATCHDOG_INTERVAL_S = 1.0
+# Seconds a cancelled run gets to shut down before it is abandoned
+CANCEL_GRACE_S = 5.0
+# Restart delay doubles for each restart within RESTART_WINDOW_S, up to MAX_RESTART_DELAY_S
+RESTART_WINDOW_S = 600.0
+MAX_RESTART_DELAY_S = 60.0
+HEALTH_HOST = "127.0.0.1"
+
+
+class WorkerRun:
+    """
+    One run of the monitor: its heartbeats, readiness and cancellation.
+
+    Args:
+        generation (int): Run number within the supervisor (1 for the first run).
+        stall_timeout (float): Default seconds a busy stage may go without a heartbeat.
+    """
+
+    def __init__(self, generation=1, stall_timeout=STALL_TIMEOUT_S):
+        self.generation = generation
+        self.stall_timeout = float(stall_timeout)
+        self.cancelled = threading.Event()
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._stages = {}  # stage -> {"last", "busy", "timeout", "beats"}
+        self._loop = None
+        self._task = None
+
+    def attach(self, loop, task):
+        """Remember the run's event loop and main task so `cancel()` can interrupt it."""
+        self._loop = loop
+        self._task = task
+
+    def register(self, stage, timeout=None):
+        """Declare `stage` (idle until its first beat) with its own stall timeout."""
+        with self._lock:
+            self._stages[stage] = {
+                "last": time.monotonic(),
+                "busy": False,
+                "timeout": float(timeout) if timeout is not None else self.stall_timeout,
+                "beats": 0,
+            }
+
+    def beat(self, stage, busy=True):
+        """Record progress for `stage`; `busy=False` marks it idle (waiting for work)."""
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {"timeout": self.stall_timeout, "beats": 0}
+            entry["last"] = time.monotonic()
+            entry["busy"] = busy
+            entry["beats"] += 1
+
+    def idle(self, stage):
+        self.beat(stage, busy=False)
+
+    def unregister(self, stage):
+        with self._lock:
+            self._stages.pop(stage, None)
+
+    def stalled(self):
+        """Return [(stage, seconds since its last heartbeat)] for stalled stages."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (stage, now - e["last"])
+                for stage, e in self._stages.items()
+                if e["busy"] and now - e["last"] > e["timeout"]
+            ]
+
+    def snapshot(self):
+        """Per-stage heartbeat state for the health endpoint."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                stage: {
+                    "age_s": round(now - e["last"], 2),
+                    "busy": e["busy"],
+                    "timeout_s": e["timeout"],
+                    "beats": e["beats"],
+                    "stalled": e["busy"] and now - e["last"] > e["timeout"],
+                }
+                for stage, e in self._stages.items()
+            }
+
+    def cancel(self):
+        """Ask the run to stop and interrupt whatever its main task is awaiting."""
+        self.cancelled.set()
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # Loop already closed
+                pass
+
+
+class Supervisor:
+    """
+    Run `target(run)` on a worker thread and restart it when a stage stalls.
+
+    Args:
+        target (callable): Blocking `target(run)` that runs the monitor until
+            `stop_event` or `run.cancelled` is set.
+        stop_event (threading.Event): Stops the supervisor and the current run.
+        stall_timeout (float): Default stall timeout per stage.
+        interval (float): Seconds between heartbeat checks.
+    """
+
+    def __init__(self, target, stop_event, stall_timeout=STALL_TIMEOUT_S, interval=WATCHDOG_INTERVAL_S):
+        self.target = target
+        self.stop_event = stop_event
+        self.stall_timeout = float(stall_timeout)
+        self.interval = float(interval)
+        self.run = None
+        self.restarts = 0
+        self.last_stall = None
+        self.started_at = time.time()
+        self._restart_times = []
+
+    def _start_run(self):
+        generation = self.run.generation + 1 if self.run else 1
+        self.run = WorkerRun(generation, stall_timeout=self.stall_timeout)
+        metrics.set_gauge("monitor_generation", generation)
+        thread = threading.Thread(target=self._run_target, args=(self.run,), name=f"monitor-{generation}", daemon=True)
+        thread.start()
+        return thread
+
+    def _run_target(self, run):
+        try:
+            self.target(run)
+        except BaseException as e:
+            print(f"ERROR: monitor run {run.generation} crashed: {e}")
+            status.publish("error", message=f"Monitor crashed: {e}")
+
+    def _restart_delay(self):
+        now = time.monotonic()
+        self._restart_times = [t for t in self._restart_times if now - t < RESTART_WINDOW_S]
+        delay = min(MAX_RESTART_DELAY_S, 2 ** len(self._restart_times) - 1)
+        self._restart_times.append(now)
+        return delay
+
+    def serve(self):
+        """Supervise runs until `stop_event` is set. Blocks."""
+        thread = self._start_run()
+        while True:
+            thread.join(self.interval)
+            if self.stop_event.is_set():
+                # Let the run finish its shutdown, but not if that stalls too
+                while thread.is_alive() and not self.run.stalled():
+                    thread.join(self.interval)
+                if thread.is_alive():
+                    self.run.cancel()
+                    thread.join(CANCEL_GRACE_S)
+                return
+            stalled = self.run.stalled()
+            if not stalled and thread.is_alive():
+                continue
+
+            if stalled:
+                desc = ", ".join(f"{stage} ({age:.0f}s)" for stage, age in stalled)
+                print(f"WARNING: monitor stalled in {desc}; restarting from checkpoint")
+                status.publish("error", message=f"Monitor stalled in {desc}; restarting")
+                metrics.incr("watchdog_stalls")
+                self.last_stall = {"stages": [s for s, _ in stalled], "time": time.time()}
+            else:
+                print("WARNING: monitor exited unexpectedly; restarting from checkpoint")
+                metrics.incr("watchdog_exits")
+            self.run.cancel()
+            thread.join(CANCEL_GRACE_S)
+            if thread.is_alive():
+                # Blocked outside the event loop's reach; leave the daemon thread behind
+                print(f"WARNING: monitor run {self.run.generation} did not stop; abandoning it")
+                metrics.incr("watchdog_abandoned")
+
+            delay = self._restart_delay()
+            status.publish("stage", stage="restarting")
+            if delay and self.stop_event.wait(delay):
+                return
+            self.restarts += 1
+            metrics.incr("watchdog_restarts")
+            thread = self._start_run()
+
+    def health(self):
+        """Return (healthy, ready, details) for the health endpoint."""
+        run = self.run
+        stages = run.snapshot() if run else {}
+        running = run is not None and not run.cancelled.is_set() and not self.stop_event.is_set()
+        healthy = running and not any(s["stalled"] for s in stages.values())
+        ready = healthy and run.ready.is_set()
+        if self.stop_event.is_set() or run is None:
+            status_text = "stopped"
+        elif run.cancelled.is_set():
+            status_text = "restarting"
+        else:
+            status_text = "stalled"
+        details = {
+            "status": "ok" if healthy else status_text,
+            "ready": ready,
+            "generation": run.generation if run else 0,
+            "restarts": self.restarts,
+            "last_stall": self.last_stall,
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "stages": stages,
+        }
+        return healthy, ready, details
+
+
+class HealthServer:
+    """
+    Localhost HTTP endpoint exposing `Supervisor.health()` at /health and /ready.
+
+    Args:
+        supervisor (Supervisor): Supervisor to report on.
+        port (int): TCP port on 127.0.0.1 (0 picks a free one).
+    """
+
+    def __init__(self, supervisor, port):
+        def handle(handler):
+            healthy, ready, details = supervisor.health()
+            path = handler.path.split("?", 1)[0].rstrip("/")
+            if path == "/health":
+                code = 200 if healthy else 503
+            elif path == "/ready":
+                code = 200 if ready else 503
+            else:
+                code = 404
+                details = {"error": "not found"}
+            body = json.dumps(details).encode("utf-8")
+            handler.send_response(code)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                handle(self)
+
+            def log_message(self, fmt, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((HEALTH_HOST, int(port)), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f"http://{HEALTH_HOST}:{self.port}/"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="health", daemon=True)
+        self._thread.start()
+        print(f"Health endpoint: {self.url}health")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
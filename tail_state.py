@@ -0,0 +1,183 @@
+"""
+Tail checkpoint and processed-match deduplication.
+
+`ProcessedMatches` is a bounded LRU set of (sessionID, map, match id) keys that
+the monitor checks before any network call, so a truncation reset or a repeated
+`quickmatchfound` line never re-runs the API + render pipeline.
+
+`TailCheckpoint` persists the read position together with those keys, so a
+restarted monitor resumes where it stopped instead of re-reading the log.
+"""
+
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+CHECKPOINT_FILENAME = "tail_checkpoint.json"
+# Bytes from the start of the log used to recognise the same file after a restart
+HEAD_SIGNATURE_BYTES = 512
+
+
+def line_match_id(match_id, line):
+    """
+    Return `match_id`, or a "crc:" id derived from the log line when it has none.
+
+    The CRC stands in for a missing match id so two different matches on the
+    same map in one session are still told apart.
+    """
+    if match_id is None and line is not None:
+        match_id = f"crc:{zlib.crc32(line.strip().encode('utf-8', errors='ignore')):08x}"
+    return match_id
+
+
+def match_key(session_id, map_name, match_id=None, line=None):
+    """Build the dedup key for a detected match (see `line_match_id()`)."""
+    return f"{session_id}|{map_name}|{line_match_id(match_id, line)}"
+
+
+class ProcessedMatches:
+    """
+    Bounded LRU set of processed match keys.
+
+    Args:
+        capacity (int): Maximum keys kept; the least recently seen are evicted.
+        keys (iterable): Initial keys, oldest first (e.g. from a checkpoint).
+    """
+
+    def __init__(self, capacity=256, keys=()):
+        self.capacity = max(1, int(capacity))
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        for k in keys:
+            self._keys[k] = None
+        while len(self._keys) > self.capacity:
+            self._keys.popitem(last=False)
+
+    def check_and_add(self, key):
+        """Return True if `key` was already processed; otherwise record it and return False."""
+        with self._lock:
+            if key in self._keys:
+                self._keys.move_to_end(key)
+                return True
+            self._keys[key] = None
+            if len(self._keys) > self.capacity:
+                self._keys.popitem(last=False)
+            return False
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._keys
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def keys(self):
+        """Return keys oldest first."""
+        with self._lock:
+            return list(self._keys)
+
+
+def file_head_signature(filepath, length=HEAD_SIGNATURE_BYTES):
+    """CRC of the first `length` bytes of the log as "crc:length", or None if unreadable/empty."""
+    try:
+        with open(filepath, "rb") as f:
+            head = f.read(length)
+    except Exception:
+        return None
+    if not head:
+        return None
+    return f"{zlib.crc32(head):08x}:{len(head)}"
+
+
+class TailCheckpoint:
+    """
+    Persisted tail state: log path, read position, head signature and processed keys.
+
+    Args:
+        path (str): Checkpoint JSON file.
+        capacity (int): Size of the processed-matches LRU.
+    """
+
+    def __init__(self, path, capacity=256):
+        self.path = path
+        self.log_path = None
+        self.position = 0
+        self.head_signature = None
+        self.processed = ProcessedMatches(capacity)
+        self._saved = None
+
+    @classmethod
+    def load(cls, output_dir=None, capacity=256, filename=CHECKPOINT_FILENAME):
+        """Load the checkpoint from `output_dir`, or return an empty one."""
+        if output_dir is None:
+            output_dir = os.path.dirname(__file__)
+        cp = cls(os.path.join(output_dir, filename), capacity=capacity)
+        try:
+            with open(cp.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            cp.log_path = data.get("log_path")
+            cp.position = int(data.get("position", 0))
+            cp.head_signature = data.get("head_signature")
+            cp.processed = ProcessedMatches(capacity, data.get("processed", []))
+            cp._saved = cp._state()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"WARNING: ignoring unreadable tail checkpoint: {e}")
+        return cp
+
+    def resume_position(self, filepath):
+        """
+        Return the position to resume tailing `filepath` from: the saved position
+        if it is the same file and it has not shrunk, otherwise 0.
+        """
+        if not self.log_path or os.path.abspath(filepath) != os.path.abspath(self.log_path):
+            return 0
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            return 0
+        if size < self.position:
+            return 0
+        if self.head_signature:
+            try:
+                length = int(self.head_signature.split(":")[1])
+            except Exception:
+                length = HEAD_SIGNATURE_BYTES
+            if file_head_signature(filepath, length) != self.head_signature:
+                return 0
+        return self.position
+
+    def update(self, filepath, position):
+        """Record that `filepath` has been read up to `position`."""
+        self.log_path = os.path.abspath(filepath)
+        # Re-sign while the file is new/short or after it was truncated
+        short = self.head_signature is None or not self.head_signature.endswith(f":{HEAD_SIGNATURE_BYTES}")
+        if short or position < self.position:
+            self.head_signature = file_head_signature(filepath)
+        self.position = position
+
+    def _state(self):
+        return {
+            "log_path": self.log_path,
+            "position": self.position,
+            "head_signature": self.head_signature,
+            "processed": self.processed.keys(),
+        }
+
+    def save(self):
+        """Write the checkpoint if anything changed since the last save."""
+        state = self._state()
+        if state == self._saved:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(state, fh, indent=2)
+            os.replace(tmp_path, self.path)
+            self._saved = state
+        except Exception as e:
+            print(f"ERROR saving tail checkpoint: {e}")
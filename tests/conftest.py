@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The modules live at the repository root, like the scripts expect
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
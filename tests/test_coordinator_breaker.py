@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import log_monitor
+from coordinator import CircuitBreaker, CoordinatorResponse, TokenBucket, TransportError
+
+
+@pytest.fixture
+def fresh_limits(monkeypatch):
+    """Give get_matches_async() its own breaker and an unlimited rate limiter."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    monkeypatch.setattr(log_monitor, "breaker", breaker)
+    monkeypatch.setattr(log_monitor, "rate_limiter", TokenBucket(rate=1e9, capacity=1e9))
+    return breaker
+
+
+class OkTransport:
+    def put(self, payload, headers):
+        return CoordinatorResponse(200, "{}")
+
+
+class FailingTransport:
+    def put(self, payload, headers):
+        raise TransportError("down")
+
+
+class HangingTransport:
+    def __init__(self):
+        self.release = threading.Event()
+
+    def put(self, payload, headers):
+        self.release.wait(5)
+        return CoordinatorResponse(200, "{}")
+
+
+class BrokenTransport:
+    def put(self, payload, headers):
+        raise ValueError("unexpected")
+
+
+def test_breaker_opens_and_half_open_allows_one_probe():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() == breaker.PROBE
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow() is True
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == breaker.OPEN
+    assert not breaker.allow()
+
+
+def _open_and_expire(breaker):
+    breaker.record_failure()
+    time.sleep(0.06)
+
+
+def test_cancelled_probe_is_released(fresh_limits):
+    breaker = fresh_limits
+    _open_and_expire(breaker)
+    transport = HangingTransport()
+
+    async def cancel_probe():
+        task = asyncio.create_task(log_monitor.get_matches_async(1, transport=transport))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Let the abandoned request thread finish so asyncio.run() can shut down
+        transport.release.set()
+
+    asyncio.run(cancel_probe())
+    assert log_monitor.get_matches(1, retry_delay=0, transport=OkTransport()) == "{}"
+    assert breaker.state == breaker.CLOSED
+
+
+def test_unexpected_transport_error_releases_probe(fresh_limits):
+    breaker = fresh_limits
+    _open_and_expire(breaker)
+    with pytest.raises(ValueError):
+        log_monitor.get_matches(1, retry_delay=0, transport=BrokenTransport())
+    assert log_monitor.get_matches(1, retry_delay=0, transport=OkTransport()) == "{}"
+
+
+def test_rate_limited_closed_pass_keeps_anothers_probe(fresh_limits, monkeypatch):
+    breaker = fresh_limits
+    monkeypatch.setattr(log_monitor, "rate_limiter", TokenBucket(rate=0.001, capacity=0))
+    monkeypatch.setattr(log_monitor, "RATE_LIMIT_WAIT_S", 0.1)
+
+    async def run():
+        # Let through while closed, then stuck waiting for a rate-limit token
+        limited = asyncio.create_task(log_monitor.get_matches_async(1, transport=OkTransport()))
+        await asyncio.sleep(0)
+        _open_and_expire(breaker)
+        assert breaker.allow() == breaker.PROBE
+        assert await limited is None
+
+    asyncio.run(run())
+    # The rate-limited call must not have given back the probe it never held
+    assert not breaker.allow()
+
+
+def test_open_breaker_fails_fast(fresh_limits):
+    assert log_monitor.get_matches(1, max_attempts=1, retry_delay=0, transport=FailingTransport()) is None
+    assert fresh_limits.state == fresh_limits.OPEN
+    start = time.perf_counter()
+    assert log_monitor.get_matches(1, retry_delay=0, transport=OkTransport()) is None
+    assert time.perf_counter() - start < 0.05
+
+
+def test_resolve_timeout_covers_retry_schedule():
+    schedule = (log_monitor.MAX_ATTEMPTS * log_monitor.REQUEST_TIMEOUT_S
+                + (log_monitor.MAX_ATTEMPTS - 1) * log_monitor.RETRY_DELAY_S)
+    assert log_monitor.RESOLVE_TIMEOUT_S >= schedule
+
+
+def test_token_bucket_bursts_then_limits():
+    bucket = TokenBucket(rate=0.001, capacity=2)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert not bucket.acquire(timeout=0.01)
+
+
+def test_reset_closes_open_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    assert not breaker.allow()
+    breaker.reset()
+    assert breaker.state == breaker.CLOSED
+    assert breaker.allow()
@@ -0,0 +1,76 @@
+import os
+import time
+
+import pytest
+
+import metrics
+from coordinator import (CircuitBreaker, CoordinatorResponse, NoRecordingError, RecordingTransport, ReplayTransport,
+                         TokenBucket, TransportError)
+
+
+def _payload(session_id):
+    return {"observerMatchFindMatches": {"sessionID": session_id, "playerName": ""}}
+
+
+class ScriptedTransport:
+    """Stub inner transport: answers each call with the next scripted response or error."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+
+    def put(self, payload, headers):
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def test_recordings_replay_in_order_then_repeat_the_last(tmp_path):
+    recorder = RecordingTransport(ScriptedTransport(
+        CoordinatorResponse(500, "busy"),
+        TransportError("reset"),
+        CoordinatorResponse(200, '{"matches": []}'),
+        CoordinatorResponse(200, "other session"),
+    ), str(tmp_path))
+    assert recorder.put(_payload(42), {}) == (500, "busy")
+    with pytest.raises(TransportError):
+        recorder.put(_payload(42), {})
+    assert recorder.put(_payload(42), {}) == (200, '{"matches": []}')
+    recorder.put(_payload(7), {})
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 4
+    assert all(len(name[:-len(".json")].split("_")) == 3 for name in names)
+
+    replay = ReplayTransport(str(tmp_path))
+    assert replay.put(_payload(42), {}) == (500, "busy")
+    with pytest.raises(TransportError, match="reset"):
+        replay.put(_payload(42), {})
+    assert replay.put(_payload(42), {}) == (200, '{"matches": []}')
+    # Past the end, the last recording keeps answering
+    assert replay.put(_payload(42), {}) == (200, '{"matches": []}')
+    assert replay.put(_payload(7), {}) == (200, "other session")
+
+
+def test_replay_without_recording_raises(tmp_path):
+    with pytest.raises(NoRecordingError):
+        ReplayTransport(str(tmp_path)).put(_payload(1), {})
+
+
+def test_unrecorded_session_fails_once_without_tripping_the_breaker(tmp_path, monkeypatch):
+    import log_monitor
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(log_monitor, "breaker", breaker)
+    monkeypatch.setattr(log_monitor, "rate_limiter", TokenBucket(rate=1e9, capacity=1e9))
+    RecordingTransport(ScriptedTransport(CoordinatorResponse(200, "recorded")), str(tmp_path)).put(_payload(42), {})
+    replay = ReplayTransport(str(tmp_path))
+    before = metrics.get_counter("coordinator_replay_miss")
+
+    start = time.perf_counter()
+    assert log_monitor.get_matches(1, retry_delay=5, transport=replay) is None
+    # No retry schedule, no failure counted: the recorded session still answers
+    assert time.perf_counter() - start < 1
+    assert metrics.get_counter("coordinator_replay_miss") == before + 1
+    assert breaker.state == breaker.CLOSED
+    assert log_monitor.get_matches(42, transport=replay) == "recorded"
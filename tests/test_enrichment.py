@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import metrics
+from enrichment import PlayerEnricher
+from models import PlayerInfo
+
+
+def _players(count):
+    return [PlayerInfo.from_dict({"name": f"P{i}", "steam_id": 76561198000000000 + i}) for i in range(count)]
+
+
+class StubSource:
+    """Async source that answers {"rank": n} after `delay` seconds (per SteamID) and counts calls."""
+
+    def __init__(self, delay=0.0, delays=None):
+        self.delay = delay
+        self.delays = delays or {}
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def lookup(self, steam_id):
+        self.calls.append(steam_id)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(steam_id, self.delay))
+        finally:
+            self.active -= 1
+        return {"rank": steam_id % 100}
+
+
+def test_slow_source_misses_deadline_and_partial_results_return():
+    players = _players(2)
+    slow_id = players[1].steam_id
+    source = StubSource(delays={slow_id: 5.0})
+    enricher = PlayerEnricher([source.lookup], deadline=0.05)
+    late_before = metrics.get_counter("enrichment_late")
+
+    async def run():
+        start = time.perf_counter()
+        enriched = await enricher.enrich(players)
+        elapsed = time.perf_counter() - start
+        leftover = enricher.cancel()
+        await asyncio.gather(*leftover, return_exceptions=True)
+        return enriched, elapsed, leftover
+
+    enriched, elapsed, leftover = asyncio.run(run())
+    # The overlay waits for the deadline, not for the slow lookup
+    assert elapsed < 1.0
+    assert enriched[0].extras == {"rank": players[0].steam_id % 100}
+    assert enriched[1].extras == {}
+    assert metrics.get_counter("enrichment_late") == late_before + 1
+    assert len(leftover) == 1 and leftover[0].cancelled()
+    assert enricher.cached(slow_id) is None
+
+
+def test_cached_player_is_not_looked_up_again():
+    players = _players(3)
+    source = StubSource()
+    enricher = PlayerEnricher([source.lookup], deadline=1.0)
+
+    async def run():
+        first = await enricher.enrich(players)
+        second = await enricher.enrich(players)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert sorted(source.calls) == [p.steam_id for p in players]
+    assert [p.extras for p in second] == [p.extras for p in first]
+
+
+def test_concurrency_cap_is_never_exceeded():
+    source = StubSource(delay=0.02)
+    enricher = PlayerEnricher([source.lookup], concurrency=2, deadline=2.0)
+
+    enriched = asyncio.run(enricher.enrich(_players(8)))
+    assert len(source.calls) == 8
+    assert source.max_active == 2
+    assert all(p.extras for p in enriched)
+
+
+def test_processor_cancels_lookups_that_outlive_the_deadline(tmp_path, monkeypatch):
+    from log_monitor import MatchEventProcessor
+    from tail_state import TailCheckpoint
+
+    monkeypatch.chdir(tmp_path)
+    proc = MatchEventProcessor(str(tmp_path / "LogFile_0.txt"), str(tmp_path), lambda sid: None,
+                               TailCheckpoint.load(str(tmp_path)))
+    proc.enricher = PlayerEnricher([StubSource(delay=5.0).lookup], deadline=0.01)
+
+    async def run():
+        await proc.enricher.enrich(_players(2))
+        tasks = proc.cancel_tasks()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return tasks
+
+    try:
+        tasks = asyncio.run(run())
+    finally:
+        proc.close(save_checkpoint=False)
+    assert len(tasks) == 2 and all(t.cancelled() for t in tasks)
@@ -0,0 +1,117 @@
+import json
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+import metrics
+from event_bus import EventBus, PipeSink, UdpSink
+
+
+class Collector:
+    """Subscriber callback that records events; `gate` holds it inside the first call."""
+
+    def __init__(self, expect, gate=None):
+        self.events = []
+        self.expect = expect
+        self.gate = gate
+        self.started = threading.Event()
+        self.done = threading.Event()
+
+    def __call__(self, event):
+        self.started.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.events.append(event["n"])
+        if len(self.events) == self.expect:
+            self.done.set()
+
+
+def test_slow_subscriber_drops_its_oldest_events_without_blocking_publish():
+    bus = EventBus()
+    gate = threading.Event()
+    slow = Collector(expect=3, gate=gate)
+    sub = bus.subscribe(slow, name="slow", maxsize=2)
+    dropped = metrics.get_counter("plugin_events_dropped")
+
+    bus.publish("match_detected", n=0)
+    assert slow.started.wait(5)
+    # The subscriber is stuck in its callback: publishing must not wait for it
+    start = time.perf_counter()
+    for n in range(1, 5):
+        bus.publish("match_detected", n=n)
+    assert time.perf_counter() - start < 0.1
+
+    gate.set()
+    assert slow.done.wait(5)
+    bus.unsubscribe(sub)
+    sub.join(5)
+    assert slow.events == [0, 3, 4]
+    assert metrics.get_counter("plugin_events_dropped") == dropped + 2
+
+
+def test_raising_subscriber_is_counted_and_others_still_receive_events():
+    bus = EventBus()
+    healthy = Collector(expect=3)
+
+    def broken(event):
+        raise RuntimeError("plugin bug")
+
+    subs = [bus.subscribe(broken), bus.subscribe(healthy, events=["match_ended"])]
+    errors = metrics.get_counter("plugin_errors")
+
+    for n in range(3):
+        bus.publish("match_ended", n=n)
+    bus.publish("match_detected", n=99)
+    assert healthy.done.wait(5)
+    for sub in subs:
+        bus.unsubscribe(sub)
+        sub.join(5)
+
+    assert healthy.events == [0, 1, 2]
+    assert metrics.get_counter("plugin_errors") == errors + 4
+
+
+def test_udp_sink_sends_one_json_datagram_per_event():
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    bus = EventBus()
+    sub = bus.subscribe(UdpSink(*receiver.getsockname()))
+    try:
+        # Values JSON cannot encode are sent as strings, not dropped
+        bus.publish("match_detected", map_name="MAP_A", session_id=4242, detected_at=object())
+        data, _ = receiver.recvfrom(65536)
+    finally:
+        bus.unsubscribe(sub)
+        receiver.close()
+
+    event = json.loads(data.decode("utf-8"))
+    assert (event["event"], event["map_name"], event["session_id"]) == ("match_detected", "MAP_A", 4242)
+    assert isinstance(event["detected_at"], str)
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs a POSIX FIFO")
+def test_pipe_sink_skips_without_reader_and_writes_json_lines_with_one(tmp_path):
+    path = str(tmp_path / "events.fifo")
+    os.mkfifo(path)
+    sink = PipeSink(path)
+    skipped = metrics.get_counter("plugin_pipe_skipped")
+
+    start = time.perf_counter()
+    sink({"event": "match_detected", "n": 0})
+    assert time.perf_counter() - start < 0.5
+    assert metrics.get_counter("plugin_pipe_skipped") == skipped + 1
+
+    fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+    try:
+        sink({"event": "match_ended", "n": 1})
+        sink({"event": "match_ended", "n": 2})
+        with os.fdopen(fd, "r", encoding="utf-8") as reader:
+            os.set_blocking(fd, True)
+            lines = [json.loads(reader.readline()) for _ in range(2)]
+    finally:
+        sink._fh.close()
+    assert [line["n"] for line in lines] == [1, 2]
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+import event_bus
+from log_monitor import MatchEventProcessor, coalesce_events, parse_log_events
+from tail_state import TailCheckpoint
+
+
+def _match(map_name, match_id):
+    return f'{{"event":"quickmatchfound","mapname": "{map_name}","matchid": "{match_id}"}}\n'
+
+
+def _events(*lines):
+    return parse_log_events('{"sessionID": "4242", "x":1}\n' + "".join(lines))[0]
+
+
+def test_backlog_keeps_only_newest_match():
+    stale, newest, ended_before, ended = coalesce_events(
+        _events(_match("MAP_A", 1), _match("MAP_B", 2), _match("MAP_C", 3))
+    )
+    assert [e["map_name"] for e in stale] == ["MAP_A", "MAP_B"]
+    assert newest["map_name"] == "MAP_C"
+    assert not ended_before and not ended
+
+
+def test_end_before_newest_match_is_reported():
+    stale, newest, ended_before, ended = coalesce_events(
+        _events("Removed player X\n", _match("MAP_B", 2))
+    )
+    assert stale == [] and newest["map_name"] == "MAP_B"
+    assert ended_before and not ended
+
+
+def test_end_without_match():
+    assert coalesce_events(_events("Removed player X\n")) == ([], None, False, True)
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "LogFile_0.txt"
+    log.write_text("Steam ID: 76561198000000001\n", encoding="utf-8")
+    proc = MatchEventProcessor(str(log), str(tmp_path), lambda sid: None,
+                               TailCheckpoint.load(str(tmp_path)), progressive=False)
+    yield proc
+    proc.close(save_checkpoint=False)
+
+
+def test_match_ended_published_when_next_match_arrives_in_same_batch(processor, monkeypatch):
+    published = []
+    monkeypatch.setattr(event_bus.bus, "publish", lambda event_type, **payload: published.append((event_type, payload)))
+
+    async def run():
+        await processor.process(_events(_match("MAP_A", 1)))
+        await processor.process(_events("Removed player X\n", _match("MAP_B", 2)))
+
+    asyncio.run(run())
+    lifecycle = [(t, p.get("map_name")) for t, p in published if t != event_bus.OVERLAY_WRITTEN]
+    assert lifecycle == [
+        (event_bus.MATCH_DETECTED, "MAP_A"),
+        (event_bus.MATCH_ENDED, "MAP_A"),
+        (event_bus.MATCH_DETECTED, "MAP_B"),
+    ]
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from log_import import SPLIT_BYTES, find_log_files, import_logs, plan_ranges
+from match_history import MatchHistoryStore
+from tail_state import line_match_id
+
+STEAM_LINE = "12:00:00 Steam ID: 76561198000000001\n"
+
+
+def _match_line(time, map_name, match_id=None):
+    match = f',"matchid": "{match_id}"' if match_id is not None else ""
+    return f'{time} {{"event":"quickmatchfound","mapname": "{map_name}"{match}}}\n'
+
+
+def _write_log(path, *lines):
+    path.write_text(STEAM_LINE + '{"sessionID": "4242", "x":1}\n' + "".join(lines), encoding="utf-8")
+    return str(path)
+
+
+def _import(tmp_path, paths, **kwargs):
+    store = MatchHistoryStore(str(tmp_path / "history.db"))
+    try:
+        return import_logs(paths, store, workers=1, **kwargs), store.known_matches()
+    finally:
+        store.close()
+
+
+def test_matches_without_id_on_same_map_are_kept_apart(tmp_path):
+    path = _write_log(
+        tmp_path / "LogFile_1.txt",
+        _match_line("12:00:00", "MAP_A"),
+        "12:20:00 Removed player X\n",
+        _match_line("12:30:00", "MAP_A"),
+    )
+    report, known = _import(tmp_path, [path])
+    assert (report["matches"], report["inserted"], report["duplicates"]) == (2, 2, 0)
+    assert {m[1][:4] for m in known} == {"crc:"}
+
+    report, _ = _import(tmp_path, [path])
+    assert (report["inserted"], report["duplicates"]) == (0, 2)
+
+
+def test_overlapping_archives_are_deduplicated(tmp_path):
+    lines = [_match_line(f"12:{i:02d}:00", f"MAP_{i % 3}", 100 + i) for i in range(6)]
+    first = _write_log(tmp_path / "LogFile_1.txt", *lines[:4])
+    second = _write_log(tmp_path / "LogFile_2.txt", *lines[2:])
+    report, known = _import(tmp_path, find_log_files(str(tmp_path)))
+    assert find_log_files(str(tmp_path)) == [first, second]
+    assert (report["matches"], report["inserted"], report["duplicates"]) == (8, 6, 2)
+    assert {m[1] for m in known} == {str(100 + i) for i in range(6)}
+
+
+def test_id_less_match_recorded_live_is_found_on_import(tmp_path):
+    live_line = _match_line("12:00:00", "MAP_A")
+    store = MatchHistoryStore(str(tmp_path / "history.db"))
+    # The monitor stores an id-less match under the line's "crc:" id, like the importer
+    store.record_many([{"players": [], "map_name": "MAP_A", "session_id": 4242,
+                        "match_id": line_match_id(None, live_line)}])
+    store.close()
+    path = _write_log(tmp_path / "LogFile_1.txt", live_line, _match_line("12:30:00", "MAP_A"))
+    report, _ = _import(tmp_path, [path])
+    assert (report["inserted"], report["duplicates"]) == (1, 1)
+
+
+def _detected_at(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "history.db"))
+    try:
+        return dict(conn.execute("SELECT match_id, detected_at FROM matches").fetchall())
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("split_bytes", [SPLIT_BYTES, 150])
+def test_detected_at_comes_from_line_times_across_midnight(tmp_path, split_bytes):
+    path = _write_log(
+        tmp_path / "LogFile_1.txt",
+        _match_line("22:00:00", "MAP_A", 1),
+        "23:10:00 Removed player X\n",
+        _match_line("23:50:00", "MAP_B", 2),
+        "23:59:00 Removed player X\n",
+        _match_line("00:10:00", "MAP_C", 3),
+        "00:20:00 Removed player X\n",
+    )
+    os.utime(path, (datetime(2026, 3, 2, 0, 30).timestamp(),) * 2)
+    _import(tmp_path, [path], split_bytes=split_bytes)
+    assert _detected_at(tmp_path) == {
+        "1": datetime(2026, 3, 1, 22, 0).timestamp(),
+        "2": datetime(2026, 3, 1, 23, 50).timestamp(),
+        "3": datetime(2026, 3, 2, 0, 10).timestamp(),
+    }
+
+
+def test_last_line_after_mtime_time_of_day_is_from_the_day_before(tmp_path):
+    path = _write_log(tmp_path / "LogFile_1.txt", _match_line("23:58:00", "MAP_A", 1))
+    # Written at 23:59, copied (mtime) just after midnight
+    os.utime(path, (datetime(2026, 3, 2, 0, 1).timestamp(),) * 2)
+    _import(tmp_path, [path])
+    assert _detected_at(tmp_path) == {"1": datetime(2026, 3, 1, 23, 58).timestamp()}
+
+
+def test_matches_without_stamps_keep_log_order(tmp_path):
+    path = tmp_path / "LogFile_1.txt"
+    path.write_text('{"sessionID": "4242", "x":1}\n' + "".join(
+        f'{{"event":"quickmatchfound","mapname": "MAP_A","matchid": "{i}"}}\n' for i in range(3)
+    ), encoding="utf-8")
+    _import(tmp_path, [str(path)])
+    times = _detected_at(tmp_path)
+    assert times["0"] < times["1"] < times["2"] <= os.path.getmtime(path)
+
+
+def test_split_ranges_cover_every_line(tmp_path):
+    lines = [_match_line(f"12:{i % 60:02d}:00", "MAP_A", i) for i in range(200)]
+    path = _write_log(tmp_path / "LogFile_1.txt", *lines)
+    ranges = plan_ranges([path], split_bytes=1000)
+    assert len(ranges) > 1
+    assert all(a[2] == b[1] for a, b in zip(ranges, ranges[1:]))
+    report, _ = _import(tmp_path, [path], split_bytes=1000)
+    assert (report["matches"], report["inserted"], report["no_session"]) == (200, 200, 0)
@@ -0,0 +1,78 @@
+import asyncio
+
+from log_scan import backscan_log, find_last_session_id, head_steam_id
+
+LOCAL_ID = "76561198000000001"
+LOBBY_ID = "76561198999999999"
+
+
+def _write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_backscan_keeps_first_steam_id(tmp_path):
+    path = _write(tmp_path / "LogFile_0.txt", (
+        f"Steam ID: {LOCAL_ID}\n"
+        '{"sessionID": "100", "x":1}\n'
+        + "filler line\n" * 500
+        + f"Lobby owner ID: {LOBBY_ID}\n"
+        '{"sessionID": "200", "x":1}\n'
+        '{"event":"quickmatchfound","mapname": "MAP_A","matchid": "7"}\n'
+    ))
+    scan = backscan_log(path, window=256)
+    assert scan["steam_id"] == LOCAL_ID == head_steam_id(path)
+    assert scan["session_id"] == "200"
+    assert scan["match_in_progress"]
+    assert scan["match_session_id"] == "200"
+
+
+def test_backscan_steam_id_outside_head_window_is_unknown(tmp_path, monkeypatch):
+    import log_scan
+    monkeypatch.setattr(log_scan, "STEAM_ID_SCAN_BYTES", 64)
+    path = _write(tmp_path / "LogFile_0.txt", "x" * 100 + f"\nSteam ID: {LOCAL_ID}\n")
+    assert backscan_log(path)["steam_id"] is None
+
+
+def test_ended_match_is_not_in_progress(tmp_path):
+    path = _write(tmp_path / "LogFile_0.txt", (
+        '{"sessionID": "100", "x":1}\n'
+        '{"event":"quickmatchfound","mapname": "MAP_A"}\n'
+        "Removed player X\n"
+    ))
+    scan = backscan_log(path)
+    assert not scan["match_in_progress"]
+    assert scan["match_line"] is None
+
+
+def test_find_last_session_id_before_offset(tmp_path):
+    text = '{"sessionID": "100", "x":1}\n{"sessionID": "200", "x":1}\n'
+    path = _write(tmp_path / "LogFile_0.txt", text)
+    assert find_last_session_id(path) == "200"
+    assert find_last_session_id(path, end=text.index("200") - 20) == "100"
+
+
+def test_monitor_searches_a_log_head_without_steam_id_once(tmp_path, monkeypatch):
+    import log_monitor
+    from tail_state import TailCheckpoint
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(log_monitor, "STEAM_ID_SCAN_BYTES", 64)
+    log = tmp_path / "LogFile_0.txt"
+    path = _write(log, "x" * 100 + f"\nSteam ID: {LOCAL_ID}\n")
+    searches = []
+    monkeypatch.setattr(log_monitor, "head_steam_id", lambda p: searches.append(p) or None)
+    proc = log_monitor.MatchEventProcessor(path, str(tmp_path), lambda sid: None, TailCheckpoint.load(str(tmp_path)))
+    try:
+        # The head is full and has no SteamID: later matches do not search it again
+        assert proc._search_steam_id() is None
+        assert proc._search_steam_id() is None
+        assert len(searches) == 1
+
+        # A truncated log (new game session) is searched again
+        _write(log, "short\n")
+        asyncio.run(proc.process([{"type": "checkpoint", "position": 6, "truncated": True}]))
+        proc._search_steam_id()
+        assert len(searches) == 2
+    finally:
+        proc.close(save_checkpoint=False)
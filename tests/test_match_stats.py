@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+
+from match_stats import SessionStats
+
+LOCAL = 76561198000000001
+OTHER = 76561198000000002
+
+
+def _players(local_elo, other_elo=1000, local_faction=4, other_faction=6):
+    return [
+        {"name": "Me", "steam_id": LOCAL, "elo": local_elo, "faction": local_faction},
+        {"name": "Them", "steam_id": OTHER, "elo": other_elo, "faction": other_faction},
+    ]
+
+
+def _at(day, hour, minute=0):
+    return datetime(day.year, day.month, day.day, hour, minute).timestamp()
+
+
+def test_first_match_has_no_result_yet():
+    stats = SessionStats(local_steam_id=LOCAL)
+    stats.update(_players(1000), map_name="MAP_A")
+    summary = stats.summary(map_name="MAP_A")
+    assert summary["matches"] == 1
+    assert summary["elo_change"] == 0
+    assert (summary["wins"], summary["losses"]) == (0, 0)
+    assert summary["map"] == {"matches": 1, "wins": 0, "losses": 0}
+
+
+def test_result_is_inferred_from_the_next_matchs_elo():
+    stats = SessionStats(local_steam_id=LOCAL)
+    stats.update(_players(1000), map_name="MAP_A")
+    stats.update(_players(1012), map_name="MAP_B")  # won MAP_A
+    stats.update(_players(1003), map_name="MAP_A")  # lost MAP_B
+    stats.update(_players(1003), map_name="MAP_C")  # MAP_A unchanged: no result
+
+    summary = stats.summary()
+    assert summary["matches"] == 4
+    assert summary["elo_change"] == 3
+    assert (summary["wins"], summary["losses"]) == (1, 1)
+    assert (summary["wins_today"], summary["losses_today"]) == (1, 1)
+
+
+def test_player_without_prior_elo_is_not_credited():
+    stats = SessionStats(local_steam_id=LOCAL)
+    stats.update(_players(None), map_name="MAP_A")
+    stats.update(_players(1020), map_name="MAP_B")
+    rec = stats.player(LOCAL)
+    assert rec["first_elo"] == 1020
+    assert (rec["wins"], rec["losses"]) == (0, 0)
+
+
+def test_result_counts_toward_the_day_the_match_was_played():
+    stats = SessionStats(local_steam_id=LOCAL)
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+
+    stats.update(_players(1000), map_name="MAP_A", detected_at=_at(yesterday, 22))
+    stats.update(_players(1010), map_name="MAP_B", detected_at=_at(yesterday, 23, 55))  # won MAP_A
+    stats.update(_players(1020), map_name="MAP_C", detected_at=_at(today, 0, 20))  # won MAP_B, just before midnight
+    rec = stats.player(LOCAL)
+    assert rec["today"] == yesterday
+    assert rec["wins_today"] == 2
+    # Nothing played today has a result yet
+    assert stats.summary()["wins_today"] == 0
+
+    stats.update(_players(1005), map_name="MAP_A", detected_at=_at(today, 1))  # lost MAP_C
+    summary = stats.summary()
+    assert (summary["wins"], summary["losses"]) == (2, 1)
+    assert (summary["wins_today"], summary["losses_today"]) == (0, 1)
+
+
+def test_map_and_faction_records_follow_the_local_player():
+    stats = SessionStats(local_steam_id=LOCAL)
+    stats.update(_players(1000, other_elo=1000, local_faction=4), map_name="MAP_A")
+    # Local won MAP_A as faction 4; the opponent lost, which must not count for the map
+    stats.update(_players(1010, other_elo=990, local_faction=6, other_faction=4), map_name="MAP_A")
+    stats.update(_players(1000, local_faction=4), map_name="MAP_B")  # lost MAP_A as faction 6
+
+    assert stats.map_record("MAP_A") == {"matches": 2, "wins": 1, "losses": 1}
+    assert stats.map_record("MAP_B") == {"matches": 1, "wins": 0, "losses": 0}
+    assert stats.faction_record(4) == {"matches": 3, "wins": 1, "losses": 0}
+    assert stats.faction_record(6) == {"matches": 3, "wins": 0, "losses": 1}
+    assert stats.summary(map_name="MAP_A")["map"] == stats.map_record("MAP_A")
+
+
+def test_match_counted_once_when_re_read_after_restart():
+    stats = SessionStats(local_steam_id=LOCAL)
+    stats.update(_players(1000), map_name="MAP_A", key="1|MAP_A|7")
+    stats.update(_players(1000), map_name="MAP_A", key="1|MAP_A|7")
+    assert stats.summary(map_name="MAP_A")["matches"] == 1
+    assert stats.map_record("MAP_A")["matches"] == 1
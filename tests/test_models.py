@@ -0,0 +1,65 @@
+import dataclasses
+
+import pytest
+
+from models import Faction, MatchSnapshot, PlayerColor, PlayerInfo, coerce_players
+
+
+def test_known_ids_become_enums_and_unknown_ids_stay_ints():
+    known = PlayerInfo.from_dict({"faction": "4", "color": 2})
+    assert known.faction is Faction.USSR
+    assert known.color is PlayerColor.RED
+
+    # A faction or colour added by a game update is kept, not dropped
+    unknown = PlayerInfo.from_dict({"faction": 42, "color": "9"})
+    assert type(unknown.faction) is int and unknown.faction == 42
+    assert type(unknown.color) is int and unknown.color == 9
+    assert unknown.to_dict()["faction"] == 42
+
+    missing = PlayerInfo.from_dict({"faction": None, "color": "blue"})
+    assert (missing.faction, missing.color) == (None, None)
+
+
+def test_numeric_fields_are_coerced_once():
+    player = PlayerInfo.from_dict({
+        "name": 12, "elo": "1012.5", "team": "1", "start_position": "3", "steam_id": "76561198000000001",
+    })
+    assert player.name == "12"
+    assert player.elo == 1012.5 and isinstance(player.elo, float)
+    assert (player.team, player.start_position, player.steam_id) == (1, 3, 76561198000000001)
+
+    bad = PlayerInfo.from_dict({"name": None, "elo": "N/A", "team": "", "steam_id": None})
+    assert bad.name == "Unknown"
+    assert (bad.elo, bad.team, bad.steam_id) == (None, None, None)
+
+
+def test_with_extra_returns_a_new_frozen_record():
+    original = PlayerInfo.from_dict({"name": "Alpha", "extra": {"rank": 3}})
+    enriched = original.with_extra({"form": "WL", "rank": 7})
+
+    assert enriched is not original
+    assert enriched.extras == {"form": "WL", "rank": 7}
+    assert enriched.name == "Alpha"
+    assert original.extras == {"rank": 3}
+    assert original.with_extra(None).extras == {}
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        enriched.elo = 1000.0
+
+
+def test_equal_fields_compare_equal_regardless_of_extra_order():
+    a = PlayerInfo.from_dict({"name": "A", "extra": {"rank": 1, "form": "W"}})
+    b = PlayerInfo.from_dict({"name": "A", "extra": {"form": "W", "rank": 1}})
+    assert a == b and hash(a) == hash(b)
+
+
+def test_snapshot_normalizes_players_and_ids():
+    existing = PlayerInfo.from_dict({"name": "Alpha"})
+    snap = MatchSnapshot.create([existing, {"name": "Bravo", "elo": "990"}], map_name="MAP_A",
+                                session_id="4242", match_id=7, local_steam_id="76561198000000001")
+
+    assert snap.players[0] is existing
+    assert snap.players[1] == PlayerInfo(name="Bravo", elo=990.0)
+    assert (snap.session_id, snap.match_id, snap.local_steam_id) == (4242, "7", 76561198000000001)
+    assert snap.to_dict()["players"][1]["elo"] == 990.0
+    assert MatchSnapshot.create(None).players == ()
+    assert coerce_players([]) == ()
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import log_monitor
+from generate_overlay import get_map_display_name
+from overlay_outputs import TEXT_DIR_NAME, TEXT_PLAYER_SLOTS, render_hidden, render_match
+from tail_state import TailCheckpoint
+
+MAP = "MOBIUS_RED_ALERT_MULTIPLAYER_9_MAP"
+PLAYERS = [
+    {"name": "Alpha", "steam_id": 76561198000000001, "elo": 1012.4, "team": 0, "faction": 4, "color": 0,
+     "start_position": 1, "extra": {"rank": 12, "form": "WWL"}},
+    {"name": "Bravo", "steam_id": 76561198000000002, "elo": None, "team": 1, "faction": 6, "color": 1},
+]
+STATS = {"matches": 3, "elo_change": 12, "wins": 2, "losses": 1}
+
+
+def _json(path):
+    with open(path / "match_info.json", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _text(path, name):
+    return (path / TEXT_DIR_NAME / name).read_text(encoding="utf-8")
+
+
+def test_json_target_holds_the_view_model(tmp_path):
+    outputs = render_match(PLAYERS, MAP, targets=["json"], output_dir=str(tmp_path), stats=STATS)
+
+    assert list(outputs) == ["json"]
+    state = _json(tmp_path)
+    assert state["map_name"] == MAP
+    assert state["map_display"] != "Unknown Map"
+    assert [p["name"] for p in state["players"]] == ["Alpha", "Bravo"]
+    assert [p["elo_text"] for p in state["players"]] == ["1012", "N/A"]
+    assert state["players"][0]["extra"] == {"form": "WWL", "rank": 12}
+    assert all("flag_src" not in p for p in state["players"])
+    assert state["stats"] == STATS
+    assert (state["pending"], state["hidden"]) == (False, False)
+
+
+def test_text_target_writes_one_file_per_field(tmp_path):
+    render_match(PLAYERS, MAP, targets=["text"], output_dir=str(tmp_path), stats=STATS)
+
+    assert _text(tmp_path, "map.txt") == get_map_display_name(MAP)
+    assert _text(tmp_path, "session.txt") == "Session +12 ELO · W/L 2-1"
+    assert _text(tmp_path, "players.txt").splitlines()[1] == "Bravo (N/A) - -"
+    assert _text(tmp_path, "player1_name.txt") == "Alpha"
+    assert _text(tmp_path, "player1_elo.txt") == "1012"
+    assert _text(tmp_path, "player1_faction.txt") == "4"
+    assert _text(tmp_path, "player1_rank.txt") == "12"
+    assert _text(tmp_path, "player1_form.txt") == "WWL"
+    assert _text(tmp_path, "player2_rank.txt") == ""
+    # Unused slots exist and are blank, so OBS sources bound to them show nothing
+    assert _text(tmp_path, f"player{TEXT_PLAYER_SLOTS}_name.txt") == ""
+
+
+def test_hidden_pass_clears_every_target(tmp_path):
+    targets = ["html", "json", "text"]
+    render_match(PLAYERS, MAP, targets=targets, output_dir=str(tmp_path), stats=STATS)
+    outputs = render_hidden(targets=targets, output_dir=str(tmp_path))
+
+    assert set(outputs) == set(targets) and all(outputs.values())
+    assert "Alpha" not in (tmp_path / "match_info.html").read_text(encoding="utf-8")
+    state = _json(tmp_path)
+    assert state["hidden"] is True
+    assert (state["map_name"], state["players"], state["stats"]) == (None, [], None)
+    for name in ["map.txt", "session.txt", "players.txt", "player1_name.txt", "player1_elo.txt", "player1_rank.txt"]:
+        assert _text(tmp_path, name) == ""
+
+
+def test_match_end_hides_json_and_text_targets(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "settings.json").write_text(json.dumps({"close_overlay_on_match_complete": True}))
+    monkeypatch.setattr(log_monitor, "OVERLAY_HIDE_DELAY_S", 0)
+    proc = log_monitor.MatchEventProcessor(str(tmp_path / "LogFile_0.txt"), str(tmp_path), lambda sid: None,
+                                           TailCheckpoint.load(str(tmp_path)))
+    proc.output_targets = ["html", "json", "text"]
+
+    async def run():
+        await proc._render(PLAYERS, MAP, stats=STATS)
+        assert _text(tmp_path, "player1_name.txt") == "Alpha"
+        proc._handle_match_end()
+        # The hide timer is the only task left; let it run to completion
+        await asyncio.gather(*list(proc._tasks))
+
+    try:
+        asyncio.run(run())
+    finally:
+        proc.close(save_checkpoint=False)
+    assert _json(tmp_path)["hidden"] is True
+    assert _text(tmp_path, "map.txt") == _text(tmp_path, "player1_name.txt") == ""
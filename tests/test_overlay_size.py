@@ -0,0 +1,23 @@
+from generate_overlay import OVERLAY_SIZE_BUDGET, build_match_view, render_match_html
+from scripts.generate_sample_overlay import BUDGET_MAP, BUDGET_PLAYERS
+
+
+def _render(tmp_path):
+    view = build_match_view(BUDGET_PLAYERS, BUDGET_MAP, output_dir=str(tmp_path))
+    return view, render_match_html(view)
+
+
+def test_eight_player_overlay_within_size_budget(tmp_path):
+    view, page = _render(tmp_path)
+    assert len(view["players"]) == 8
+    size = len(page.encode("utf-8"))
+    assert size <= OVERLAY_SIZE_BUDGET, f"overlay is {size} bytes, budget {OVERLAY_SIZE_BUDGET}"
+
+
+def test_each_flag_embedded_once(tmp_path):
+    view, page = _render(tmp_path)
+    flags = {p["flag_src"] for p in view["players"] if p["flag_src"]}
+    # Spain appears twice among the players but its SVG only once in the page
+    assert len(flags) == 7
+    for src in flags:
+        assert page.count(src) == 1
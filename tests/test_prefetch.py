@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from prefetch import MatchPrefetcher
+
+
+def test_prefetch_runs_as_a_task_on_the_callers_loop():
+    calls = []
+
+    async def fetch(session_id):
+        calls.append((session_id, threading.current_thread()))
+        await asyncio.sleep(0.05)
+        return "payload"
+
+    async def run():
+        prefetcher = MatchPrefetcher(fetch)
+        assert prefetcher.trigger("42", "test")
+        assert not prefetcher.trigger(42, "again")
+        # take() waits for the in-flight task instead of blocking a thread
+        assert await prefetcher.take(42) == "payload"
+        assert await prefetcher.take(42, wait=0) is None
+
+    asyncio.run(run())
+    assert calls == [(42, threading.main_thread())]
+
+
+def test_take_times_out_and_cancel_stops_inflight_prefetches():
+    async def run():
+        gate = asyncio.Event()
+
+        async def fetch(session_id):
+            await gate.wait()
+            return "late"
+
+        prefetcher = MatchPrefetcher(fetch)
+        prefetcher.trigger(7)
+        assert await prefetcher.take(7, wait=0.02) is None
+        tasks = prefetcher.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(t.cancelled() for t in tasks)
+
+    asyncio.run(run())
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import event_bus
+import log_monitor
+import metrics
+from log_monitor import MatchEventProcessor, parse_log_events
+from tail_state import TailCheckpoint
+
+STEAM_ID = "76561198000000001"
+RESPONSE = json.dumps({"matches": [{
+    "players": [int(STEAM_ID), 76561198000000002], "names": ["Alpha", "Bravo"],
+    "teams": [0, 1], "elos": [1000, 990], "factions": [4, 6], "colors": [0, 1],
+}]})
+
+
+def _match_event(detected_ago=0.0):
+    events, _ = parse_log_events(
+        '{"sessionID": "4242", "x":1}\n'
+        '{"event":"quickmatchfound","mapname": "MOBIUS_RED_ALERT_MULTIPLAYER_9_MAP","matchid": "7"}\n'
+    )
+    events[0]["detected_at"] = time.time() - detected_ago
+    return events
+
+
+def _slow_fetch(delay):
+    async def fetch(session_id):
+        await asyncio.sleep(delay)
+        return RESPONSE
+    return fetch
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Record (partial, seconds since start) for each overlay_written event."""
+    metrics.reset()
+    events = []
+    start = time.time()
+
+    def publish(event_type, **payload):
+        if event_type == event_bus.OVERLAY_WRITTEN:
+            events.append((payload["partial"], time.time() - start))
+
+    monkeypatch.setattr(event_bus.bus, "publish", publish)
+    return events
+
+
+def _processor(tmp_path, monkeypatch, fetch, slo_ms):
+    monkeypatch.chdir(tmp_path)
+    proc = MatchEventProcessor(str(tmp_path / "LogFile_0.txt"), str(tmp_path), fetch,
+                               TailCheckpoint.load(str(tmp_path)), first_paint_slo_ms=slo_ms)
+    proc.steam_id = STEAM_ID
+    proc.output_targets = ["html"]
+    return proc
+
+
+def _page(tmp_path):
+    return (tmp_path / "match_info.html").read_text(encoding="utf-8")
+
+
+def test_partial_overlay_within_slo_then_full_overlay(tmp_path, monkeypatch, written):
+    proc = _processor(tmp_path, monkeypatch, _slow_fetch(0.4), slo_ms=300)
+    try:
+        asyncio.run(proc.process(_match_event()))
+    finally:
+        proc.close(save_checkpoint=False)
+
+    assert [partial for partial, _ in written] == [True, False]
+    assert written[0][1] < 0.3
+    assert "Alpha" in _page(tmp_path)
+    snap = metrics.snapshot()
+    assert snap["counters"]["first_paint_slo_met"] == 1
+    assert "first_paint_slo_missed" not in snap["counters"]
+    assert snap["counters"]["partial_overlays"] == 1
+    assert snap["timings"]["time_to_first_paint_ms"]["count"] == 1
+    assert snap["timings"]["time_to_full_overlay_ms"]["last_ms"] >= 400
+
+
+def test_late_partial_does_not_overwrite_full_overlay(tmp_path, monkeypatch, written):
+    render_match = log_monitor.render_match
+    partial_renders = []
+
+    def render(*args, **kwargs):
+        if kwargs.get("pending"):
+            partial_renders.append(kwargs)
+            if len(partial_renders) == 2:
+                # The theme refresh re-renders the partial page slowly, while the match data arrives
+                time.sleep(0.3)
+        return render_match(*args, **kwargs)
+
+    monkeypatch.setattr(log_monitor, "render_match", render)
+    proc = _processor(tmp_path, monkeypatch, _slow_fetch(0.15), slo_ms=100)
+    proc.output_targets = ["html", "json"]
+    refreshes = []
+    publish = event_bus.bus.publish
+
+    def publish_and_refresh(event_type, **payload):
+        publish(event_type, **payload)
+        if event_type == event_bus.OVERLAY_WRITTEN and payload["partial"]:
+            refreshes.append(asyncio.get_running_loop().create_task(proc.refresh_overlay()))
+
+    monkeypatch.setattr(event_bus.bus, "publish", publish_and_refresh)
+
+    async def run():
+        await proc.process(_match_event())
+        await asyncio.gather(*refreshes)
+
+    try:
+        asyncio.run(run())
+    finally:
+        proc.close(save_checkpoint=False)
+
+    assert len(refreshes) == 1
+    assert [partial for partial, _ in written] == [True, False]
+    assert "Alpha" in _page(tmp_path)
+    assert proc._last_render[3] is False
+
+
+def test_slow_first_paint_counts_as_missed(tmp_path, monkeypatch, written):
+    proc = _processor(tmp_path, monkeypatch, _slow_fetch(0.1), slo_ms=100)
+    try:
+        # Detected 0.5 s ago (e.g. the consumer was behind): the partial paint is already late
+        asyncio.run(proc.process(_match_event(detected_ago=0.5)))
+    finally:
+        proc.close(save_checkpoint=False)
+
+    assert [partial for partial, _ in written] == [True, False]
+    counters = metrics.snapshot()["counters"]
+    assert counters["first_paint_slo_missed"] == 1
+    assert "first_paint_slo_met" not in counters
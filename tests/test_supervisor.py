@@ -0,0 +1,220 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from supervisor import HealthServer, Supervisor, WorkerRun
+
+
+def test_busy_stage_without_heartbeat_is_stalled():
+    run = WorkerRun(stall_timeout=0.05)
+    run.register("tail")
+    run.register("events")
+    run.beat("tail")
+    run.idle("events")
+    time.sleep(0.08)
+    assert [stage for stage, _ in run.stalled()] == ["tail"]
+    run.beat("tail")
+    assert run.stalled() == []
+    assert run.snapshot()["tail"]["beats"] == 2
+
+
+def test_per_stage_timeout():
+    run = WorkerRun(stall_timeout=0.05)
+    run.register("events", timeout=10)
+    run.beat("events")
+    time.sleep(0.08)
+    assert run.stalled() == []
+
+
+@pytest.fixture
+def no_restart_delay(monkeypatch):
+    monkeypatch.setattr(Supervisor, "_restart_delay", lambda self: 0)
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=2) as r:
+            return r.status, json.load(r)
+    except urllib.error.HTTPError as e:
+        return e.code, json.load(e)
+
+
+def test_stalled_run_is_cancelled_and_restarted(no_restart_delay):
+    stop = threading.Event()
+    runs = []
+    restarted = threading.Event()
+
+    def target(run):
+        runs.append(run)
+        run.register("tail")
+        run.ready.set()
+        if run.generation == 1:
+            run.beat("tail")
+            # Stalls: busy with no further heartbeats until cancelled
+            run.cancelled.wait(5)
+            return
+        restarted.set()
+        while not stop.is_set() and not run.cancelled.is_set():
+            run.beat("tail")
+            time.sleep(0.01)
+
+    supervisor = Supervisor(target, stop, stall_timeout=0.1, interval=0.02)
+    health = HealthServer(supervisor, 0).start()
+    thread = threading.Thread(target=supervisor.serve, daemon=True)
+    thread.start()
+    try:
+        assert restarted.wait(5)
+        assert runs[0].cancelled.is_set()
+        assert supervisor.restarts == 1
+        assert supervisor.last_stall["stages"] == ["tail"]
+        code, body = _get(health.url + "health")
+        assert code == 200 and body["generation"] == 2
+        assert _get(health.url + "ready")[0] == 200
+        assert _get(health.url + "nope")[0] == 404
+    finally:
+        stop.set()
+        thread.join(5)
+        health.stop()
+    assert not thread.is_alive()
+    assert not supervisor.health()[0]
+
+
+def test_cancel_interrupts_the_runs_event_loop():
+    import asyncio
+
+    run = WorkerRun()
+    result = {}
+
+    async def main():
+        run.attach(asyncio.get_running_loop(), asyncio.current_task())
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            result["cancelled"] = True
+
+    thread = threading.Thread(target=asyncio.run, args=(main(),))
+    thread.start()
+    time.sleep(0.1)
+    run.cancel()
+    thread.join(2)
+    assert result == {"cancelled": True}
+    assert run.cancelled.is_set()
+
+
+def test_cancelled_monitor_run_unwinds_its_tasks_and_stops_writing(tmp_path, monkeypatch):
+    import asyncio
+
+    import log_monitor
+
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "LogFile_0.txt"
+    log.write_text('Steam ID: 76561198000000001\n{"sessionID": "123", "x":1}\n', encoding="utf-8")
+    out = tmp_path / "out"
+    response = json.dumps({"matches": [{
+        "players": [76561198000000001, 76561198000000002], "names": ["Alpha", "Bravo"],
+        "teams": [0, 1], "elos": [1000, 990], "factions": [4, 6], "colors": [0, 1],
+    }]})
+    fetching = threading.Event()
+    release = threading.Event()
+
+    def fetch(session_id):
+        fetching.set()
+        release.wait(5)
+        return response
+
+    run = WorkerRun()
+    leftover = {}
+
+    def run_monitor():
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(log_monitor.tail_log_file_async(
+                str(log), str(out), poll_interval=0.05, fetch_matches=fetch, run=run))
+            leftover["tasks"] = [t for t in asyncio.all_tasks(loop) if not t.done()]
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run_monitor, daemon=True)
+    thread.start()
+    try:
+        assert run.ready.wait(5)
+        with open(log, "a", encoding="utf-8") as fh:
+            fh.write('{"event":"quickmatchfound","mapname": "MOBIUS_RED_ALERT_MULTIPLAYER_9_MAP","matchid": "7"}\n')
+        assert fetching.wait(5)
+        run.cancel()
+        thread.join(5)
+        assert not thread.is_alive()
+        assert leftover["tasks"] == []
+    finally:
+        release.set()
+    time.sleep(0.2)
+    page = out / "match_info.html"
+    assert not page.exists() or "Alpha" not in page.read_text(encoding="utf-8")
+
+
+def test_cancelled_run_skips_overlay_writes(tmp_path, monkeypatch):
+    from log_monitor import MatchEventProcessor
+    from tail_state import TailCheckpoint
+
+    monkeypatch.chdir(tmp_path)
+    run = WorkerRun()
+    proc = MatchEventProcessor(str(tmp_path / "LogFile_0.txt"), str(tmp_path), lambda sid: None,
+                               TailCheckpoint.load(str(tmp_path)), run=run)
+    calls = []
+    try:
+        assert proc._write(calls.append, 1) is None and calls == [1]
+        run.cancelled.set()
+        assert proc._write(calls.append, 2) is None and calls == [1]
+    finally:
+        proc.close(save_checkpoint=False)
+
+
+def test_session_stats_survive_a_restart(tmp_path, monkeypatch):
+    import asyncio
+
+    import log_monitor
+    from match_stats import SessionStats
+
+    monkeypatch.chdir(tmp_path)
+    log = tmp_path / "LogFile_0.txt"
+    log.write_text('Steam ID: 76561198000000001\n{"sessionID": "1", "x":1}\n', encoding="utf-8")
+    out = tmp_path / "out"
+
+    def response(elo):
+        return json.dumps({"matches": [{
+            "players": [76561198000000001, 76561198000000002], "names": ["Alpha", "Bravo"],
+            "teams": [0, 1], "elos": [elo, 990], "factions": [4, 6], "colors": [0, 1],
+        }]})
+
+    responses = {1: response(1000), 2: response(1015)}
+    stats = SessionStats()
+
+    def run_once(generation, lines, matches):
+        run = WorkerRun(generation)
+        thread = threading.Thread(target=asyncio.run, args=(log_monitor.tail_log_file_async(
+            str(log), str(out), poll_interval=0.05, fetch_matches=responses.get, run=run, session_stats=stats),),
+            daemon=True)
+        thread.start()
+        try:
+            assert run.ready.wait(5)
+            with open(log, "a", encoding="utf-8") as fh:
+                fh.write(lines)
+            deadline = time.monotonic() + 5
+            while (stats.summary() or {}).get("matches") != matches and time.monotonic() < deadline:
+                time.sleep(0.02)
+        finally:
+            # What the watchdog does to a stalled run
+            run.cancel()
+            thread.join(5)
+        assert not thread.is_alive()
+
+    run_once(1, '{"event":"quickmatchfound","mapname": "MAP_A","matchid": "1"}\n', 1)
+    run_once(2, '{"sessionID": "2", "x":1}\n{"event":"quickmatchfound","mapname": "MAP_B","matchid": "2"}\n', 2)
+
+    summary = stats.summary()
+    assert summary["matches"] == 2
+    assert (summary["elo_change"], summary["wins"], summary["losses"]) == (15, 1, 0)
@@ -0,0 +1,42 @@
+from tail_state import ProcessedMatches, TailCheckpoint, match_key
+
+
+def test_lru_evicts_least_recently_seen():
+    seen = ProcessedMatches(capacity=2)
+    assert not seen.check_and_add("a")
+    assert not seen.check_and_add("b")
+    assert seen.check_and_add("a")  # refreshes "a"
+    assert not seen.check_and_add("c")  # evicts "b"
+    assert seen.keys() == ["a", "c"]
+    assert "b" not in seen
+    assert not seen.check_and_add("b")
+
+
+def test_lru_initial_keys_are_trimmed_to_capacity():
+    seen = ProcessedMatches(capacity=2, keys=["a", "b", "c"])
+    assert seen.keys() == ["b", "c"]
+
+
+def test_match_key_falls_back_to_line_crc():
+    line = '{"event":"quickmatchfound","mapname": "MAP_A"}'
+    assert match_key(1, "MAP_A", "77") == "1|MAP_A|77"
+    assert match_key(1, "MAP_A", None, line).startswith("1|MAP_A|crc:")
+    assert match_key(1, "MAP_A", None, line) == match_key(1, "MAP_A", None, line + "  ")
+    assert match_key(1, "MAP_A", None, line) != match_key(1, "MAP_A", None, "12:30 " + line)
+
+
+def test_checkpoint_round_trip_and_resume(tmp_path):
+    log = tmp_path / "LogFile_0.txt"
+    log.write_text("header\n" * 100, encoding="utf-8")
+    cp = TailCheckpoint.load(str(tmp_path))
+    cp.update(str(log), 350)
+    cp.processed.check_and_add("k1")
+    cp.save()
+
+    loaded = TailCheckpoint.load(str(tmp_path))
+    assert loaded.resume_position(str(log)) == 350
+    assert "k1" in loaded.processed
+
+    # A new log (different head) starts from the beginning
+    log.write_text("other\n" * 100, encoding="utf-8")
+    assert loaded.resume_position(str(log)) == 0
@@ -0,0 +1,60 @@
+import os
+
+import generate_overlay
+from generate_overlay import MATCH_PAGE_MARKER, build_match_view, render_match_html, theme_cache
+
+USER_CSS = '.players :first-child { color: red; }\n.map::after { content: "x : y"; }\n'
+USER_TEMPLATE = """<html><head><style>$css</style></head>
+<body>
+<pre>  $map  </pre>
+<script>
+  var a = 1;
+</script>
+$players
+</body></html>
+"""
+
+
+def _render(tmp_path):
+    view = build_match_view([], "MAP_A", output_dir=str(tmp_path))
+    return render_match_html(view)
+
+
+def test_user_theme_files_are_used_as_written(tmp_path):
+    theme = tmp_path / "mytheme"
+    theme.mkdir()
+    (theme / "match.css").write_text(USER_CSS, encoding="utf-8")
+    (theme / "match.html").write_text(USER_TEMPLATE, encoding="utf-8")
+    theme_cache.set_directory(str(theme))
+    try:
+        page = _render(tmp_path)
+    finally:
+        theme_cache.set_directory(None)
+    assert USER_CSS in page
+    assert "<script>\n  var a = 1;\n</script>" in page
+    # Custom templates still get the marker the hidden page polls for
+    assert MATCH_PAGE_MARKER + "</head>" in page
+
+
+def test_theme_edits_are_picked_up(tmp_path):
+    theme = tmp_path / "mytheme"
+    theme.mkdir()
+    css = theme / "match.css"
+    css.write_text(".map{color:red}", encoding="utf-8")
+    theme_cache.set_directory(str(theme))
+    try:
+        assert ".map{color:red}" in _render(tmp_path)
+        assert not theme_cache.check_for_changes()
+        css.write_text(".map{color:blue}", encoding="utf-8")
+        st = os.stat(css)
+        os.utime(css, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert theme_cache.check_for_changes()
+        assert ".map{color:blue}" in _render(tmp_path)
+    finally:
+        theme_cache.set_directory(None)
+
+
+def test_builtin_theme_is_minified(tmp_path):
+    page = _render(tmp_path)
+    assert "\n" not in page.rstrip("\n")
+    assert generate_overlay.minify_css(generate_overlay.MATCH_CSS) in page
@@ -0,0 +1,139 @@
+"""
+Hot-reloadable overlay themes.
+
+A theme is a directory with up to three pages, each an optional template and
+stylesheet: `match.html` / `match.css`, `placeholder.html` /
+`placeholder.css` and `hidden.html` / `hidden.css`. Missing files fall back
+to the built-in defaults from generate_overlay.py.
+
+Templates use `string.Template` placeholders (`$css`, `$map`, ...; write `$$`
+for a literal dollar sign). Each page is compiled once into memory, so
+rendering never reads theme files. `ThemeCache.check_for_changes()` compares
+file mtimes and recompiles only the pages whose files changed; the monitor
+calls it periodically and re-renders the overlay on a change, so edits show
+up without a restart.
+"""
+
+import os
+import threading
+from string import Template
+
+import metrics
+
+DEFAULT_THEMES_DIR = "themes"
+THEME_CHECK_INTERVAL_S = 2.0
+
+
+class ThemeCache:
+    """
+    Compiled templates for one theme, invalidated by file mtime.
+
+    Args:
+        defaults (dict): page -> (template text, css text) used when the theme
+            has no file for that part.
+        directory (str): Theme directory, or None for the built-in theme.
+    """
+
+    def __init__(self, defaults, directory=None):
+        self.defaults = dict(defaults)
+        self.version = 0
+        self._lock = threading.Lock()
+        self._compiled = {}  # page -> (Template, css)
+        self._mtimes = {}  # path -> mtime_ns, None when the file is absent
+        self.directory = None
+        self.set_directory(directory)
+
+    def set_directory(self, directory):
+        """Switch to another theme directory (None for built-in) and compile it."""
+        with self._lock:
+            self.directory = directory
+            self._compiled = {}
+            self._mtimes = {}
+        self.check_for_changes()
+
+    def _paths(self, page):
+        if not self.directory:
+            return None, None
+        return (os.path.join(self.directory, page + ".html"),
+                os.path.join(self.directory, page + ".css"))
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _read(path, fallback):
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return fallback
+        except Exception as e:
+            print(f"ERROR reading theme file {path}: {e}")
+            return fallback
+
+    def _compile(self, page):
+        template_text, css_text = self.defaults[page]
+        html_path, css_path = self._paths(page)
+        if html_path:
+            template_text = self._read(html_path, template_text)
+            css_text = self._read(css_path, css_text)
+        return Template(template_text), css_text
+
+    def check_for_changes(self):
+        """
+        Stat the theme files and recompile pages whose files changed (or appeared
+        / disappeared). Returns True if anything was recompiled.
+        """
+        changed = False
+        for page in self.defaults:
+            paths = [p for p in self._paths(page) if p]
+            mtimes = {p: self._mtime(p) for p in paths}
+            with self._lock:
+                stale = page not in self._compiled or any(self._mtimes.get(p, -1) != m for p, m in mtimes.items())
+            if not stale:
+                continue
+            compiled = self._compile(page)
+            with self._lock:
+                self._compiled[page] = compiled
+                self._mtimes.update(mtimes)
+            changed = True
+        if changed:
+            with self._lock:
+                self.version += 1
+            metrics.incr("theme_reloads")
+        return changed
+
+    def page(self, page):
+        """Return (Template, css) for `page` from memory."""
+        with self._lock:
+            compiled = self._compiled.get(page)
+        if compiled is None:
+            compiled = self._compile(page)
+            with self._lock:
+                self._compiled[page] = compiled
+        return compiled
+
+    def render(self, page, **values):
+        """Fill `page`'s template; `$css` is the theme stylesheet plus `extra_css`."""
+        template, css = self.page(page)
+        values["css"] = css + values.pop("extra_css", "")
+        return template.safe_substitute(values)
+
+
+def theme_directory(settings, base_dir=None):
+    """Return the theme directory selected by `theme` / `themes_dir` in settings.json, or None."""
+    name = settings.get("theme")
+    if not name:
+        return None
+    themes_dir = settings.get("themes_dir") or DEFAULT_THEMES_DIR
+    if base_dir and not os.path.isabs(themes_dir):
+        themes_dir = os.path.join(base_dir, themes_dir)
+    path = os.path.join(themes_dir, name)
+    if not os.path.isdir(path):
+        print(f"WARNING: theme {name!r} not found in {themes_dir}; using built-in theme")
+        return None
+    return path